@@ -2,17 +2,212 @@ from crewai import Agent
 from textwrap import dedent
 from langchain_openai import OpenAI, ChatOpenAI
 from langchain.tools import BaseTool
+from langchain.callbacks.base import BaseCallbackHandler
 from typing import Any, Type
 from pydantic import BaseModel, Field
-import requests
 import os
 import re
 from datetime import datetime
+import functools
 import json
+import shutil
+import threading
 import uuid
-import fal_client as fal
 from decouple import config
 from claude_refinement import ClaudeRefinementService
+from clients import get_fal_runner, get_http_session, get_quota_manager, get_refinement_service
+from asset_store import AssetStore
+from downloads import download_file, DownloadError
+from tracing import bind_context, span, start_span
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+import time
+
+
+def _slide_workers(max_workers, slide_count):
+    """Bound the number of slides generated at once (FAL_MAX_CONCURRENCY, default 4)"""
+    if max_workers is None:
+        max_workers = config("FAL_MAX_CONCURRENCY", default=4, cast=int)
+    return max(1, min(max_workers, slide_count or 1))
+
+
+_asset_store = None
+
+def _get_asset_store():
+    global _asset_store
+    if _asset_store is None:
+        _asset_store = AssetStore.from_config()
+    return _asset_store
+
+
+def _run_cancellable(runner, model, arguments, cancel):
+    """Flux request that is cancelled on fal's side as soon as cancel is set"""
+    from fal_queue import FalCancelledError, FalQueueClient
+    if isinstance(runner, FalQueueClient):
+        return runner.run(model, arguments, cancel=cancel)
+    import fal_client
+    handle = runner.submit(model, arguments=arguments)
+    poll_interval = config("FAL_POLL_INTERVAL", default=0.5, cast=float)
+    while not isinstance(handle.status(), fal_client.Completed):
+        if cancel.wait(poll_interval):
+            handle.cancel()
+            raise FalCancelledError(f"fal request {handle.request_id} for {model} cancelled")
+    return handle.get()
+
+
+def _flux_run(model, arguments, cancel=None):
+    """
+    Flux run backed by the asset store, so a repeat request is answered locally.
+    Setting the optional cancel event abandons the run and cancels the fal request.
+    """
+    key = AssetStore.request_key(model, arguments)
+    with span("fal.run", model=model, num_images=arguments.get("num_images"), seed=arguments.get("seed")) as call:
+        record = _get_asset_store().lookup(key)
+        if record:
+            print(f"Asset store hit for {model} (seed {record.get('seed')})")
+            call.set(asset_store="hit")
+            # url stays the original fal URL, as on a miss; the local copy is exposed separately
+            blob_path = _get_asset_store().blob_path(record["sha256"], record.get("extension", "png"))
+            image = {"url": record.get("image_url"), "blob_path": blob_path}
+            return {"images": [image], "seed": record.get("seed"), "asset": record, "asset_key": key}
+        
+        with get_quota_manager().acquire("fal", model) as lease:
+            call.set(queue_wait_s=round(lease.waited, 3))
+            if cancel is None:
+                result = get_fal_runner().run(model, arguments=arguments)
+            else:
+                result = _run_cancellable(get_fal_runner(), model, arguments, cancel)
+        call.set(hedged=result.get("hedged"), images=len(result.get("images") or []))
+    result["asset_key"] = key
+    return result
+
+
+def _save_flux_image(result, local_path, index=0):
+    """Save one image of a Flux result (the first by default) to local_path and return the HTTP status code"""
+    store = _get_asset_store()
+    if result.get("asset"):
+        with span("file.write", path=local_path, source="asset_store"):
+            store.link(result["asset"]["sha256"], local_path)
+        result.setdefault("saved", {})[index] = dict(result["asset"], key=result.get("asset_key"))
+        return 200
+    
+    image_url = result['images'][index]['url']
+    try:
+        with span("download", url=image_url) as call:
+            download = download_file(image_url, store.download_path() if store.enabled else local_path, session=get_http_session())
+            call.set(bytes=download["bytes"], bytes_per_sec=download["bytes_per_sec"], resumes=download.get("resumes"))
+        saved = {"key": result.get("asset_key"), "image_url": image_url, "seed": result.get('seed')}
+        if store.enabled:
+            # Identical bytes are stored once; the job folder gets a link
+            with span("file.write", path=local_path, source="download", bytes=download["bytes"]):
+                saved["sha256"] = store.put_file(download["path"])
+                store.record(saved["key"], saved["sha256"], image_url=image_url, seed=result.get('seed'))
+                store.link(saved["sha256"], local_path)
+        result.setdefault("saved", {})[index] = saved
+    except DownloadError as e:
+        if e.status_code is None:
+            raise
+        return e.status_code
+    
+    if index == 0:
+        result["download"] = download
+    print(f"Downloaded {download['bytes']} bytes in {download['seconds']}s ({(download['bytes_per_sec'] or 0) / 1024:.0f} KB/s)")
+    return 200
+
+
+# Recompression and web copies run on one background thread, after the image has been handed out
+_postprocess_executor = None
+_postprocess_lock = threading.Lock()
+# Pending passes by image path, for postprocess_report(); only the most recent are kept
+_postprocessing = {}
+_POSTPROCESS_KEEP = 256
+
+
+def _queue_postprocess(result, local_path, index=0):
+    """Start the recompression and web-copy pass for a saved image of a Flux result"""
+    global _postprocess_executor
+    saved = dict((result.get("saved") or {}).get(index) or {})
+    with _postprocess_lock:
+        if _postprocess_executor is None:
+            _postprocess_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="png-postprocess")
+        _postprocessing[os.path.abspath(local_path)] = _postprocess_executor.submit(bind_context(_postprocess_png), local_path, saved)
+        while len(_postprocessing) > _POSTPROCESS_KEEP:
+            del _postprocessing[next(iter(_postprocessing))]
+
+
+def _queue_slide_postprocess(result, local_path):
+    """Carousel and story images get the pass only when PNG_OPTIMIZE_SLIDES is on"""
+    from png_optimize import optimize_settings
+    if optimize_settings()["slides"]:
+        _queue_postprocess(result, local_path)
+
+
+def postprocess_report(local_path):
+    """Wait for the background pass of a saved image; returns its optimization and derivatives fields"""
+    with _postprocess_lock:
+        future = _postprocessing.pop(os.path.abspath(local_path), None)
+    return future.result() if future is not None else {}
+
+
+def _postprocess_png(local_path, saved):
+    """
+    Recompress local_path (unless its asset-store blob already was) and write its
+    web copies. When local_path is still the blob's hard link, the smaller file
+    replaces the blob, so later asset-store hits get it without recompressing.
+    """
+    store = _get_asset_store()
+    optimization = saved.get("optimization")
+    if optimization is None:
+        sha256 = saved.get("sha256")
+        linked = bool(store.enabled and sha256) and _same_file(local_path, store.blob_path(sha256, saved.get("extension", "png")))
+        optimization = _optimize_download(local_path)
+        if linked and optimization:
+            original_sha256 = sha256
+            if optimization["replaced"]:
+                with open(local_path, "rb") as f:
+                    sha256 = store.put_bytes(f.read())
+                store.link(sha256, local_path)
+            store.record(saved.get("key"), sha256, image_url=saved.get("image_url"), seed=saved.get("seed"), optimization=optimization)
+            if sha256 != original_sha256:
+                # The record now points at the smaller blob; the original goes unless another job folder links it
+                store.discard_unlinked(original_sha256, saved.get("extension", "png"))
+    fields = {"optimization": optimization} if optimization else {}
+    fields.update(_web_derivatives(local_path))
+    return fields
+
+
+def _same_file(path, other):
+    try:
+        return os.path.samefile(path, other)
+    except OSError:
+        return False
+
+
+def _optimize_download(path):
+    """Recompress a saved image in place; returns the report, or None when off or failed"""
+    from png_optimize import optimize_png, optimize_settings
+    if not optimize_settings()["enabled"]:
+        return None
+    try:
+        with span("png.optimize", path=path) as call:
+            report = optimize_png(path)
+            call.set(original_bytes=report["original_bytes"], bytes=report["bytes"], saved_ratio=report["saved_ratio"])
+        return report
+    except Exception as e:
+        print(f"Error optimizing PNG: {str(e)}")
+        return None
+
+
+def _web_derivatives(local_path):
+    """WebP (and optionally AVIF) copies of a saved PNG for web previews, as result fields"""
+    from png_optimize import write_derivatives
+    try:
+        with span("png.derivatives", path=local_path) as call:
+            derivatives = write_derivatives(local_path)
+            call.set(formats=",".join(derivatives), bytes=sum(entry["bytes"] for entry in derivatives.values()))
+        return {"derivatives": derivatives} if derivatives else {}
+    except Exception as e:
+        print(f"Error writing web derivatives: {str(e)}")
+        return {}
 
 
 class LogoGeneratorArgs(BaseModel):
@@ -32,12 +227,44 @@ class LogoGeneratorTool(BaseTool):
     output_folder: str = None
     claude_service: ClaudeRefinementService = None
     show_grid_lines: bool = False
+    speculative: bool = False
+    speculative_policy: str = "keep"
+    speculative_deadline: float = None
+    num_candidates: int = 1
+    result_sink: Any = None
+    vectorize: bool = True
+    alpha_matte: bool = True
+    brand_kit: bool = True
+    fresh: bool = False
+    on_saved: Any = None
 
-    def __init__(self, output_folder=None, show_grid_lines=False):
+    def __init__(self, output_folder=None, show_grid_lines=False, speculative=False, speculative_policy=None, speculative_deadline=None, num_candidates=None, result_sink=None, vectorize=None, alpha_matte=None, brand_kit=None, fresh=None, on_saved=None):
         super().__init__()
         self.output_folder = output_folder
-        self.claude_service = ClaudeRefinementService()
+        self.claude_service = get_refinement_service()
         self.show_grid_lines = show_grid_lines
+        # Speculative mode: start Flux on the fallback prompt while Claude refines.
+        # Policy "keep" returns the speculative logo, "race" also runs the refined
+        # prompt and prefers it when it finishes within the deadline (seconds).
+        self.speculative = speculative
+        self.speculative_policy = speculative_policy or config("LOGO_SPECULATIVE_POLICY", default="keep")
+        if self.speculative_policy not in ("keep", "race"):
+            raise ValueError(f"Unknown speculative policy {self.speculative_policy!r}, expected 'keep' or 'race'")
+        self.speculative_deadline = speculative_deadline if speculative_deadline is not None else config("LOGO_SPECULATIVE_DEADLINE", default=45.0, cast=float)
+        # Candidates per Flux call; more than one are scored locally and the best is kept
+        self.num_candidates = max(1, min(4, num_candidates or config("LOGO_CANDIDATES", default=1, cast=int)))
+        # Optional list that receives every result dict, so callers need not parse agent text
+        self.result_sink = result_sink
+        # Optional callback that gets the result as soon as the PNG is saved, before the matte, SVG and exports
+        self.on_saved = on_saved
+        # Flux returns opaque PNGs; key out the flat backdrop locally instead of regenerating
+        self.alpha_matte = config("LOGO_ALPHA_MATTE", default=True, cast=bool) if alpha_matte is None else alpha_matte
+        # Trace the downloaded PNG into a path-based SVG next to it
+        self.vectorize = config("LOGO_VECTORIZE", default=True, cast=bool) if vectorize is None else vectorize
+        # Favicons, app icons and social avatars from the same PNG
+        self.brand_kit = config("LOGO_BRAND_KIT", default=True, cast=bool) if brand_kit is None else brand_kit
+        # A random seed instead of one derived from the brief: a new variation, never an asset-store hit
+        self.fresh = config("LOGO_FRESH", default=False, cast=bool) if fresh is None else fresh
 
     def _run(self, prompt: str, logo_style: str = None, company_name: str = None, industry: str = "", preferred_color: str = "", brand_tone: str = "") -> str:
         try:
@@ -75,63 +302,64 @@ class LogoGeneratorTool(BaseTool):
                     if 'Marqait' in prompt and logo_style is None:
                         company_name = 'Marqait'
                         logo_style = 'Emblem'  # Default based on user selection
-            
+        except Exception as e:
+            print(f"Detailed error in LogoGeneratorTool: {str(e)}")
+            return self._error_result(prompt, logo_style, company_name, e)
+        
+        return self.generate(prompt, logo_style, company_name, industry, preferred_color, brand_tone)
+
+    def generate(self, prompt, logo_style, company_name, industry="", preferred_color="", brand_tone=""):
+        """Generate, save and describe one logo from an already structured brief; returns the tool JSON"""
+        try:
             # Create comprehensive logo-specific context for Claude refinement
             logo_context = f"Logo style: {logo_style}, Company: {company_name}, Industry: {industry}, Brand tone: {brand_tone}, Color: {preferred_color}, Professional brand identity"
             
             # Refine the prompt using Claude with all advanced parameters
             print(f"Original logo prompt: {prompt}")
-            refined_prompt = self.claude_service.refine_logo_prompt(
-                prompt, logo_context, logo_style, format="PNG",
-                company_name=company_name, industry=industry, 
-                preferred_color=preferred_color, brand_tone=brand_tone
-            )
-            print(f"Claude-refined logo prompt: {refined_prompt}")
+            prompt_source = "refined"
+            seed = AssetStore.random_seed() if self.fresh else AssetStore.derive_seed(company_name, logo_style, industry, preferred_color, brand_tone, prompt)
+            if self.speculative:
+                refined_prompt, result, prompt_source = self._speculative_generate(
+                    prompt, logo_context, logo_style, company_name, industry, preferred_color, brand_tone, seed
+                )
+            else:
+                refined_prompt = self.claude_service.refine_logo_prompt(
+                    prompt, logo_context, logo_style, format="PNG",
+                    company_name=company_name, industry=industry, 
+                    preferred_color=preferred_color, brand_tone=brand_tone
+                )
+                print(f"Claude-refined logo prompt: {refined_prompt}")
+                result = self._submit_logo(refined_prompt, company_name, seed)
             
-            # Ensure FAL_KEY is set in environment
-            os.environ['FAL_KEY'] = config('FAL_KEY')
+            image_url = result['images'][0]['url']
             
-            # Submit request to Flux Pro with WORLD-CLASS logo optimization and transparent background
-            result = fal.run(
-                "fal-ai/flux-pro",
-                arguments={
-                    "prompt": f"{refined_prompt}, ISOLATED SINGLE LOGO ONLY, completely transparent background, no multiple versions, no comparison layouts, no template format, no grid lines, no decorative backgrounds, no extra text, only company name '{company_name}', single standalone logo design, clean professional logo",
-                    "image_size": "square_hd",  # Perfect square for maximum versatility
-                    "num_inference_steps": 28,  # High quality steps
-                    "guidance_scale": 3.5,  # Optimal balance for logo design
-                    "num_images": 1,  # Single high-quality logo
-                    "enable_safety_checker": False,  # Allow creative freedom for professional logos
-                    "output_format": "png",  # PNG format for transparency support
-                    "seed": None  # Random seed for variety
-                }
-            )
+            # Create unique filename for the logo
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            unique_id = str(uuid.uuid4())[:8]
+            safe_company_name = re.sub(r'[^\w\s-]', '', company_name.lower().replace(' ', '_'))[:20]
+            filename = f"logo_{safe_company_name}_{logo_style.lower()}_{timestamp}_{unique_id}.png"
             
-            image_url = result['images'][0]['url']
+            # Use the specific output folder if provided
+            if self.output_folder:
+                os.makedirs(self.output_folder, exist_ok=True)
+                local_path = os.path.join(self.output_folder, filename)
+            else:
+                # Fallback to default logos folder
+                current_dir = os.getcwd()
+                logos_dir = os.path.join(current_dir, "generated_logos")
+                os.makedirs(logos_dir, exist_ok=True)
+                local_path = os.path.join(logos_dir, filename)
             
-            # Download and save the logo locally
-            image_response = requests.get(image_url)
-            if image_response.status_code == 200:
-                # Create unique filename for the logo
-                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                unique_id = str(uuid.uuid4())[:8]
-                safe_company_name = re.sub(r'[^\w\s-]', '', company_name.lower().replace(' ', '_'))[:20]
-                filename = f"logo_{safe_company_name}_{logo_style.lower()}_{timestamp}_{unique_id}.png"
-                
-                # Use the specific output folder if provided
-                if self.output_folder:
-                    os.makedirs(self.output_folder, exist_ok=True)
-                    local_path = os.path.join(self.output_folder, filename)
-                else:
-                    # Fallback to default logos folder
-                    current_dir = os.getcwd()
-                    logos_dir = os.path.join(current_dir, "generated_logos")
-                    os.makedirs(logos_dir, exist_ok=True)
-                    local_path = os.path.join(logos_dir, filename)
-                
-                with open(local_path, 'wb') as f:
-                    f.write(image_response.content)
-                
-                return json.dumps({
+            # Download (or link from the asset store) and save the logo locally
+            candidates = None
+            if len(result['images']) > 1:
+                status_code, candidates = self._save_candidates(result, local_path)
+                if candidates:
+                    image_url = candidates[0]["url"]
+            else:
+                status_code = _save_flux_image(result, local_path)
+            if status_code == 200:
+                output = {
                     "image_url": image_url,
                     "local_path": local_path,
                     "filename": filename,
@@ -142,31 +370,211 @@ class LogoGeneratorTool(BaseTool):
                     "format": "PNG",
                     "resolution": "1024x1024",
                     "seed": result.get('seed'),
+                    "prompt_source": prompt_source,
                     "logo_type": "professional_brand_logo"
-                })
+                }
+                if candidates:
+                    output["score"] = candidates[0]["score"]
+                    output["candidates"] = candidates
+                if self.on_saved is not None:
+                    try:
+                        self.on_saved(dict(output))
+                    except Exception as e:
+                        print(f"Error in logo saved callback: {str(e)}")
+                if self.alpha_matte:
+                    output.update(self._matte(local_path))
+                # After the matte, which rewrites the PNG
+                _queue_postprocess(result, local_path, result.get("best_index", 0))
+                # The brand kit is exported while the SVG is traced; both only read the final PNG
+                with ThreadPoolExecutor(max_workers=1) as executor:
+                    kit = executor.submit(bind_context(self._brand_kit), local_path) if self.brand_kit else None
+                    if self.vectorize:
+                        output.update(self._vectorize(local_path, company_name))
+                    if kit is not None:
+                        output.update(kit.result())
+                return self._emit(output)
             else:
-                return json.dumps({
+                return self._emit({
                     "image_url": image_url,
                     "local_path": "Failed to download",
                     "filename": "Failed to download",
                     "company_name": company_name,
                     "logo_style": logo_style,
                     "prompt": prompt,
-                    "error": f"Failed to download logo: {image_response.status_code}"
+                    "error": f"Failed to download logo: {status_code}"
                 })
                 
         except Exception as e:
             print(f"Detailed error in LogoGeneratorTool: {str(e)}")
-            return json.dumps({
-                "image_url": "Error",
-                "local_path": "Error",
-                "filename": "Error",
-                "company_name": company_name,
-                "logo_style": logo_style,
-                "prompt": prompt,
-                "model": "flux-pro",
-                "error": f"Error generating Flux Pro logo: {str(e)}"
+            return self._error_result(prompt, logo_style, company_name, e)
+
+    def _matte(self, local_path):
+        """Transparency fields for the result; a logo whose backdrop cannot be keyed out is flagged"""
+        from alpha_matte import apply_matte
+        try:
+            with span("alpha_matte", path=local_path) as call:
+                report = apply_matte(local_path)
+                call.set(score=report["score"], applied=report["applied"], matte_ms=report["matte_ms"])
+            if not report["passed"]:
+                print(f"Transparency check failed for {local_path}: score {report['score']}")
+            return {"transparency": report, "transparency_flagged": not report["passed"]}
+        except Exception as e:
+            print(f"Error removing logo background: {str(e)}")
+            return {}
+
+    def _brand_kit(self, local_path):
+        """Brand kit fields for the result: every exported file with its size and bytes"""
+        from brand_kit import export_brand_kit
+        try:
+            with span("brand_kit", path=local_path) as call:
+                kit = export_brand_kit(local_path)
+                call.set(files=len(kit["files"]), bytes=sum(entry["bytes"] for entry in kit["files"].values()))
+            print(f"Brand kit saved: {kit['folder']} ({len(kit['files'])} files in {kit['seconds']}s)")
+            return {"brand_kit": kit["files"]}
+        except Exception as e:
+            print(f"Error exporting brand kit: {str(e)}")
+            return {}
+
+    def _vectorize(self, local_path, company_name):
+        """SVG fields for the result; a failed trace leaves the PNG result as it is"""
+        from vectorize import vectorize
+        try:
+            with span("vectorize", path=local_path) as call:
+                traced = vectorize(local_path, title=f"{company_name} logo" if company_name else None)
+                call.set(bytes=traced["bytes"], paths=traced["paths"])
+            print(f"Vector SVG saved: {traced['svg_local_path']} ({traced['bytes'] // 1024} KB)")
+            return {"svg_local_path": traced["svg_local_path"], "svg_filename": os.path.basename(traced["svg_local_path"])}
+        except Exception as e:
+            print(f"Error vectorizing logo: {str(e)}")
+            return {}
+
+    def _emit(self, data):
+        """Record a result in the sink and return it as the tool's JSON string"""
+        if self.result_sink is not None:
+            self.result_sink.append(data)
+        return json.dumps(data)
+
+    def _error_result(self, prompt, logo_style, company_name, error):
+        return self._emit({
+            "image_url": "Error",
+            "local_path": "Error",
+            "filename": "Error",
+            "company_name": company_name,
+            "logo_style": logo_style,
+            "prompt": prompt,
+            "model": "flux-pro",
+            "error": f"Error generating Flux Pro logo: {str(error)}"
+        })
+
+    def _submit_logo(self, refined_prompt, company_name, seed=None, cancel=None):
+        # Submit request to Flux Pro with WORLD-CLASS logo optimization and transparent background
+        return _flux_run(
+            "fal-ai/flux-pro",
+            arguments={
+                "prompt": f"{refined_prompt}, ISOLATED SINGLE LOGO ONLY, completely transparent background, no multiple versions, no comparison layouts, no template format, no grid lines, no decorative backgrounds, no extra text, only company name '{company_name}', single standalone logo design, clean professional logo",
+                "image_size": "square_hd",  # Perfect square for maximum versatility
+                "num_inference_steps": 28,  # High quality steps
+                "guidance_scale": 3.5,  # Optimal balance for logo design
+                "num_images": self.num_candidates,  # Extra candidates are ranked locally
+                "enable_safety_checker": False,  # Allow creative freedom for professional logos
+                "output_format": "png",  # PNG format for transparency support
+                "seed": seed  # Derived from the brief so repeat requests are reusable
+            },
+            cancel=cancel
+        )
+
+    def _save_candidates(self, result, local_path):
+        """
+        Download every candidate of a multi-image result concurrently, score them and
+        place the best one at local_path. Returns (status_code, ranked candidates).
+        """
+        from logo_scoring import rank_candidates
+        
+        base, extension = os.path.splitext(local_path)
+        paths = [f"{base}_c{i + 1}{extension}" for i in range(len(result['images']))]
+        with ThreadPoolExecutor(max_workers=len(paths)) as executor:
+            status_codes = list(executor.map(bind_context(lambda i: _save_flux_image(result, paths[i], index=i)), range(len(paths))))
+        
+        saved = [path for path, status_code in zip(paths, status_codes) if status_code == 200]
+        if not saved:
+            return status_codes[0], None
+        
+        ranked = rank_candidates(saved)
+        best = paths.index(ranked[0][0])
+        result["best_index"] = best
+        sha256 = (result.get("saved") or {}).get(best, {}).get("sha256")
+        if sha256:
+            # Another link to the stored blob, like every other saved image
+            _get_asset_store().link(sha256, local_path)
+        else:
+            try:
+                os.link(ranked[0][0], local_path)
+            except OSError:
+                shutil.copyfile(ranked[0][0], local_path)
+        candidates = []
+        for rank, (path, metrics) in enumerate(ranked, 1):
+            index = paths.index(path)
+            candidates.append({
+                "rank": rank,
+                "local_path": path,
+                "filename": os.path.basename(path),
+                "url": result['images'][index]['url'],
+                "score": metrics["score"],
+                "metrics": metrics
             })
+        print(f"Scored {len(saved)} logo candidates, best {candidates[0]['filename']} ({candidates[0]['score']})")
+        return 200, candidates
+
+    def _speculative_generate(self, prompt, logo_context, logo_style, company_name, industry, preferred_color, brand_tone, seed=None):
+        """Overlap Claude refinement with a Flux job submitted on the fallback prompt"""
+        started = time.monotonic()
+        fallback_prompt = self.claude_service.fallback_logo_prompt(prompt, logo_style, company_name)
+        # Set once a result is chosen; any Flux job still running has lost and is cancelled on fal's side
+        cancel = threading.Event()
+        executor = ThreadPoolExecutor(max_workers=3)
+        refine = functools.partial(
+            self.claude_service.refine_logo_prompt,
+            prompt, logo_context, logo_style, format="PNG",
+            company_name=company_name, industry=industry,
+            preferred_color=preferred_color, brand_tone=brand_tone
+        )
+        try:
+            speculative = executor.submit(bind_context(self._submit_logo), fallback_prompt, company_name, seed, cancel)
+            # "keep" only needs the refined prompt if the speculative job fails, so it is not requested up front
+            refinement = executor.submit(bind_context(refine)) if self.speculative_policy == "race" else None
+            refined = None
+            
+            if refinement is not None:
+                # Prefer the refined logo, but only if it lands within the deadline
+                try:
+                    refined_prompt = refinement.result(timeout=max(0, self.speculative_deadline - (time.monotonic() - started)))
+                    print(f"Claude-refined logo prompt: {refined_prompt}")
+                    if refined_prompt != fallback_prompt:
+                        refined = executor.submit(bind_context(self._submit_logo), refined_prompt, company_name, seed, cancel)
+                        result = refined.result(timeout=max(0, self.speculative_deadline - (time.monotonic() - started)))
+                        return refined_prompt, result, "refined"
+                except FuturesTimeoutError:
+                    print(f"Speculative logo: refined prompt missed the {self.speculative_deadline}s deadline")
+                except Exception as e:
+                    print(f"Speculative logo: refined generation failed: {str(e)}")
+            
+            try:
+                result = speculative.result()
+            except Exception as e:
+                # The speculative job failed, fall back to the refined prompt
+                print(f"Speculative logo: fallback generation failed: {str(e)}")
+                refined_prompt = refinement.result() if refinement is not None else refine()
+                if refined is not None:
+                    # The refined job that missed the deadline is still running; wait for it rather than pay twice
+                    return refined_prompt, refined.result(), "refined"
+                return refined_prompt, self._submit_logo(refined_prompt, company_name, seed), "refined"
+            
+            print("Speculative logo: using fallback prompt result")
+            return fallback_prompt, result, "speculative"
+        finally:
+            # Do not wait for the losing branch, and stop paying for its Flux job
+            cancel.set()
+            executor.shutdown(wait=False, cancel_futures=True)
 
 
 
@@ -180,7 +588,7 @@ class ImageGeneratorTool(BaseTool):
     def __init__(self, output_folder=None):
         super().__init__()
         self.output_folder = output_folder
-        self.claude_service = ClaudeRefinementService()
+        self.claude_service = get_refinement_service()
 
     def _run(self, prompt: str) -> str:
         try:
@@ -189,11 +597,7 @@ class ImageGeneratorTool(BaseTool):
             refined_prompt = self.claude_service.refine_image_prompt(prompt)
             print(f"Claude-refined prompt: {refined_prompt}")
             
-            # Ensure FAL_KEY is set in environment
-            os.environ['FAL_KEY'] = config('FAL_KEY')
-            
-            # Submit request to Flux Pro with refined prompt
-            result = fal.run(
+            result = _flux_run(
                 "fal-ai/flux-pro",
                 arguments={
                     "prompt": refined_prompt,
@@ -202,34 +606,33 @@ class ImageGeneratorTool(BaseTool):
                     "guidance_scale": 3.5,
                     "num_images": 1,
                     "enable_safety_checker": False,
-                    "output_format": "png"
+                    "output_format": "png",
+                    "seed": AssetStore.derive_seed("image", prompt)  # Same brief, same request
                 }
             )
             
             image_url = result['images'][0]['url']
             
-            # Download and save the image locally
-            image_response = requests.get(image_url)
-            if image_response.status_code == 200:
-                # Create unique filename with timestamp
-                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                unique_id = str(uuid.uuid4())[:8]
-                filename = f"generated_image_{timestamp}_{unique_id}.png"
-                
-                # Use the specific output folder if provided, otherwise use default
-                if self.output_folder:
-                    os.makedirs(self.output_folder, exist_ok=True)
-                    local_path = os.path.join(self.output_folder, filename)
-                else:
-                    # Fallback to default generated_images folder
-                    current_dir = os.getcwd()
-                    images_dir = os.path.join(current_dir, "generated_images")
-                    os.makedirs(images_dir, exist_ok=True)
-                    local_path = os.path.join(images_dir, filename)
-                
-                with open(local_path, 'wb') as f:
-                    f.write(image_response.content)
-                
+            # Create unique filename with timestamp
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            unique_id = str(uuid.uuid4())[:8]
+            filename = f"generated_image_{timestamp}_{unique_id}.png"
+            
+            # Use the specific output folder if provided, otherwise use default
+            if self.output_folder:
+                os.makedirs(self.output_folder, exist_ok=True)
+                local_path = os.path.join(self.output_folder, filename)
+            else:
+                # Fallback to default generated_images folder
+                current_dir = os.getcwd()
+                images_dir = os.path.join(current_dir, "generated_images")
+                os.makedirs(images_dir, exist_ok=True)
+                local_path = os.path.join(images_dir, filename)
+            
+            # Download (or link from the asset store) and save the image locally
+            status_code = _save_flux_image(result, local_path)
+            if status_code == 200:
+                _queue_postprocess(result, local_path)
                 return json.dumps({
                     "image_url": image_url,
                     "local_path": local_path,
@@ -244,7 +647,7 @@ class ImageGeneratorTool(BaseTool):
                     "local_path": "Failed to download",
                     "filename": "Failed to download",
                     "prompt": prompt,
-                    "error": f"Failed to download image: {image_response.status_code}"
+                    "error": f"Failed to download image: {status_code}"
                 })
                 
         except Exception as e:
@@ -266,91 +669,19 @@ class CarouselImageGeneratorTool(BaseTool):
     args_schema: Type[BaseModel] = CarouselImageGeneratorArgs
     output_folder: str = None
     claude_service: ClaudeRefinementService = None
+    max_workers: int = None
 
-    def __init__(self, output_folder=None):
+    def __init__(self, output_folder=None, max_workers=None):
         super().__init__()
         self.output_folder = output_folder
-        self.claude_service = ClaudeRefinementService()
+        self.claude_service = get_refinement_service()
+        self.max_workers = max_workers
 
     def _run(self, prompts: list) -> str:
         try:
-            carousel_images = []
-            
-            for i, prompt in enumerate(prompts, 1):
-                try:
-                    # Refine each prompt using Claude
-                    print(f"Carousel slide {i} - Original prompt: {prompt}")
-                    refined_prompt = self.claude_service.refine_image_prompt(prompt, f"Carousel slide {i}")
-                    print(f"Carousel slide {i} - Claude-refined prompt: {refined_prompt}")
-                    
-                    # Ensure FAL_KEY is set in environment
-                    os.environ['FAL_KEY'] = config('FAL_KEY')
-                    
-                    result = fal.run(
-                        "fal-ai/flux-pro",
-                        arguments={
-                            "prompt": refined_prompt,
-                            "image_size": "square_hd",
-                            "num_inference_steps": 28,
-                            "guidance_scale": 3.5,
-                            "num_images": 1,
-                            "enable_safety_checker": False,
-                            "output_format": "png"
-                        }
-                    )
-                    
-                    image_url = result['images'][0]['url']
-                    
-                    # Download and save the image locally
-                    image_response = requests.get(image_url)
-                    if image_response.status_code == 200:
-                        # Create unique filename with carousel index
-                        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                        unique_id = str(uuid.uuid4())[:8]
-                        filename = f"carousel_slide_{i}_{timestamp}_{unique_id}.png"
-                        
-                        # Use the specific output folder if provided, otherwise use default
-                        if self.output_folder:
-                            os.makedirs(self.output_folder, exist_ok=True)
-                            local_path = os.path.join(self.output_folder, filename)
-                        else:
-                            # Fallback to default generated_images folder
-                            current_dir = os.getcwd()
-                            images_dir = os.path.join(current_dir, "generated_images")
-                            os.makedirs(images_dir, exist_ok=True)
-                            local_path = os.path.join(images_dir, filename)
-                        
-                        with open(local_path, 'wb') as f:
-                            f.write(image_response.content)
-                        
-                        carousel_images.append({
-                            "slide_number": i,
-                            "image_url": image_url,
-                            "local_path": local_path,
-                            "filename": filename,
-                            "original_prompt": prompt,
-                            "refined_prompt": refined_prompt,
-                            "seed": result.get('seed')
-                        })
-                    else:
-                        carousel_images.append({
-                            "slide_number": i,
-                            "image_url": image_url,
-                            "local_path": "Failed to download",
-                            "filename": "Failed to download",
-                            "prompt": prompt,
-                            "error": f"Failed to download image: {image_response.status_code}"
-                        })
-                        
-                except Exception as e:
-                    carousel_images.append({
-                        "slide_number": i,
-                        "image_url": "Error",
-                        "local_path": "Error",
-                        "filename": "Error",
-                        "prompt": prompt,
-                        "error": f"Error generating image {i}: {str(e)}"
-                    })
+            # Slides are independent, so fan them out and keep results in slide order
+            with ThreadPoolExecutor(max_workers=_slide_workers(self.max_workers, len(prompts))) as executor:
+                carousel_images = list(executor.map(bind_context(self._generate_slide), range(1, len(prompts) + 1), prompts))
             
             return json.dumps({
                 "carousel_images": carousel_images,
@@ -366,6 +697,78 @@ class CarouselImageGeneratorTool(BaseTool):
                 "error": f"Error generating carousel images: {str(e)}"
             })
 
+    def _generate_slide(self, i, prompt):
+        try:
+            # Refine each prompt using Claude
+            print(f"Carousel slide {i} - Original prompt: {prompt}")
+            refined_prompt = self.claude_service.refine_image_prompt(prompt, f"Carousel slide {i}")
+            print(f"Carousel slide {i} - Claude-refined prompt: {refined_prompt}")
+            
+            result = _flux_run(
+                "fal-ai/flux-pro",
+                arguments={
+                    "prompt": refined_prompt,
+                    "image_size": "square_hd",
+                    "num_inference_steps": 28,
+                    "guidance_scale": 3.5,
+                    "num_images": 1,
+                    "enable_safety_checker": False,
+                    "output_format": "png",
+                    "seed": AssetStore.derive_seed("carousel", i, prompt)  # Same brief, same request
+                }
+            )
+            
+            image_url = result['images'][0]['url']
+            
+            # Create unique filename with carousel index
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            unique_id = str(uuid.uuid4())[:8]
+            filename = f"carousel_slide_{i}_{timestamp}_{unique_id}.png"
+            
+            # Use the specific output folder if provided, otherwise use default
+            if self.output_folder:
+                os.makedirs(self.output_folder, exist_ok=True)
+                local_path = os.path.join(self.output_folder, filename)
+            else:
+                # Fallback to default generated_images folder
+                current_dir = os.getcwd()
+                images_dir = os.path.join(current_dir, "generated_images")
+                os.makedirs(images_dir, exist_ok=True)
+                local_path = os.path.join(images_dir, filename)
+            
+            # Download (or link from the asset store) and save the image locally
+            status_code = _save_flux_image(result, local_path)
+            if status_code == 200:
+                _queue_slide_postprocess(result, local_path)
+                return {
+                    "slide_number": i,
+                    "image_url": image_url,
+                    "local_path": local_path,
+                    "filename": filename,
+                    "original_prompt": prompt,
+                    "refined_prompt": refined_prompt,
+                    "seed": result.get('seed')
+                }
+            else:
+                return {
+                    "slide_number": i,
+                    "image_url": image_url,
+                    "local_path": "Failed to download",
+                    "filename": "Failed to download",
+                    "prompt": prompt,
+                    "error": f"Failed to download image: {status_code}"
+                }
+                
+        except Exception as e:
+            return {
+                "slide_number": i,
+                "image_url": "Error",
+                "local_path": "Error",
+                "filename": "Error",
+                "prompt": prompt,
+                "error": f"Error generating image {i}: {str(e)}"
+            }
+
 
 class StoryImageGeneratorArgs(BaseModel):
     prompt: str = Field(description="The prompt for story image generation")
@@ -380,7 +783,7 @@ class StoryImageGeneratorTool(BaseTool):
     def __init__(self, output_folder=None):
         super().__init__()
         self.output_folder = output_folder
-        self.claude_service = ClaudeRefinementService()
+        self.claude_service = get_refinement_service()
 
     def _run(self, prompt: str) -> str:
         try:
@@ -389,10 +792,7 @@ class StoryImageGeneratorTool(BaseTool):
             refined_prompt = self.claude_service.refine_image_prompt(prompt, "Story format - vertical 9:16")
             print(f"Story - Claude-refined prompt: {refined_prompt}")
             
-            # Ensure FAL_KEY is set in environment
-            os.environ['FAL_KEY'] = config('FAL_KEY')
-            
-            result = fal.run(
+            result = _flux_run(
                 "fal-ai/flux-pro",
                 arguments={
                     "prompt": refined_prompt,
@@ -401,33 +801,32 @@ class StoryImageGeneratorTool(BaseTool):
                     "guidance_scale": 3.5,
                     "num_images": 1,
                     "enable_safety_checker": False,
-                    "output_format": "png"
+                    "output_format": "png",
+                    "seed": AssetStore.derive_seed("story", prompt)  # Same brief, same request
                 }
             )
             
             image_url = result['images'][0]['url']
             
-            # Download and save the image locally
-            image_response = requests.get(image_url)
-            if image_response.status_code == 200:
-                # Create unique filename with timestamp
-                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                unique_id = str(uuid.uuid4())[:8]
-                filename = f"story_image_{timestamp}_{unique_id}.png"
-                
-                # Use the specific output folder if provided, otherwise use default
-                if self.output_folder:
-                    local_path = os.path.join(self.output_folder, filename)
-                else:
-                    # Fallback to default generated_images folder
-                    current_dir = os.getcwd()
-                    images_dir = os.path.join(current_dir, "generated_images")
-                    os.makedirs(images_dir, exist_ok=True)
-                    local_path = os.path.join(images_dir, filename)
-                
-                with open(local_path, 'wb') as f:
-                    f.write(image_response.content)
-                
+            # Create unique filename with timestamp
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            unique_id = str(uuid.uuid4())[:8]
+            filename = f"story_image_{timestamp}_{unique_id}.png"
+            
+            # Use the specific output folder if provided, otherwise use default
+            if self.output_folder:
+                local_path = os.path.join(self.output_folder, filename)
+            else:
+                # Fallback to default generated_images folder
+                current_dir = os.getcwd()
+                images_dir = os.path.join(current_dir, "generated_images")
+                os.makedirs(images_dir, exist_ok=True)
+                local_path = os.path.join(images_dir, filename)
+            
+            # Download (or link from the asset store) and save the image locally
+            status_code = _save_flux_image(result, local_path)
+            if status_code == 200:
+                _queue_slide_postprocess(result, local_path)
                 return json.dumps({
                     "image_url": image_url,
                     "local_path": local_path,
@@ -445,7 +844,7 @@ class StoryImageGeneratorTool(BaseTool):
                     "filename": "Failed to download",
                     "prompt": prompt,
                     "format": "story_single",
-                    "error": f"Failed to download image: {image_response.status_code}"
+                    "error": f"Failed to download image: {status_code}"
                 })
                 
         except Exception as e:
@@ -468,91 +867,19 @@ class StorySeriesGeneratorTool(BaseTool):
     args_schema: Type[BaseModel] = StorySeriesGeneratorArgs
     output_folder: str = None
     claude_service: ClaudeRefinementService = None
+    max_workers: int = None
 
-    def __init__(self, output_folder=None):
+    def __init__(self, output_folder=None, max_workers=None):
         super().__init__()
         self.output_folder = output_folder
-        self.claude_service = ClaudeRefinementService()
+        self.claude_service = get_refinement_service()
+        self.max_workers = max_workers
 
     def _run(self, prompts: list) -> str:
         try:
-            story_images = []
-            
-            for i, prompt in enumerate(prompts, 1):
-                try:
-                    # Refine each story prompt using Claude
-                    print(f"Story series {i} - Original prompt: {prompt}")
-                    refined_prompt = self.claude_service.refine_image_prompt(prompt, f"Story series {i} - vertical 9:16")
-                    print(f"Story series {i} - Claude-refined prompt: {refined_prompt}")
-                    
-                    # Ensure FAL_KEY is set in environment
-                    os.environ['FAL_KEY'] = config('FAL_KEY')
-                    
-                    result = fal.run(
-                        "fal-ai/flux-pro",
-                        arguments={
-                            "prompt": refined_prompt,
-                            "image_size": "portrait_16_9",
-                            "num_inference_steps": 28,
-                            "guidance_scale": 3.5,
-                            "num_images": 1,
-                            "enable_safety_checker": False,
-                            "output_format": "png"
-                        }
-                    )
-                    
-                    image_url = result['images'][0]['url']
-                    
-                    # Download and save the image locally
-                    image_response = requests.get(image_url)
-                    if image_response.status_code == 200:
-                        # Create unique filename with story index
-                        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                        unique_id = str(uuid.uuid4())[:8]
-                        filename = f"story_{i}_{timestamp}_{unique_id}.png"
-                        
-                        # Use the specific output folder if provided, otherwise use default
-                        if self.output_folder:
-                            os.makedirs(self.output_folder, exist_ok=True)
-                            local_path = os.path.join(self.output_folder, filename)
-                        else:
-                            # Fallback to default generated_images folder
-                            current_dir = os.getcwd()
-                            images_dir = os.path.join(current_dir, "generated_images")
-                            os.makedirs(images_dir, exist_ok=True)
-                            local_path = os.path.join(images_dir, filename)
-                        
-                        with open(local_path, 'wb') as f:
-                            f.write(image_response.content)
-                        
-                        story_images.append({
-                            "story_number": i,
-                            "image_url": image_url,
-                            "local_path": local_path,
-                            "filename": filename,
-                            "original_prompt": prompt,
-                            "refined_prompt": refined_prompt,
-                            "seed": result.get('seed')
-                        })
-                    else:
-                        story_images.append({
-                            "story_number": i,
-                            "image_url": image_url,
-                            "local_path": "Failed to download",
-                            "filename": "Failed to download",
-                            "prompt": prompt,
-                            "error": f"Failed to download image: {image_response.status_code}"
-                        })
-                        
-                except Exception as e:
-                    story_images.append({
-                        "story_number": i,
-                        "image_url": "Error",
-                        "local_path": "Error",
-                        "filename": "Error",
-                        "prompt": prompt,
-                        "error": f"Error generating story image {i}: {str(e)}"
-                    })
+            # Stories are independent, so fan them out and keep results in story order
+            with ThreadPoolExecutor(max_workers=_slide_workers(self.max_workers, len(prompts))) as executor:
+                story_images = list(executor.map(bind_context(self._generate_story), range(1, len(prompts) + 1), prompts))
             
             return json.dumps({
                 "story_images": story_images,
@@ -571,6 +898,78 @@ class StorySeriesGeneratorTool(BaseTool):
                 "error": f"Error generating story series: {str(e)}"
             })
 
+    def _generate_story(self, i, prompt):
+        try:
+            # Refine each story prompt using Claude
+            print(f"Story series {i} - Original prompt: {prompt}")
+            refined_prompt = self.claude_service.refine_image_prompt(prompt, f"Story series {i} - vertical 9:16")
+            print(f"Story series {i} - Claude-refined prompt: {refined_prompt}")
+            
+            result = _flux_run(
+                "fal-ai/flux-pro",
+                arguments={
+                    "prompt": refined_prompt,
+                    "image_size": "portrait_16_9",
+                    "num_inference_steps": 28,
+                    "guidance_scale": 3.5,
+                    "num_images": 1,
+                    "enable_safety_checker": False,
+                    "output_format": "png",
+                    "seed": AssetStore.derive_seed("story_series", i, prompt)  # Same brief, same request
+                }
+            )
+            
+            image_url = result['images'][0]['url']
+            
+            # Create unique filename with story index
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            unique_id = str(uuid.uuid4())[:8]
+            filename = f"story_{i}_{timestamp}_{unique_id}.png"
+            
+            # Use the specific output folder if provided, otherwise use default
+            if self.output_folder:
+                os.makedirs(self.output_folder, exist_ok=True)
+                local_path = os.path.join(self.output_folder, filename)
+            else:
+                # Fallback to default generated_images folder
+                current_dir = os.getcwd()
+                images_dir = os.path.join(current_dir, "generated_images")
+                os.makedirs(images_dir, exist_ok=True)
+                local_path = os.path.join(images_dir, filename)
+            
+            # Download (or link from the asset store) and save the image locally
+            status_code = _save_flux_image(result, local_path)
+            if status_code == 200:
+                _queue_slide_postprocess(result, local_path)
+                return {
+                    "story_number": i,
+                    "image_url": image_url,
+                    "local_path": local_path,
+                    "filename": filename,
+                    "original_prompt": prompt,
+                    "refined_prompt": refined_prompt,
+                    "seed": result.get('seed')
+                }
+            else:
+                return {
+                    "story_number": i,
+                    "image_url": image_url,
+                    "local_path": "Failed to download",
+                    "filename": "Failed to download",
+                    "prompt": prompt,
+                    "error": f"Failed to download image: {status_code}"
+                }
+                
+        except Exception as e:
+            return {
+                "story_number": i,
+                "image_url": "Error",
+                "local_path": "Error",
+                "filename": "Error",
+                "prompt": prompt,
+                "error": f"Error generating story image {i}: {str(e)}"
+            }
+
 class TimingArgs(BaseModel):
     platform: str = Field(default="instagram", description="Social media platform")
 
@@ -602,7 +1001,7 @@ class CaptionRefinementTool(BaseTool):
 
     def __init__(self):
         super().__init__()
-        self.claude_service = ClaudeRefinementService()
+        self.claude_service = get_refinement_service()
 
     def _run(self, caption: str, context: str = "", platform: str = "instagram") -> str:
         try:
@@ -626,7 +1025,7 @@ class HashtagRefinementTool(BaseTool):
 
     def __init__(self):
         super().__init__()
-        self.claude_service = ClaudeRefinementService()
+        self.claude_service = get_refinement_service()
 
     def _run(self, hashtags: list, context: str = "", platform: str = "instagram") -> str:
         try:
@@ -637,13 +1036,112 @@ class HashtagRefinementTool(BaseTool):
             return "\n".join(hashtags) if hashtags else ""
 
 
+class QuotaCallbackHandler(BaseCallbackHandler):
+    """Acquires shared OpenAI quota before each agent LLM call and releases it afterwards; also traces the call"""
+
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+        self._leases = {}
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        tokens = sum(len(prompt) for prompt in prompts) // 4
+        self._start(run_id, tokens)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        tokens = sum(len(str(message.content)) for batch in messages for message in batch) // 4
+        self._start(run_id, tokens)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        lease, call = self._leases.pop(run_id, (None, None))
+        if lease:
+            usage = (response.llm_output or {}).get("token_usage") or {}
+            lease.settle(usage.get("total_tokens"))
+            lease.release()
+            call.set(prompt_tokens=usage.get("prompt_tokens"), completion_tokens=usage.get("completion_tokens"))
+            call.finish()
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        lease, call = self._leases.pop(run_id, (None, None))
+        if lease:
+            lease.release()
+            call.finish(error=error)
+
+    def _start(self, run_id, tokens):
+        call = start_span("openai.chat", model=self.model, estimated_tokens=tokens)
+        lease = get_quota_manager().acquire("openai", self.model, tokens=tokens)
+        call.set(queue_wait_s=round(lease.waited, 3))
+        self._leases[run_id] = (lease, call)
+
+
+# ChatOpenAI clients shared by every LogoDesignAgents, one per (model, temperature)
+_llm_lock = threading.Lock()
+_llms = {}
+# Per-thread agent cache, used only when agent caching is enabled
+_agent_cache = threading.local()
+
+
+def get_llm(model, temperature):
+    """Process-wide ChatOpenAI for model/temperature, built on first use"""
+    key = (model, temperature)
+    llm = _llms.get(key)
+    if llm is None:
+        with _llm_lock:
+            llm = _llms.get(key)
+            if llm is None:
+                llm = ChatOpenAI(model_name=model, temperature=temperature, callbacks=[QuotaCallbackHandler(model)])
+                _llms[key] = llm
+    return llm
+
+
+def _reset_llms():
+    global _llm_lock, _agent_cache
+    _llm_lock = threading.Lock()
+    _llms.clear()
+    _agent_cache = threading.local()
+
+
+# The clients hold connection pools, which must not be shared across a fork
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_llms)
+
+
+def _cached_agent(build):
+    """Reuse the agent built by an argument-free factory within the current thread"""
+    @functools.wraps(build)
+    def wrapper(self):
+        if not self.cache_agents:
+            return build(self)
+        cache = _agent_cache.__dict__.setdefault("agents", {})
+        if build.__name__ not in cache:
+            cache[build.__name__] = build(self)
+        return cache[build.__name__]
+    return wrapper
+
+
 class LogoDesignAgents:
-    def __init__(self):
-        self.OpenAIGPT35 = ChatOpenAI(model_name="gpt-3.5-turbo", temperature=0.7)
-        self.OpenAIGPT4 = ChatOpenAI(model_name="gpt-4", temperature=0.7)
-        self.creative_llm = ChatOpenAI(model_name="gpt-4", temperature=0.9)
-        self.brand_analyst_llm = ChatOpenAI(model_name="gpt-4", temperature=0.8)
+    def __init__(self, cache_agents=None):
+        # Agents with a fixed configuration can be reused across runs on the same
+        # thread; the logo designer is always rebuilt because its tool is per run
+        self.cache_agents = config("AGENT_CACHE", default=False, cast=bool) if cache_agents is None else cache_agents
+
+    @property
+    def OpenAIGPT35(self):
+        return get_llm("gpt-3.5-turbo", 0.7)
+
+    @property
+    def OpenAIGPT4(self):
+        return get_llm("gpt-4", 0.7)
+
+    @property
+    def creative_llm(self):
+        return get_llm("gpt-4", 0.9)
+
+    @property
+    def brand_analyst_llm(self):
+        return get_llm("gpt-4", 0.8)
 
+    @_cached_agent
     def brand_strategist_agent(self):
         return Agent(
             role="🏆 ELITE Brand Strategist & Fortune 500 Logo Psychology Expert",
@@ -676,7 +1174,7 @@ class LogoDesignAgents:
             llm=self.OpenAIGPT4,
         )
 
-    def logo_designer_agent(self, output_folder=None, show_grid_lines=False):
+    def logo_designer_agent(self, output_folder=None, show_grid_lines=False, speculative=False, num_candidates=None, result_sink=None, fresh=None, on_saved=None):
         return Agent(
             role="🚀 LEGENDARY Logo Designer & Visual Identity Architect",
             backstory=dedent("""You are Paul Rand, Saul Bass, and Milton Glaser reincarnated as an AI designer. 
@@ -724,12 +1222,13 @@ class LogoDesignAgents:
                        🚀 Global market readiness and cross-cultural effectiveness
                        ⚡ Trademark viability and competitive supremacy
                        🎯 50-year longevity and timeless design excellence"""),
-            tools=[LogoGeneratorTool(output_folder, show_grid_lines)],
+            tools=[LogoGeneratorTool(output_folder, show_grid_lines, speculative=speculative, num_candidates=num_candidates, result_sink=result_sink, fresh=fresh, on_saved=on_saved)],
             allow_delegation=False,
             verbose=True,
             llm=self.creative_llm,
         )
 
+    @_cached_agent
     def brand_analyst_agent(self):
         return Agent(
             role="💎 MASTER Brand Psychologist & Strategic Intelligence Expert",
@@ -776,6 +1275,7 @@ class LogoDesignAgents:
             llm=self.brand_analyst_llm,
         )
 
+    @_cached_agent
     def hashtag_agent(self):
         return Agent(
             role="Hashtag Research Specialist",
@@ -792,6 +1292,7 @@ class LogoDesignAgents:
             llm=self.OpenAIGPT35,
         )
 
+    @_cached_agent
     def timing_agent(self):
         return Agent(
             role="Social Media Timing Optimizer",
@@ -805,6 +1306,7 @@ class LogoDesignAgents:
             llm=self.OpenAIGPT35,
         )
 
+    @_cached_agent
     def calendar_planner_agent(self):
         return Agent(
             role="Content Calendar Planning Specialist",
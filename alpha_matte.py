@@ -0,0 +1,182 @@
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+from decouple import config
+
+from logo_scoring import border_mask
+from png_optimize import encode_png
+
+
+def matte_settings():
+    """ALPHA_* settings: distance (0-255 RGB) below which a pixel is background, ramp width, pass score"""
+    return {
+        "tolerance": config("ALPHA_TOLERANCE", default=18.0, cast=float),
+        "softness": config("ALPHA_SOFTNESS", default=40.0, cast=float),
+        "min_score": config("ALPHA_MIN_SCORE", default=0.9, cast=float),
+        "keep_enclosed": config("ALPHA_KEEP_ENCLOSED", default=True, cast=bool),
+    }
+
+
+def border_background(rgb, border):
+    """Per-channel median of the border pixels (uint8 histograms, no sort)"""
+    pixels = rgb[border]
+    counts = np.cumsum([np.bincount(pixels[:, c], minlength=256) for c in range(3)], axis=1)
+    return np.argmax(counts >= (len(pixels) + 1) // 2, axis=1)
+
+
+def squared_distance(rgb, colour):
+    """Squared RGB distance of every pixel to colour, as per-channel table lookups"""
+    levels = np.arange(256, dtype=np.int32)
+    distance = np.zeros(rgb.shape[:2], dtype=np.int32)
+    for c in range(3):
+        distance += ((levels - int(colour[c])) ** 2)[rgb[..., c]]
+    return distance
+
+
+def connected_to_border(allowed, border):
+    """
+    Pixels of allowed that connect to the border (4-connectivity). Rows are split
+    into runs, runs that touch vertically are merged with an array union-find, and
+    the components that contain border pixels are kept.
+    """
+    height, width = allowed.shape
+    starts = allowed & ~np.pad(allowed, ((0, 0), (1, 0)))[:, :-1]
+    run_ids = np.where(allowed, np.cumsum(starts, dtype=np.int32).reshape(height, width), 0)
+
+    # Vertical links between runs, one per overlap instead of one per pixel column
+    up, down = run_ids[:-1], run_ids[1:]
+    linked = (up > 0) & (down > 0)
+    repeat = np.zeros_like(linked)
+    repeat[:, 1:] = linked[:, 1:] & linked[:, :-1] & (up[:, 1:] == up[:, :-1]) & (down[:, 1:] == down[:, :-1])
+    first, second = up[linked & ~repeat], down[linked & ~repeat]
+
+    parent = np.arange(run_ids.max() + 1, dtype=np.int32)
+    while True:
+        roots_a, roots_b = parent[first], parent[second]
+        pending = roots_a != roots_b
+        if not pending.any():
+            break
+        low = np.minimum(roots_a[pending], roots_b[pending])
+        np.minimum.at(parent, roots_a[pending], low)
+        np.minimum.at(parent, roots_b[pending], low)
+        # Pointer jumping until every run points at its root
+        while True:
+            jumped = parent[parent]
+            if np.array_equal(jumped, parent):
+                break
+            parent = jumped
+
+    edge_roots = np.unique(parent[run_ids[border & allowed]])
+    keep = np.isin(parent, edge_roots[edge_roots > 0])
+    keep[0] = False
+    return keep[run_ids]
+
+
+def compute_matte(rgba, tolerance=18.0, softness=40.0, keep_enclosed=True):
+    """
+    Soft alpha matte for an opaque logo on a flat backdrop. rgba is uint8 HxWx4.
+    Returns (RGBA uint8 with the backdrop made transparent, report).
+    """
+    rgb, alpha = rgba[..., :3], rgba[..., 3]
+    height, width = alpha.shape
+    border = border_mask(height, width, fraction=0.02)
+
+    if np.mean(alpha[border] < 26) > 0.9:
+        # Already transparent, nothing to do
+        return rgba, transparency_report(alpha, border, spread=0.0, applied=False)
+
+    background = border_background(rgb, border)
+    distance2 = squared_distance(rgb, background)
+    spread = float(np.std(np.sqrt(distance2[border])))
+    # Noisy or vignetted backdrops widen the band that still counts as background
+    low = max(tolerance, 2.5 * spread)
+    # Alpha as a lookup on the squared distance, which avoids a per-pixel sqrt
+    ramp = np.clip((np.sqrt(np.arange(3 * 255 ** 2 + 1, dtype=np.float32)) - low) / softness, 0.0, 1.0)
+    matte = np.round(ramp * 255.0).astype(np.uint8)[distance2]
+    if keep_enclosed:
+        # Only backdrop reachable from the edge is removed, so white shapes inside the logo stay
+        matte[~connected_to_border(matte < 255, border)] = 255
+    new_alpha = np.minimum(alpha, matte)
+
+    out = rgba.copy()
+    out[..., 3] = new_alpha
+    # Remove the backdrop's contribution from the edge pixels so no halo is left:
+    # observed = a * foreground + (1 - a) * background
+    partial = (new_alpha > 0) & (new_alpha < 255)
+    a = new_alpha[partial].astype(np.float32)[:, None] / 255.0
+    edge = rgb[partial].astype(np.float32)
+    out[..., :3][partial] = np.round(np.clip(background + (edge - background) / a, 0.0, 255.0)).astype(np.uint8)
+
+    report = transparency_report(new_alpha, border, spread=spread, applied=True)
+    report["background"] = "#{:02x}{:02x}{:02x}".format(*background)
+    return out, report
+
+
+def transparency_report(alpha, border, spread, applied):
+    """
+    Transparency score in [0, 1] for a uint8 alpha channel: the share of the border
+    that is clear, scaled down when the backdrop was not flat or when the matte
+    removed nearly everything
+    """
+    border_clear = float(np.mean(alpha[border] < 26))
+    coverage = float(np.mean(alpha > 127))
+    uniformity = float(np.clip(1.0 - max(0.0, spread - 4.0) / 40.0, 0.0, 1.0))
+    score = border_clear * uniformity if 0.005 <= coverage <= 0.95 else 0.0
+    return {
+        "score": round(score, 4),
+        "border_clear": round(border_clear, 4),
+        "coverage": round(coverage, 4),
+        "backdrop_spread": round(spread, 2),
+        "applied": applied,
+    }
+
+
+def apply_matte(png_path, min_score=None, **overrides):
+    """
+    Replace png_path with its transparent-background version when the matte scores
+    at least min_score. The new file is written beside it and moved over it with
+    os.replace, so a hard-linked asset-store blob is never modified. Returns the report.
+    """
+    from PIL import Image
+    settings = matte_settings()
+    settings.update({key: value for key, value in overrides.items() if value is not None})
+    min_score = settings["min_score"] if min_score is None else min_score
+
+    with Image.open(png_path) as image:
+        rgba = np.asarray(image.convert("RGBA"))
+    started = time.monotonic()
+    out, report = compute_matte(rgba, settings["tolerance"], settings["softness"], settings["keep_enclosed"])
+    report["matte_ms"] = round((time.monotonic() - started) * 1000, 1)
+    report["passed"] = report["score"] >= min_score
+
+    if report["applied"] and report["passed"]:
+        # Written through the PNG optimiser so the matted file stays as small as the download
+        data, _ = encode_png(out, level=config("PNG_COMPRESS_LEVEL", default=6, cast=int))
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(png_path)), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, png_path)
+            report["bytes"] = len(data)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    else:
+        # A low score means the backdrop is not flat enough to key out; keep the original
+        report["applied"] = False
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Make a logo PNG's flat backdrop transparent")
+    parser.add_argument("png")
+    parser.add_argument("--min-score", type=float, default=None)
+    parser.add_argument("--tolerance", type=float, default=None)
+    parser.add_argument("--softness", type=float, default=None)
+    args = parser.parse_args()
+    print(apply_matte(args.png, args.min_score, tolerance=args.tolerance, softness=args.softness))
@@ -0,0 +1,153 @@
+import hashlib
+import json
+import os
+import secrets
+import shutil
+import tempfile
+import uuid
+from decouple import config
+
+
+class AssetStore:
+    """
+    Content-addressed store for generated images.
+
+    Image bytes live once under blobs/ keyed by their SHA-256, and index/ maps a
+    generation request (model, prompt, size, steps, guidance, seed) to the blob it
+    produced. Job folders receive hard links to the blobs, so a repeat request is a
+    local lookup and identical images never take up disk space twice.
+    """
+
+    def __init__(self, root, enabled=True):
+        self.root = root
+        self.enabled = enabled
+        self.blobs_dir = os.path.join(root, "blobs")
+        self.index_dir = os.path.join(root, "index")
+
+    @classmethod
+    def from_config(cls):
+        """Build the store from ASSET_STORE_* settings"""
+        return cls(
+            root=config("ASSET_STORE_PATH", default=os.path.join(os.getcwd(), "output", ".assets")),
+            enabled=not config("ASSET_STORE_DISABLED", default=False, cast=bool),
+        )
+
+    @staticmethod
+    def derive_seed(*brief):
+        """Deterministic Flux seed for a brief, so identical briefs produce identical requests"""
+        payload = json.dumps([str(part or "").strip().lower() for part in brief], ensure_ascii=False)
+        return int.from_bytes(hashlib.sha256(payload.encode("utf-8")).digest()[:4], "big") & 0x7FFFFFFF
+
+    @staticmethod
+    def random_seed():
+        """Flux seed for a request that should produce a new variation"""
+        return secrets.randbits(31)
+
+    @staticmethod
+    def request_key(model, arguments):
+        """Key for a generation request, or None when the request is not reproducible"""
+        # Multi-image requests are not indexed; their blobs are still deduplicated
+        if arguments.get("seed") is None or (arguments.get("num_images") or 1) > 1:
+            return None
+        payload = json.dumps([
+            model,
+            arguments.get("prompt"),
+            arguments.get("image_size"),
+            arguments.get("num_inference_steps"),
+            arguments.get("guidance_scale"),
+            arguments.get("seed"),
+        ], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def blob_path(self, sha256, extension="png"):
+        return os.path.join(self.blobs_dir, sha256[:2], f"{sha256}.{extension}")
+
+    def lookup(self, key):
+        """Return the stored record for a request key if its blob is still present"""
+        if not self.enabled or key is None:
+            return None
+        try:
+            with open(self._index_path(key), "r", encoding="utf-8") as f:
+                record = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        if not os.path.exists(self.blob_path(record["sha256"], record.get("extension", "png"))):
+            return None
+        return record
+
+    def put_bytes(self, data, extension="png"):
+        """Store image bytes once and return their SHA-256"""
+        sha256 = hashlib.sha256(data).hexdigest()
+        path = self.blob_path(sha256, extension)
+        if not os.path.exists(path):
+            self._atomic_write(path, data)
+        return sha256
+
+    def put_file(self, source_path, extension="png"):
+        """Move a finished download into the store and return its SHA-256"""
+        digest = hashlib.sha256()
+        with open(source_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        sha256 = digest.hexdigest()
+        path = self.blob_path(sha256, extension)
+        if os.path.exists(path):
+            os.remove(source_path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.chmod(source_path, 0o644)
+            os.replace(source_path, path)
+        return sha256
+
+    def download_path(self):
+        """Scratch path inside the store for an in-flight download"""
+        tmp_dir = os.path.join(self.root, "tmp")
+        os.makedirs(tmp_dir, exist_ok=True)
+        return os.path.join(tmp_dir, f"{uuid.uuid4().hex}.download")
+
+    def record(self, key, sha256, extension="png", **metadata):
+        """Remember which blob a request key produced"""
+        if key is None:
+            return
+        record = dict(metadata, sha256=sha256, extension=extension)
+        self._atomic_write(self._index_path(key), json.dumps(record, ensure_ascii=False).encode("utf-8"))
+
+    def link(self, sha256, dest_path, extension="png"):
+        """Place a blob at dest_path as a hard link, copying when linking is not possible"""
+        source = self.blob_path(sha256, extension)
+        os.makedirs(os.path.dirname(os.path.abspath(dest_path)), exist_ok=True)
+        tmp_path = f"{dest_path}.{uuid.uuid4().hex[:8]}.tmp"
+        try:
+            os.link(source, tmp_path)
+        except OSError:
+            shutil.copyfile(source, tmp_path)
+        # Swapped in with one rename, so a re-link never leaves dest_path missing for readers
+        os.replace(tmp_path, dest_path)
+        return dest_path
+
+    def discard_unlinked(self, sha256, extension="png"):
+        """Delete a blob that no job folder links to any more; returns whether it was deleted"""
+        path = self.blob_path(sha256, extension)
+        try:
+            if os.stat(path).st_nlink > 1:
+                return False
+            os.remove(path)
+            return True
+        except OSError:
+            return False
+
+    def _index_path(self, key):
+        return os.path.join(self.index_dir, key[:2], f"{key}.json")
+
+    def _atomic_write(self, path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
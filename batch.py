@@ -0,0 +1,187 @@
+import argparse
+import hashlib
+import inspect
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, BrokenExecutor, wait, FIRST_COMPLETED
+from datetime import datetime
+from tracing import start_trace
+
+ID_KEYS = ("job_id", "request_id", "id")
+# LogoGenerator arguments that cannot come from JSON
+CALLBACK_PARAMS = {"on_logo_ready"}
+
+
+def _generator_params():
+    """Keyword arguments accepted by LogoGenerator, and the ones it requires"""
+    from main import LogoGenerator
+    params = inspect.signature(LogoGenerator.__init__).parameters
+    accepted = {name for name in params if name != "self" and name not in CALLBACK_PARAMS}
+    required = {name for name, p in params.items() if name != "self" and p.default is inspect.Parameter.empty}
+    return accepted, required
+
+
+def job_id_for(spec):
+    """Explicit id from the spec, otherwise a stable hash of its contents"""
+    for key in ID_KEYS:
+        if spec.get(key):
+            return str(spec[key])
+    payload = json.dumps(spec, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def run_job(job_id, spec, on_logo_ready=None):
+    """Run one LogoGenerator job; executed inside a pool worker"""
+    started = time.monotonic()
+    try:
+        from main import LogoGenerator
+        accepted, required = _generator_params()
+        kwargs = {key: value for key, value in spec.items() if key in accepted}
+        missing = sorted(required - set(kwargs))
+        if missing:
+            raise ValueError(f"Missing LogoGenerator arguments: {', '.join(missing)}")
+        if on_logo_ready is not None:
+            kwargs["on_logo_ready"] = on_logo_ready
+        with start_trace(job_id):
+            result = LogoGenerator(**kwargs).run()
+        record = {"job_id": job_id, "status": "completed", "result": result, "seconds": round(time.monotonic() - started, 2)}
+        if not has_image(result):
+            # Failed generations must not count as completed, or a resumed batch would skip them
+            record.update(status="failed", error=str(result.get("image_url") or "No logo image"))
+        return record
+    except Exception as e:
+        return {"job_id": job_id, "status": "failed", "error": str(e), "seconds": round(time.monotonic() - started, 2)}
+
+
+def has_image(result):
+    """Whether a LogoGenerator result holds a usable logo rather than an error placeholder"""
+    image_url = str((result or {}).get("image_url") or "")
+    return bool(image_url) and not image_url.startswith("Error")
+
+
+def completed_job_ids(output_path):
+    """Job ids already completed in a previous run of the same output file"""
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if record.get("status") == "completed":
+                done.add(record.get("job_id"))
+    return done
+
+
+def iter_jobs(input_path, skip_ids):
+    """Yield (job_id, spec) for every line of the input JSONL that still needs to run"""
+    with open(input_path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                spec = json.loads(line)
+            except json.JSONDecodeError as e:
+                print(f"Skipping line {line_number}: invalid JSON ({str(e)})")
+                continue
+            if not isinstance(spec, dict):
+                print(f"Skipping line {line_number}: expected a JSON object")
+                continue
+            job_id = job_id_for(spec)
+            if job_id in skip_ids:
+                continue
+            yield job_id, spec
+
+
+def run_batch(input_path, output_path, workers=4, mode="thread"):
+    """
+    Stream jobs from input_path through a worker pool, appending one result line per
+    job to output_path. Jobs already completed in output_path are skipped, so an
+    interrupted batch can simply be re-run.
+    """
+    skip_ids = completed_job_ids(output_path)
+    if skip_ids:
+        print(f"Skipping {len(skip_ids)} completed jobs")
+
+    executor_class = ProcessPoolExecutor if mode == "process" else ThreadPoolExecutor
+    counts = {"completed": 0, "failed": 0}
+    jobs = iter_jobs(input_path, skip_ids)
+    executor = executor_class(max_workers=workers)
+    # Jobs in flight when a worker process died; any of them may have killed it
+    suspects = []
+    try:
+        with open(output_path, "a", encoding="utf-8") as out:
+            pending = {}
+
+            def fill():
+                if suspects:
+                    # Rerun suspects one at a time, so only the job that crashes a worker again is failed
+                    if not pending:
+                        job_id, spec = suspects.pop(0)
+                        pending[executor.submit(run_job, job_id, spec)] = (job_id, spec, True)
+                    return
+                # Keep a bounded number of jobs in flight instead of loading the whole file
+                while len(pending) < workers * 2:
+                    try:
+                        job_id, spec = next(jobs)
+                    except StopIteration:
+                        return
+                    pending[executor.submit(run_job, job_id, spec)] = (job_id, spec, False)
+
+            fill()
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                broken = False
+                for future in done:
+                    job_id, spec, isolated = pending.pop(future)
+                    try:
+                        record = future.result()
+                    except BrokenExecutor as e:
+                        broken = True
+                        if not isolated:
+                            suspects.append((job_id, spec))
+                            continue
+                        record = {"job_id": job_id, "status": "failed", "error": f"Job crashed its worker process ({type(e).__name__})", "seconds": None}
+                    except Exception as e:
+                        record = {"job_id": job_id, "status": "failed", "error": f"{type(e).__name__}: {str(e)}", "seconds": None}
+                    record["input"] = spec
+                    record["finished_at"] = datetime.now().isoformat()
+                    out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    out.flush()
+                    counts[record["status"]] += 1
+                    print(f"[{record['status']}] {record['job_id']}" + (f" ({record['seconds']}s)" if record["seconds"] is not None else ""))
+                if broken:
+                    # Every job left in a broken pool fails the same way; they become suspects for a new pool
+                    print("Worker pool broke, starting a new one")
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    executor = executor_class(max_workers=workers)
+                    suspects.extend((job_id, spec) for job_id, spec, _ in pending.values())
+                    pending.clear()
+                fill()
+    finally:
+        executor.shutdown()
+
+    print(f"Batch finished: {counts['completed']} completed, {counts['failed']} failed")
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate logos in bulk from a JSONL file of LogoGenerator arguments")
+    parser.add_argument("input", help="JSONL file, one LogoGenerator kwargs object per line")
+    parser.add_argument("-o", "--output", default=None, help="Result JSONL (default: <input>.results.jsonl)")
+    parser.add_argument("-w", "--workers", type=int, default=4, help="Number of concurrent jobs")
+    parser.add_argument("--mode", choices=["thread", "process"], default="thread", help="Worker pool type")
+    args = parser.parse_args(argv)
+
+    output = args.output or f"{os.path.splitext(args.input)[0]}.results.jsonl"
+    counts = run_batch(args.input, output, workers=args.workers, mode=args.mode)
+    return 1 if counts["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,302 @@
+"""
+Local stand-ins for the Anthropic Messages API, an OpenAI-compatible chat API and
+the fal queue API, for offline benchmarks. All three share one HTTP server:
+
+    /anthropic/v1/messages              Claude refinement calls
+    /openai/v1/chat/completions         crewai agent LLM calls
+    /fal/<model>[/requests/<id>[/status|/cancel]]   Flux jobs
+    /images/<n>.png                     canned PNG bytes for the Flux results
+
+Each service has its own latency distribution and error rate.
+"""
+import glob
+import itertools
+import json
+import math
+import os
+import random
+import re
+import struct
+import threading
+import time
+import uuid
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class LatencyModel:
+    """Log-normal latency around a median, with an error probability"""
+
+    def __init__(self, median=0.5, sigma=0.35, error_rate=0.0, seed=None):
+        self.median = median
+        self.sigma = sigma
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sample(self):
+        with self._lock:
+            if self.median <= 0:
+                return 0.0
+            return self.median * math.exp(self._random.gauss(0.0, self.sigma))
+
+    def fails(self):
+        with self._lock:
+            return self._random.random() < self.error_rate
+
+
+def placeholder_png(size=256):
+    """A white square with a dark circle, used when output/ has no PNGs to serve"""
+    rows = []
+    center, radius = size / 2, size / 4
+    for y in range(size):
+        row = bytearray([0])
+        for x in range(size):
+            inside = (x - center) ** 2 + (y - center) ** 2 < radius ** 2
+            row += bytes((30, 40, 90) if inside else (255, 255, 255))
+        rows.append(bytes(row))
+
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+
+    header = struct.pack(">IIBBBBB", size, size, 8, 2, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(b"".join(rows))) + chunk(b"IEND", b"")
+
+
+def load_canned_pngs(source_dir, limit=16):
+    """PNG bytes from earlier runs under source_dir (asset-store blobs excluded)"""
+    paths = sorted(path for path in glob.glob(os.path.join(source_dir, "**", "*.png"), recursive=True)
+                   if os.sep + ".assets" + os.sep not in path)
+    images = []
+    for path in paths[:limit]:
+        with open(path, "rb") as f:
+            images.append(f.read())
+    return images or [placeholder_png()]
+
+
+CANNED_TEXT = {
+    "anthropic": (
+        "Professional minimalist logo, bold geometric mark with balanced negative space, "
+        "clean sans-serif wordmark, two-color palette, transparent background, vector style"
+    ),
+    "openai": (
+        "Thought: I now know the final answer\n"
+        "Final Answer: This logo works because its simple geometric mark is memorable at every size, "
+        "the restrained palette signals trust, and the clean typography keeps the company name legible "
+        "from favicon to billboard."
+    ),
+}
+
+
+class FakeServices:
+    """Runs the fake endpoints on a background thread; use as a context manager"""
+
+    def __init__(self, anthropic=None, openai=None, fal=None, images=None, host="127.0.0.1", port=0):
+        self.models = {
+            "anthropic": anthropic or LatencyModel(0.8),
+            "openai": openai or LatencyModel(1.5),
+            "fal": fal or LatencyModel(4.0),
+        }
+        self.images = images or [placeholder_png()]
+        self.requests = {name: 0 for name in self.models}
+        self.errors = {name: 0 for name in self.models}
+        self._fal_jobs = {}
+        self._image_ids = itertools.count()
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def environment(self):
+        """Settings that point the app's clients at these endpoints"""
+        return {
+            "ANTHROPIC_BASE_URL": f"{self.base_url}/anthropic",
+            "CLAUDE_API_KEY": "offline-benchmark",
+            "OPENAI_API_KEY": "offline-benchmark",
+            "OPENAI_API_BASE": f"{self.base_url}/openai/v1",
+            "OPENAI_BASE_URL": f"{self.base_url}/openai/v1",
+            "FAL_KEY": "offline-benchmark",
+            "FAL_USE_QUEUE": "True",
+            "FAL_QUEUE_URL": f"{self.base_url}/fal",
+        }
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="fake-services", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def _count(self, service, failed=False):
+        with self._lock:
+            self.requests[service] += 1
+            if failed:
+                self.errors[service] += 1
+
+    def _handler(self):
+        services = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                body = self._body()
+                if self.path.startswith("/anthropic/v1/messages"):
+                    return self._anthropic(body)
+                if self.path.startswith("/openai/") and self.path.endswith("/chat/completions"):
+                    return self._openai(body)
+                if self.path.startswith("/fal/"):
+                    return self._fal_submit(self.path[len("/fal/"):], body)
+                self._json(404, {"error": "not found"})
+
+            def do_GET(self):
+                match = re.fullmatch(r"/fal/(.+)/requests/([0-9a-f]+)(/status)?", self.path)
+                if match:
+                    return self._fal_poll(match.group(2), bool(match.group(3)))
+                match = re.fullmatch(r"/images/(\d+)\.png", self.path)
+                if match:
+                    data = services.images[int(match.group(1)) % len(services.images)]
+                    self.send_response(200)
+                    self.send_header("Content-Type", "image/png")
+                    self.send_header("Content-Length", str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                    return
+                self._json(404, {"error": "not found"})
+
+            def do_PUT(self):
+                match = re.fullmatch(r"/fal/(.+)/requests/([0-9a-f]+)/cancel", self.path)
+                if match:
+                    with services._lock:
+                        services._fal_jobs.pop(match.group(2), None)
+                    return self._json(202, {"status": "CANCELLATION_REQUESTED"})
+                self._json(404, {"error": "not found"})
+
+            def _anthropic(self, body):
+                model = services.models["anthropic"]
+                time.sleep(model.sample())
+                if model.fails():
+                    services._count("anthropic", failed=True)
+                    return self._json(529, {"type": "error", "error": {"type": "overloaded_error", "message": "Overloaded"}})
+                services._count("anthropic")
+                prompt = json.dumps(body.get("messages", []))
+                self._json(200, {
+                    "id": f"msg_{uuid.uuid4().hex[:24]}",
+                    "type": "message",
+                    "role": "assistant",
+                    "model": body.get("model", "claude"),
+                    "content": [{"type": "text", "text": CANNED_TEXT["anthropic"]}],
+                    "stop_reason": "end_turn",
+                    "stop_sequence": None,
+                    "usage": {"input_tokens": (len(body.get("system", "")) + len(prompt)) // 4, "output_tokens": 40},
+                })
+
+            def _openai(self, body):
+                model = services.models["openai"]
+                time.sleep(model.sample())
+                if model.fails():
+                    services._count("openai", failed=True)
+                    return self._json(500, {"error": {"message": "The server had an error", "type": "server_error"}})
+                services._count("openai")
+                prompt_tokens = len(json.dumps(body.get("messages", []))) // 4
+                text = CANNED_TEXT["openai"]
+                usage = {"prompt_tokens": prompt_tokens, "completion_tokens": len(text) // 4,
+                         "total_tokens": prompt_tokens + len(text) // 4}
+                completion = {
+                    "id": f"chatcmpl-{uuid.uuid4().hex[:24]}",
+                    "created": int(time.time()),
+                    "model": body.get("model", "gpt-4"),
+                }
+                if body.get("stream"):
+                    return self._openai_stream(completion, text, usage, (body.get("stream_options") or {}).get("include_usage"))
+                self._json(200, dict(
+                    completion,
+                    object="chat.completion",
+                    choices=[{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+                    usage=usage,
+                ))
+
+            def _openai_stream(self, completion, text, usage, include_usage):
+                """The same completion as server-sent chat.completion.chunk events, ending with [DONE]"""
+                def chunk(delta, finish_reason=None):
+                    return dict(completion, object="chat.completion.chunk",
+                                choices=[{"index": 0, "delta": delta, "finish_reason": finish_reason}])
+
+                pieces = [text[i:i + 40] for i in range(0, len(text), 40)]
+                events = [chunk({"role": "assistant", "content": ""})]
+                events += [chunk({"content": piece}) for piece in pieces]
+                events.append(chunk({}, "stop"))
+                if include_usage:
+                    events.append(dict(completion, object="chat.completion.chunk", choices=[], usage=usage))
+                data = "".join(f"data: {json.dumps(event)}\n\n" for event in events) + "data: [DONE]\n\n"
+                data = data.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Cache-Control", "no-cache")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _fal_submit(self, model_path, body):
+                request_id = uuid.uuid4().hex
+                model = services.models["fal"]
+                job = {
+                    "ready_at": time.monotonic() + model.sample(),
+                    "fails": model.fails(),
+                    "num_images": int(body.get("num_images") or 1),
+                    "seed": body.get("seed"),
+                }
+                with services._lock:
+                    services._fal_jobs[request_id] = job
+                self._json(200, {"request_id": request_id, "status": "IN_QUEUE"})
+
+            def _fal_poll(self, request_id, status_only):
+                with services._lock:
+                    job = services._fal_jobs.get(request_id)
+                if job is None:
+                    return self._json(404, {"detail": "Request not found"})
+                done = time.monotonic() >= job["ready_at"]
+                if status_only:
+                    return self._json(200, {"status": "COMPLETED" if done else "IN_PROGRESS"})
+                if job["fails"]:
+                    services._count("fal", failed=True)
+                    return self._json(500, {"detail": "Internal error"})
+                services._count("fal")
+                images = [{"url": f"{services.base_url}/images/{next(services._image_ids)}.png", "content_type": "image/png"}
+                          for _ in range(job["num_images"])]
+                self._json(200, {"images": images, "seed": job["seed"]})
+
+            def _body(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                if not length:
+                    return {}
+                try:
+                    return json.loads(self.rfile.read(length))
+                except json.JSONDecodeError:
+                    return {}
+
+            def _json(self, status, payload):
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,260 @@
+"""
+Offline end-to-end benchmark.
+
+Starts the fake Anthropic, OpenAI and fal endpoints from fake_services.py and
+points the app at them. It then runs logo, carousel, story and content-calendar
+jobs through the real code paths: clients, quotas, caches, the fal queue client,
+downloads and file writes. Each job is traced (tracing.py). The report gives
+throughput and p50/p95/p99 latency per workload and per traced stage.
+
+    python benchmarks/offline.py --jobs 8 --concurrency 4
+    python benchmarks/offline.py --workloads logo --fal-latency 6 --error-rate 0.05
+    python benchmarks/offline.py --scale 0.1 --cache warm --json results.json
+
+Nothing is sent to the real APIs, and all files go to a temporary work directory.
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_services import FakeServices, LatencyModel, load_canned_pngs  # noqa: E402
+
+WORKLOADS = ("logo", "carousel", "story", "calendar")
+LOGO_STYLES = ("WordMark", "LetterMark", "Pictorial", "Abstract", "Combination", "Emblem")
+
+
+def percentile(values, p):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(p / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def summarize(values):
+    return {
+        "count": len(values),
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+    }
+
+
+def configure_environment(services, workdir, args):
+    """Point every client, cache and trace at the fake services and the work directory"""
+    os.environ.update(services.environment())
+    os.environ.update({
+        "TRACE_ENABLED": "True",
+        "TRACE_DIR": os.path.join(workdir, "traces"),
+        "TRACE_FORMAT": "jsonl",
+        "QUOTA_DB_PATH": os.path.join(workdir, ".cache", "quota.sqlite3"),
+        "CLAUDE_CACHE_PATH": os.path.join(workdir, ".cache", "claude_refinement.sqlite3"),
+        "ASSET_STORE_PATH": os.path.join(workdir, "output", ".assets"),
+        "FAL_POLL_INTERVAL": str(args.poll_interval),
+    })
+    cold = args.cache == "cold"
+    os.environ["CLAUDE_CACHE_DISABLED"] = str(cold)
+    os.environ["ASSET_STORE_DISABLED"] = str(cold)
+    if args.no_quota:
+        os.environ["QUOTA_DISABLED"] = "True"
+
+
+def run_logo(i, workdir):
+    from main import LogoGenerator
+    result = LogoGenerator(
+        company_name=f"Bench Co {i}",
+        company_description="A company that makes things for the offline benchmark",
+        logo_style=LOGO_STYLES[i % len(LOGO_STYLES)],
+        preferred_color="navy",
+        brand_tone="confident",
+        industry_keywords="technology",
+    ).run()
+    if str(result.get("image_url", "")).startswith("Error"):
+        raise RuntimeError(result["image_url"])
+    # A failed brand-analysis call still returns the logo, with the error as the reason
+    if str(result.get("reason") or "").startswith("Error"):
+        raise RuntimeError(result["reason"])
+
+
+def run_carousel(i, workdir):
+    from agents import CarouselImageGeneratorTool
+    tool = CarouselImageGeneratorTool(output_folder=os.path.join(workdir, "output", f"carousel_{i}"))
+    output = tool._run([f"Slide {n} of a product launch carousel, job {i}" for n in range(1, 4)])
+    _check_tool_result(output, "carousel_images")
+
+
+def run_story(i, workdir):
+    from agents import StorySeriesGeneratorTool
+    tool = StorySeriesGeneratorTool(output_folder=os.path.join(workdir, "output", f"story_{i}"))
+    output = tool._run([f"Story frame {n} announcing an event, job {i}" for n in range(1, 4)])
+    _check_tool_result(output, "story_images")
+
+
+def run_calendar(i, workdir):
+    from main import ContentCalendarPlanner
+    ContentCalendarPlanner(f"Launch campaign for a coffee brand, plan {i}", platforms=["instagram", "linkedin"], duration_weeks=1).run()
+
+
+def _check_tool_result(output, images_key):
+    """A job fails if the tool failed or any of its images did"""
+    data = json.loads(output)
+    errors = [data["error"]] if data.get("error") else [image["error"] for image in data[images_key] if "error" in image]
+    if errors:
+        raise RuntimeError(f"{len(errors)} failed: {errors[0]}")
+
+
+RUNNERS = {
+    "logo": run_logo,
+    "carousel": run_carousel,
+    "story": run_story,
+    "calendar": run_calendar,
+}
+
+
+def run_workload(workload, jobs, concurrency, workdir):
+    """Run jobs of one workload concurrently; each job is traced as <workload>-<i>"""
+    from tracing import start_trace
+
+    def job(i):
+        started = time.monotonic()
+        try:
+            with start_trace(f"{workload}-{i}"):
+                RUNNERS[workload](i, workdir)
+            return time.monotonic() - started, None
+        except Exception as e:
+            return time.monotonic() - started, f"{type(e).__name__}: {e}"
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        outcomes = list(executor.map(job, range(jobs)))
+    wall = time.monotonic() - started
+    errors = [error for _, error in outcomes if error]
+    return {
+        "jobs": jobs,
+        "failed": len(errors),
+        "errors": errors[:5],
+        "wall_s": wall,
+        "throughput_per_min": jobs / wall * 60 if wall > 0 else None,
+        "latency_s": summarize([seconds for seconds, _ in outcomes]),
+    }
+
+
+def stage_stats(trace_dir):
+    """Per-workload, per-span-name latency percentiles from the job traces"""
+    durations = defaultdict(list)
+    errors = defaultdict(int)
+    for path in glob.glob(os.path.join(trace_dir, "*.jsonl")):
+        workload = os.path.basename(path).rsplit("-", 1)[0]
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                span = json.loads(line)
+                if span["name"] == "job":
+                    continue
+                key = (workload, span["name"])
+                durations[key].append(span["duration_ms"] / 1000)
+                if span["status"] == "error":
+                    errors[key] += 1
+    return {key: dict(summarize(values), errors=errors[key]) for key, values in sorted(durations.items())}
+
+
+def _ms(seconds):
+    return "-" if seconds is None else f"{seconds * 1000:.0f}"
+
+
+def print_report(results, stages, services):
+    print("\nWorkloads")
+    print(f"  {'workload':<10} {'jobs':>5} {'failed':>6} {'wall s':>8} {'jobs/min':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for workload, result in results.items():
+        latency = result["latency_s"]
+        print(f"  {workload:<10} {result['jobs']:>5} {result['failed']:>6} {result['wall_s']:>8.1f} "
+              f"{result['throughput_per_min']:>9.1f} {_ms(latency['p50']):>8} {_ms(latency['p95']):>8} {_ms(latency['p99']):>8}")
+        for error in result["errors"]:
+            print(f"      error: {error[:160]}")
+
+    print("\nStages")
+    print(f"  {'workload':<10} {'stage':<28} {'count':>6} {'errors':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for (workload, name), stats in stages.items():
+        print(f"  {workload:<10} {name:<28} {stats['count']:>6} {stats['errors']:>6} "
+              f"{_ms(stats['p50']):>8} {_ms(stats['p95']):>8} {_ms(stats['p99']):>8}")
+
+    print("\nFake services")
+    for name in services.requests:
+        print(f"  {name:<10} {services.requests[name]:>6} responses, {services.errors[name]} injected errors")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmark against local fake API servers")
+    parser.add_argument("--workloads", default=",".join(WORKLOADS), help=f"Comma-separated subset of {', '.join(WORKLOADS)}")
+    parser.add_argument("--jobs", type=int, default=8, help="Jobs per workload")
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent jobs per workload")
+    parser.add_argument("--anthropic-latency", type=float, default=0.8, help="Median Claude latency (s)")
+    parser.add_argument("--openai-latency", type=float, default=1.5, help="Median agent LLM latency (s)")
+    parser.add_argument("--fal-latency", type=float, default=4.0, help="Median Flux latency (s)")
+    parser.add_argument("--sigma", type=float, default=0.35, help="Log-normal spread of all latencies")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Probability that a fake call fails")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply every latency, e.g. 0.1 for a quick run")
+    parser.add_argument("--cache", choices=["cold", "warm"], default="cold",
+                        help="cold disables the Claude cache and asset store; warm enables both")
+    parser.add_argument("--no-quota", action="store_true", help="Disable the shared quota manager")
+    parser.add_argument("--poll-interval", type=float, default=0.1, help="fal queue poll interval (s)")
+    parser.add_argument("--seed", type=int, default=7, help="Random seed for latencies and errors")
+    parser.add_argument("--images", default=os.path.join(ROOT, "output"), help="Directory of PNGs to serve as Flux results")
+    parser.add_argument("--workdir", default=None, help="Work directory (default: a new temporary directory)")
+    parser.add_argument("--json", default=None, help="Also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    workloads = [name.strip() for name in args.workloads.split(",") if name.strip()]
+    unknown = sorted(set(workloads) - set(WORKLOADS))
+    if unknown:
+        parser.error(f"unknown workloads: {', '.join(unknown)}")
+
+    def latency(median, offset):
+        return LatencyModel(median * args.scale, args.sigma, args.error_rate, seed=args.seed + offset)
+
+    workdir = os.path.abspath(args.workdir or tempfile.mkdtemp(prefix="offline-benchmark-"))
+    os.makedirs(workdir, exist_ok=True)
+    json_path = os.path.abspath(args.json) if args.json else None
+    services = FakeServices(
+        anthropic=latency(args.anthropic_latency, 1),
+        openai=latency(args.openai_latency, 2),
+        fal=latency(args.fal_latency, 3),
+        images=load_canned_pngs(args.images),
+    )
+    with services:
+        configure_environment(services, workdir, args)
+        os.chdir(workdir)
+        from clients import reset_clients
+        reset_clients()
+        print(f"Fake services on {services.base_url}, work directory {workdir}")
+
+        results = {}
+        for workload in workloads:
+            print(f"Running {args.jobs} {workload} jobs, {args.concurrency} at a time...")
+            results[workload] = run_workload(workload, args.jobs, args.concurrency, workdir)
+
+    stages = stage_stats(os.environ["TRACE_DIR"])
+    print_report(results, stages, services)
+    if json_path:
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "config": vars(args),
+                "workloads": results,
+                "stages": [dict(workload=workload, stage=name, **stats) for (workload, name), stats in stages.items()],
+                "services": {"requests": services.requests, "errors": services.errors},
+            }, f, indent=2)
+    return 1 if any(result["failed"] for result in results.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
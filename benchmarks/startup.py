@@ -0,0 +1,103 @@
+"""
+Startup-time benchmark for the CLI entry points.
+
+Imports each entry module in fresh interpreters with `python -X importtime`, reports
+the median cumulative import time, process wall time and the heaviest imports, and
+exits non-zero when a module goes over its budget or imports one of the heavy SDKs
+that are supposed to load lazily.
+
+    python benchmarks/startup.py
+    python benchmarks/startup.py main batch --runs 9 --budget-ms 100 --top 15
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ENTRY_MODULES = ("main", "batch", "server")
+
+# Top-level packages that must only be imported once a code path needs them
+LAZY_PACKAGES = ("crewai", "langchain", "langchain_openai", "anthropic", "fal_client", "httpx", "numpy", "PIL")
+
+DEFAULT_BUDGET_MS = 150.0
+
+
+def parse_importtime(stderr):
+    """Parse -X importtime output into (module, self_us, cumulative_us, depth) rows"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        except ValueError:
+            continue
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def run_once(module):
+    env = dict(os.environ)
+    # main.py reads OPENAI_API_KEY at import time
+    env.setdefault("OPENAI_API_KEY", "benchmark")
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, env=env, capture_output=True, text=True,
+    )
+    wall_ms = (time.perf_counter() - started) * 1000
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+    return parse_importtime(proc.stderr), wall_ms
+
+
+def measure(module, runs=5):
+    """Median import and wall time of `import module` over several fresh processes"""
+    import_ms, wall_ms, rows = [], [], []
+    for _ in range(runs):
+        rows, wall = run_once(module)
+        total = next((cumulative for name, _, cumulative, depth in rows if name == module and depth == 0), 0)
+        import_ms.append(total / 1000)
+        wall_ms.append(wall)
+    imported = {name.split(".")[0] for name, _, _, _ in rows}
+    return {
+        "module": module,
+        "import_ms": statistics.median(import_ms),
+        "wall_ms": statistics.median(wall_ms),
+        "lazy_violations": sorted(package for package in LAZY_PACKAGES if package in imported),
+        "heaviest": sorted(rows, key=lambda row: row[2], reverse=True),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure and guard the import-time cost of the CLI entry points")
+    parser.add_argument("modules", nargs="*", default=list(ENTRY_MODULES), help="Modules to import (default: main batch server)")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per module")
+    parser.add_argument("--budget-ms", type=float, default=float(os.environ.get("STARTUP_BUDGET_MS", DEFAULT_BUDGET_MS)),
+                        help="Maximum median cumulative import time per module")
+    parser.add_argument("--top", type=int, default=10, help="Heaviest imports to list per module")
+    args = parser.parse_args(argv)
+
+    failures = []
+    for module in args.modules:
+        result = measure(module, args.runs)
+        print(f"{module}: import {result['import_ms']:.1f} ms, process {result['wall_ms']:.1f} ms (median of {args.runs})")
+        for name, self_us, cumulative_us, depth in [row for row in result["heaviest"] if row[0] != module][:args.top]:
+            print(f"    {cumulative_us / 1000:8.1f} ms  {'  ' * depth}{name}")
+        if result["import_ms"] > args.budget_ms:
+            failures.append(f"{module} imports in {result['import_ms']:.1f} ms, over the {args.budget_ms:g} ms budget")
+        if result["lazy_violations"]:
+            failures.append(f"{module} imports {', '.join(result['lazy_violations'])} at startup")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
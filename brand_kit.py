@@ -0,0 +1,111 @@
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decouple import config
+
+from tracing import bind_context
+
+# (name, filename, edge in px, flatten onto white); iOS shows transparency in touch icons as black
+TARGETS = [
+    ("favicon_16", "favicon-16x16.png", 16, False),
+    ("favicon_32", "favicon-32x32.png", 32, False),
+    ("favicon_48", "favicon-48x48.png", 48, False),
+    ("apple_touch_icon", "apple-touch-icon.png", 180, True),
+    ("android_chrome_192", "android-chrome-192x192.png", 192, False),
+    ("android_chrome_512", "android-chrome-512x512.png", 512, False),
+    ("social_avatar_400", "social-avatar-400x400.png", 400, True),
+    ("social_avatar_800", "social-avatar-800x800.png", 800, True),
+]
+ICO_SIZES = (16, 32, 48)
+
+
+def build_pyramid(image, smallest=16):
+    """Halve repeatedly with a 2x2 box filter: {edge: image}, largest first"""
+    levels = {image.width: image}
+    while image.width // 2 >= smallest:
+        image = image.reduce(2)
+        levels[image.width] = image
+    return levels
+
+
+def _source_level(levels, edge):
+    # The smallest level that is still at least twice the target keeps Lanczos sharp without aliasing
+    fitting = [size for size in levels if size >= 2 * edge]
+    return levels[min(fitting)] if fitting else levels[max(levels)]
+
+
+def _render(levels, edge, flatten):
+    from PIL import Image
+    image = _source_level(levels, edge).resize((edge, edge), Image.LANCZOS).convert("RGBA")
+    if flatten:
+        backdrop = Image.new("RGBA", image.size, (255, 255, 255, 255))
+        image = Image.alpha_composite(backdrop, image).convert("RGB")
+    return image
+
+
+def _square(image):
+    """Pad to a centred square so icons are never stretched"""
+    from PIL import Image
+    if image.width == image.height:
+        return image
+    edge = max(image.size)
+    canvas = Image.new(image.mode, (edge, edge), (0, 0, 0, 0))
+    canvas.paste(image, ((edge - image.width) // 2, (edge - image.height) // 2))
+    return canvas
+
+
+def default_kit_dir(png_path):
+    """<png stem>_brand_kit/ beside the PNG, so logos sharing a folder never overwrite each other's kits"""
+    stem = os.path.splitext(os.path.abspath(png_path))[0]
+    return f"{stem}_brand_kit"
+
+
+def export_brand_kit(png_path, output_dir=None, targets=None, workers=None):
+    """
+    Decode png_path once and write favicons, touch/PWA icons, social avatars and a
+    multi-size favicon.ico into output_dir (default: <png stem>_brand_kit/ beside the PNG).
+    Returns {"folder", "files": {name: {path, size, bytes}}, "seconds"}.
+    """
+    from PIL import Image
+    started = time.monotonic()
+    output_dir = output_dir or default_kit_dir(png_path)
+    os.makedirs(output_dir, exist_ok=True)
+    targets = targets or TARGETS
+    workers = workers or config("BRAND_KIT_WORKERS", default=4, cast=int)
+
+    with Image.open(png_path) as image:
+        # Premultiplied alpha, so transparent pixels do not bleed their colour into edges
+        source = _square(image.convert("RGBA")).convert("RGBa")
+    levels = build_pyramid(source)
+
+    def write(target):
+        name, filename, edge, flatten = target
+        path = os.path.join(output_dir, filename)
+        _render(levels, edge, flatten).save(path, format="PNG")
+        return name, {"path": path, "size": f"{edge}x{edge}", "bytes": os.path.getsize(path)}
+
+    def write_ico():
+        path = os.path.join(output_dir, "favicon.ico")
+        icons = [_render(levels, edge, False) for edge in ICO_SIZES]
+        icons[-1].save(path, format="ICO", sizes=[icon.size for icon in icons], append_images=icons[:-1])
+        return "favicon_ico", {"path": path, "size": "+".join(f"{edge}x{edge}" for edge in ICO_SIZES), "bytes": os.path.getsize(path)}
+
+    # Pillow releases the GIL while resampling and compressing, so threads encode in parallel
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(bind_context(write), target) for target in targets]
+        futures.append(executor.submit(bind_context(write_ico)))
+        files = dict(future.result() for future in futures)
+
+    return {"folder": output_dir, "files": files, "seconds": round(time.monotonic() - started, 3)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export favicons, app icons and social avatars from a logo PNG")
+    parser.add_argument("png")
+    parser.add_argument("--output", default=None, help="Output folder (default: <png stem>_brand_kit/ beside the PNG)")
+    args = parser.parse_args()
+    kit = export_brand_kit(args.png, args.output)
+    for name, entry in kit["files"].items():
+        print(f"{name:<20} {entry['size']:<16} {entry['bytes']:>8} bytes  {entry['path']}")
+    print(f"Done in {kit['seconds']}s")
@@ -1,9 +1,54 @@
-import anthropic
-from decouple import config
+from clients import get_anthropic_client, get_quota_manager
+from refinement_cache import RefinementCache
+from tracing import span
 
 class ClaudeRefinementService:
-    def __init__(self):
-        self.client = anthropic.Anthropic(api_key=config("CLAUDE_API_KEY"))
+    def __init__(self, cache=None, client=None):
+        self.client = client or get_anthropic_client()
+        self.cache = cache or RefinementCache.from_config()
+        self.bypass_cache = False
+
+    def _create_message(self, method, model, max_tokens, temperature, system, user_prompt):
+        """
+        Call Claude through the refinement cache; set bypass_cache to force a fresh completion
+        """
+        key = RefinementCache.make_key(method, model, temperature, max_tokens, system, user_prompt)
+        if not self.bypass_cache:
+            try:
+                cached = self.cache.get(key)
+                if cached is not None:
+                    with span("anthropic.cache_hit", method=method, model=model):
+                        return cached
+            except Exception as e:
+                print(f"Claude cache read error: {str(e)}")
+        
+        # Reserve the worst case (rough input estimate + max_tokens), refund what was not used
+        estimated_tokens = (len(system) + len(user_prompt)) // 4 + max_tokens
+        with span("anthropic.messages.create", method=method, model=model, max_tokens=max_tokens) as call:
+            with get_quota_manager().acquire("anthropic", model, tokens=estimated_tokens) as lease:
+                call.set(queue_wait_s=round(lease.waited, 3))
+                message = self.client.messages.create(
+                    model=model,
+                    max_tokens=max_tokens,
+                    temperature=temperature,
+                    system=system,
+                    messages=[{
+                        "role": "user", 
+                        "content": user_prompt
+                    }]
+                )
+                usage = getattr(message, "usage", None)
+                if usage is not None:
+                    lease.settle(usage.input_tokens + usage.output_tokens)
+                    call.set(input_tokens=usage.input_tokens, output_tokens=usage.output_tokens)
+            call.set(stop_reason=getattr(message, "stop_reason", None))
+        text = message.content[0].text.strip()
+        
+        try:
+            self.cache.set(key, text, method=method)
+        except Exception as e:
+            print(f"Claude cache write error: {str(e)}")
+        return text
     
     def refine_logo_prompt(self, original_prompt, logo_context, logo_style, format="PNG", company_name="", industry="", preferred_color="", brand_tone=""):
         """
@@ -106,23 +151,25 @@ class ClaudeRefinementService:
             
             Provide the refined prompt as a single, comprehensive design specification ready for professional {logo_style} logo generation."""
 
-            message = self.client.messages.create(
+            return self._create_message(
+                "refine_logo_prompt",
                 model="claude-3-5-sonnet-20241022",
                 max_tokens=700,
                 temperature=0.1,
                 system=system_prompt,
-                messages=[{
-                    "role": "user", 
-                    "content": user_prompt
-                }]
+                user_prompt=user_prompt
             )
             
-            return message.content[0].text.strip()
-            
         except Exception as e:
             print(f"Claude refinement error: {str(e)}")
             # Fallback to enhanced original prompt with strict text requirements
-            return f"Professional {logo_style} logo design with ONLY the text '{company_name}' in English - NO other text whatsoever, {original_prompt}, Fortune 500 quality, mathematical precision, real logo not illustration, 100% TRANSPARENT BACKGROUND, NO GRIDS, NO DECORATIVE BACKGROUNDS, NO ENVIRONMENTS, NO SCENES, completely isolated logo mark only, clean standalone logo like Apple or Nike logos, company name '{company_name}' only"
+            return self.fallback_logo_prompt(original_prompt, logo_style, company_name)
+
+    def fallback_logo_prompt(self, original_prompt, logo_style, company_name=""):
+        """
+        Deterministic logo prompt used when Claude is unavailable or not yet finished
+        """
+        return f"Professional {logo_style} logo design with ONLY the text '{company_name}' in English - NO other text whatsoever, {original_prompt}, Fortune 500 quality, mathematical precision, real logo not illustration, 100% TRANSPARENT BACKGROUND, NO GRIDS, NO DECORATIVE BACKGROUNDS, NO ENVIRONMENTS, NO SCENES, completely isolated logo mark only, clean standalone logo like Apple or Nike logos, company name '{company_name}' only"
     
     def refine_image_prompt(self, original_prompt, context=""):
         """
@@ -144,19 +191,15 @@ class ClaudeRefinementService:
 
             Return only the refined prompt."""
 
-            message = self.client.messages.create(
+            return self._create_message(
+                "refine_image_prompt",
                 model="claude-3-5-sonnet-20241022",
                 max_tokens=300,
                 temperature=0.3,
                 system=system_prompt,
-                messages=[{
-                    "role": "user", 
-                    "content": user_prompt
-                }]
+                user_prompt=user_prompt
             )
             
-            return message.content[0].text.strip()
-            
         except Exception as e:
             print(f"Claude image refinement error: {str(e)}")
             return original_prompt
@@ -181,19 +224,15 @@ class ClaudeRefinementService:
 
             Return only the refined caption."""
 
-            message = self.client.messages.create(
+            return self._create_message(
+                "refine_caption",
                 model="claude-3-5-sonnet-20241022",
                 max_tokens=200,
                 temperature=0.7,
                 system=system_prompt,
-                messages=[{
-                    "role": "user", 
-                    "content": user_prompt
-                }]
+                user_prompt=user_prompt
             )
             
-            return message.content[0].text.strip()
-            
         except Exception as e:
             print(f"Claude caption refinement error: {str(e)}")
             return caption
@@ -218,18 +257,14 @@ class ClaudeRefinementService:
 
             Return as a list of optimized hashtags."""
 
-            message = self.client.messages.create(
+            result = self._create_message(
+                "refine_hashtags",
                 model="claude-3-5-sonnet-20241022",
                 max_tokens=150,
                 temperature=0.5,
                 system=system_prompt,
-                messages=[{
-                    "role": "user", 
-                    "content": user_prompt
-                }]
+                user_prompt=user_prompt
             )
-            
-            result = message.content[0].text.strip()
             return result.split('\n') if '\n' in result else [result]
             
         except Exception as e:
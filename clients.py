@@ -0,0 +1,129 @@
+import os
+import threading
+from decouple import config
+
+# One instance of each client per process; built lazily on first use. The SDKs
+# themselves are imported on first use too, which keeps process startup cheap.
+_lock = threading.RLock()
+_anthropic_client = None
+_http_session = None
+_fal_client = None
+_refinement_service = None
+_quota_manager = None
+_fal_queue = None
+
+
+def _pool_size():
+    return config("HTTP_POOL_SIZE", default=16, cast=int)
+
+
+def get_anthropic_client():
+    """Shared, thread-safe Anthropic client with a keep-alive connection pool"""
+    global _anthropic_client
+    if _anthropic_client is None:
+        import anthropic
+        import httpx
+        with _lock:
+            if _anthropic_client is None:
+                pool_size = _pool_size()
+                _anthropic_client = anthropic.Anthropic(
+                    api_key=config("CLAUDE_API_KEY"),
+                    max_retries=config("ANTHROPIC_MAX_RETRIES", default=2, cast=int),
+                    http_client=anthropic.DefaultHttpxClient(
+                        limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+                    ),
+                )
+    return _anthropic_client
+
+
+def get_http_session():
+    """Shared requests session for image downloads, pooled per host"""
+    global _http_session
+    if _http_session is None:
+        import requests
+        from requests.adapters import HTTPAdapter
+        with _lock:
+            if _http_session is None:
+                pool_size = _pool_size()
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _http_session = session
+    return _http_session
+
+
+def get_fal_client():
+    """Shared fal client configured with FAL_KEY once, instead of re-setting the environment per call"""
+    global _fal_client
+    if _fal_client is None:
+        import fal_client as fal
+        with _lock:
+            if _fal_client is None:
+                _fal_client = fal.SyncClient(
+                    key=config("FAL_KEY"),
+                    default_timeout=config("FAL_TIMEOUT", default=120.0, cast=float),
+                )
+    return _fal_client
+
+
+def get_fal_queue():
+    """Shared queue-API fal client; it also holds the per-model latency history used for hedging"""
+    global _fal_queue
+    if _fal_queue is None:
+        from fal_queue import FalQueueClient
+        with _lock:
+            if _fal_queue is None:
+                _fal_queue = FalQueueClient(key=config("FAL_KEY"), session=get_http_session(), quota=get_quota_manager())
+    return _fal_queue
+
+
+def get_fal_runner():
+    """Client for Flux calls: the hedging queue client when FAL_USE_QUEUE is set, else the fal SDK client"""
+    if config("FAL_USE_QUEUE", default=False, cast=bool):
+        return get_fal_queue()
+    return get_fal_client()
+
+
+def get_refinement_service():
+    """Shared ClaudeRefinementService, so every tool reuses one client and one cache"""
+    global _refinement_service
+    if _refinement_service is None:
+        from claude_refinement import ClaudeRefinementService
+        with _lock:
+            if _refinement_service is None:
+                _refinement_service = ClaudeRefinementService()
+    return _refinement_service
+
+
+def get_quota_manager():
+    """Shared QuotaManager; the quota state itself lives in SQLite and spans processes"""
+    global _quota_manager
+    if _quota_manager is None:
+        from quota import QuotaManager
+        with _lock:
+            if _quota_manager is None:
+                _quota_manager = QuotaManager.from_config()
+    return _quota_manager
+
+
+def reset_clients():
+    """Drop all shared clients; they are rebuilt on next use"""
+    global _anthropic_client, _http_session, _fal_client, _refinement_service, _quota_manager, _fal_queue
+    _anthropic_client = None
+    _http_session = None
+    _fal_client = None
+    _refinement_service = None
+    _quota_manager = None
+    _fal_queue = None
+
+
+def _after_fork():
+    global _lock
+    _lock = threading.RLock()
+    reset_clients()
+
+
+# Connection pools must not be shared across a fork
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork)
@@ -0,0 +1,96 @@
+import os
+import re
+import time
+import requests
+from decouple import config
+
+
+class DownloadError(Exception):
+    """Raised when a file cannot be downloaded; status_code is set for HTTP failures"""
+
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class _IncompleteDownload(Exception):
+    pass
+
+
+def download_file(url, dest_path, session=None, connect_timeout=None, read_timeout=None, max_retries=None, chunk_size=64 * 1024):
+    """
+    Stream url into dest_path without holding the body in memory.
+
+    Bytes go to dest_path + ".part" and are renamed into place only once the length
+    checks out. Dropped connections and stalls resume from the bytes already on disk
+    with a Range request. Returns bytes written, elapsed seconds and throughput.
+    """
+    session = session or requests
+    connect_timeout = connect_timeout or config("DOWNLOAD_CONNECT_TIMEOUT", default=10.0, cast=float)
+    read_timeout = read_timeout or config("DOWNLOAD_READ_TIMEOUT", default=60.0, cast=float)
+    max_retries = config("DOWNLOAD_MAX_RETRIES", default=3, cast=int) if max_retries is None else max_retries
+
+    part_path = dest_path + ".part"
+    os.makedirs(os.path.dirname(os.path.abspath(dest_path)), exist_ok=True)
+    if os.path.exists(part_path):
+        os.remove(part_path)
+
+    started = time.monotonic()
+    expected = None
+    attempts = 0
+    resumes = 0
+    while True:
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        headers = {"Range": f"bytes={offset}-"} if offset else {}
+        try:
+            with session.get(url, stream=True, timeout=(connect_timeout, read_timeout), headers=headers) as response:
+                if response.status_code == 416 and expected is not None and offset == expected:
+                    break
+                if response.status_code >= 500:
+                    raise _IncompleteDownload(f"server error {response.status_code}")
+                if response.status_code not in (200, 206):
+                    raise DownloadError(f"Failed to download {url}: {response.status_code}", response.status_code)
+
+                if response.status_code == 206:
+                    total = re.search(r"/(\d+)$", response.headers.get("Content-Range", ""))
+                    expected = int(total.group(1)) if total else expected
+                    mode = "ab"
+                else:
+                    # Full body, either the first attempt or a server that ignores Range
+                    encoding = response.headers.get("Content-Encoding", "identity")
+                    length = response.headers.get("Content-Length")
+                    expected = int(length) if length and encoding == "identity" else None
+                    mode = "wb"
+
+                with open(part_path, mode) as f:
+                    for chunk in response.iter_content(chunk_size=chunk_size):
+                        if chunk:
+                            f.write(chunk)
+
+            size = os.path.getsize(part_path)
+            if expected is not None and size != expected:
+                raise _IncompleteDownload(f"received {size} of {expected} bytes")
+            break
+        except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError, _IncompleteDownload) as e:
+            attempts += 1
+            if attempts > max_retries:
+                if os.path.exists(part_path):
+                    os.remove(part_path)
+                raise DownloadError(f"Failed to download {url} after {attempts} attempts: {str(e)}")
+            resumes += 1
+            time.sleep(min(0.5 * 2 ** (attempts - 1), 8.0))
+        except BaseException:
+            if os.path.exists(part_path):
+                os.remove(part_path)
+            raise
+
+    os.replace(part_path, dest_path)
+    seconds = time.monotonic() - started
+    size = os.path.getsize(dest_path)
+    return {
+        "path": dest_path,
+        "bytes": size,
+        "seconds": round(seconds, 3),
+        "bytes_per_sec": round(size / seconds, 1) if seconds > 0 else None,
+        "resumes": resumes,
+    }
@@ -0,0 +1,191 @@
+import threading
+import time
+from collections import defaultdict, deque
+import requests
+from decouple import config
+from quota import QuotaTimeoutError
+
+
+class FalQueueError(Exception):
+    """Raised when a queued fal request fails or times out"""
+
+
+class FalCancelledError(FalQueueError):
+    """Raised when the caller cancelled a fal request before it finished"""
+
+
+class LatencyTracker:
+    """Rolling window of per-model completion latencies"""
+
+    def __init__(self, window=200, min_samples=20):
+        self.window = window
+        self.min_samples = min_samples
+        self._samples = defaultdict(lambda: deque(maxlen=self.window))
+        self._lock = threading.Lock()
+
+    def record(self, model, seconds):
+        with self._lock:
+            self._samples[model].append(seconds)
+
+    def percentile(self, model, p):
+        """Latency percentile for model, or None until min_samples have been seen"""
+        with self._lock:
+            samples = sorted(self._samples.get(model, ()))
+        if len(samples) < self.min_samples:
+            return None
+        index = min(len(samples) - 1, max(0, int(round(p / 100.0 * len(samples))) - 1))
+        return samples[index]
+
+    def snapshot(self):
+        with self._lock:
+            models = list(self._samples)
+        return {
+            model: {
+                "count": len(self._samples[model]),
+                "p50": self.percentile(model, 50),
+                "p95": self.percentile(model, 95),
+                "p99": self.percentile(model, 99),
+            }
+            for model in models
+        }
+
+
+class FalQueueClient:
+    """
+    Runs fal models through the queue API (submit, poll status, fetch result).
+
+    Once a model has enough latency history, a request still running past the
+    configured percentile gets one hedged duplicate; whichever finishes first wins
+    and the other is cancelled. base_url can point at a local fake queue server.
+    """
+
+    def __init__(self, key, base_url=None, session=None, tracker=None, quota=None,
+                 poll_interval=None, hedge_percentile=None, hedge_enabled=None, timeout=None):
+        self.key = key
+        self.base_url = (base_url or config("FAL_QUEUE_URL", default="https://queue.fal.run")).rstrip("/")
+        self.session = session or requests.Session()
+        self.tracker = tracker or LatencyTracker(min_samples=config("FAL_HEDGE_MIN_SAMPLES", default=20, cast=int))
+        self.quota = quota
+        self.poll_interval = poll_interval or config("FAL_POLL_INTERVAL", default=0.5, cast=float)
+        self.hedge_percentile = hedge_percentile or config("FAL_HEDGE_PERCENTILE", default=95.0, cast=float)
+        self.hedge_enabled = config("FAL_HEDGE_ENABLED", default=True, cast=bool) if hedge_enabled is None else hedge_enabled
+        self.timeout = timeout or config("FAL_TIMEOUT", default=120.0, cast=float) * 2.5
+        # Status polls that hit a 5xx or a connection error are retried this many times, with doubling delays
+        self.status_retries = config("FAL_STATUS_RETRIES", default=3, cast=int)
+
+    def submit(self, model, arguments):
+        """Queue a request and return its handle (request_id plus status/response/cancel URLs)"""
+        response = self.session.post(f"{self.base_url}/{model}", json=arguments, headers=self._headers(), timeout=30)
+        if response.status_code >= 400:
+            raise FalQueueError(f"fal queue submit failed for {model}: {response.status_code} {response.text[:200]}")
+        handle = response.json()
+        request_url = f"{self.base_url}/{model}/requests/{handle['request_id']}"
+        handle.setdefault("status_url", f"{request_url}/status")
+        handle.setdefault("response_url", request_url)
+        handle.setdefault("cancel_url", f"{request_url}/cancel")
+        handle["submitted_at"] = time.monotonic()
+        return handle
+
+    def status(self, handle):
+        """Queue status of a request; transient failures are retried with exponential backoff"""
+        delay = self.poll_interval
+        for attempt in range(self.status_retries + 1):
+            try:
+                response = self.session.get(handle["status_url"], headers=self._headers(), timeout=30)
+            except requests.RequestException as e:
+                error = FalQueueError(f"fal queue status failed: {str(e)}")
+            else:
+                if response.status_code < 400:
+                    return response.json().get("status")
+                error = FalQueueError(f"fal queue status failed: {response.status_code}")
+                if response.status_code < 500:
+                    raise error
+            if attempt < self.status_retries:
+                time.sleep(delay)
+                delay *= 2
+        raise error
+
+    def result(self, handle):
+        response = self.session.get(handle["response_url"], headers=self._headers(), timeout=60)
+        if response.status_code >= 400:
+            raise FalQueueError(f"fal request {handle['request_id']} failed: {response.status_code} {response.text[:200]}")
+        return response.json()
+
+    def cancel(self, handle):
+        try:
+            self.session.put(handle["cancel_url"], headers=self._headers(), timeout=10)
+        except requests.RequestException as e:
+            print(f"fal cancel failed for {handle['request_id']}: {str(e)}")
+
+    def run(self, model, arguments, cancel=None):
+        """
+        Submit, wait for completion (hedging once if the request is slow) and return
+        the result. Setting the optional cancel event cancels the request on fal's side.
+        """
+        started = time.monotonic()
+        hedge_after = self.tracker.percentile(model, self.hedge_percentile) if self.hedge_enabled else None
+        first = self.submit(model, arguments)
+        handles = [first]
+        hedge_lease = None
+        try:
+            while True:
+                for handle in list(handles):
+                    try:
+                        if self.status(handle) != "COMPLETED":
+                            continue
+                        result = self.result(handle)
+                    except FalQueueError as e:
+                        # A failed request is only fatal when no other copy of it is still running
+                        handles.remove(handle)
+                        self.cancel(handle)
+                        if not handles:
+                            raise
+                        print(f"fal {model}: request {handle['request_id']} failed ({str(e)}), waiting for {handles[0]['request_id']}")
+                        continue
+                    self.tracker.record(model, time.monotonic() - handle["submitted_at"])
+                    handles.remove(handle)
+                    for other in handles:
+                        self.cancel(other)
+                    handles = []
+                    if hedge_lease is not None:
+                        result["hedged"] = handle is not first
+                    return result
+
+                if cancel is not None and cancel.is_set():
+                    raise FalCancelledError(f"fal request for {model} cancelled")
+                elapsed = time.monotonic() - started
+                if elapsed > self.timeout:
+                    raise FalQueueError(f"fal request for {model} timed out after {self.timeout:.0f}s")
+                if hedge_after is not None and elapsed > hedge_after:
+                    hedge_lease = self._hedge_lease(model)
+                    if hedge_lease is not None:
+                        print(f"fal {model}: request {first['request_id']} past p{self.hedge_percentile:g} ({hedge_after:.1f}s), sending hedge")
+                        handles.append(self.submit(model, arguments))
+                    # At most one hedge per call
+                    hedge_after = None
+                time.sleep(self.poll_interval)
+        except BaseException:
+            # Whatever ends the call early, nothing it submitted should keep running on fal
+            for handle in handles:
+                self.cancel(handle)
+            raise
+        finally:
+            if hedge_lease is not None:
+                hedge_lease.release()
+
+    def _hedge_lease(self, model):
+        """A hedge is only worth sending if it fits the fal quota right now"""
+        if self.quota is None:
+            return _NoLease()
+        try:
+            return self.quota.acquire("fal", model, timeout=0)
+        except QuotaTimeoutError:
+            return None
+
+    def _headers(self):
+        return {"Authorization": f"Key {self.key}"}
+
+
+class _NoLease:
+    def release(self):
+        pass
@@ -0,0 +1,284 @@
+import argparse
+import glob
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from decouple import config
+
+from html_templates import compile_template
+
+try:
+    import fcntl
+except ImportError:  # Windows: only threads in one process are serialised
+    fcntl = None
+
+# Shared by every Gallery in the process; the lock file covers other processes
+_lock = threading.Lock()
+
+PAGE_TEMPLATE = compile_template("""<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>{{title}}</title>
+    <style>
+        body { font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Arial, sans-serif; margin: 0; padding: 20px; background: #f5f5f5; }
+        nav { margin-bottom: 20px; }
+        nav a { margin-right: 12px; color: #667eea; }
+        .grid { display: grid; grid-template-columns: repeat(auto-fill, minmax(200px, 1fr)); gap: 16px; }
+        .card { background: white; border-radius: 8px; box-shadow: 0 2px 8px rgba(0,0,0,0.08); padding: 12px; }
+        .card img { width: 100%; aspect-ratio: 1; object-fit: contain; background: #fafafa; border-radius: 6px; }
+        .card a { color: inherit; text-decoration: none; }
+        .name { font-weight: 600; margin-top: 8px; }
+        .meta { color: #777; font-size: 13px; }
+    </style>
+</head>
+<body>
+    <h1>{{title}}</h1>
+    <nav>
+        <a href="index.html">Latest</a>
+        {{#newer}}<a href="{{newer}}">&larr; Newer</a>{{/newer}}
+        {{#older}}<a href="{{older}}">Older &rarr;</a>{{/older}}
+        {{#total}}<span class="meta">{{total}} logos</span>{{/total}}
+    </nav>
+    <div class="grid">
+        {{#entries}}
+        <div class="card">
+            <a href="{{link}}"><img src="{{image}}" alt="{{company_name}} logo" loading="lazy"></a>
+            <div class="name">{{company_name}}</div>
+            <div class="meta">{{logo_style}} &middot; {{timestamp}}</div>
+            {{#svg}}<div class="meta"><a href="{{svg}}">SVG</a></div>{{/svg}}
+        </div>
+        {{/entries}}
+    </div>
+    {{#show_pages}}
+    <nav>
+        Pages: {{#pages}}<a href="{{href}}">{{number}}</a>{{/pages}}
+    </nav>
+    {{/show_pages}}
+</body>
+</html>
+""")
+
+
+class Gallery:
+    """
+    Browsable index of every generated logo, maintained as jobs complete.
+
+    manifest.jsonl gets one line per logo and is only ever appended to. Logos are
+    grouped in fixed-size pages in arrival order, so adding one rewrites only the
+    last page (page-NNNN.json/.html), index.html and, when a page fills up, the
+    page before it for its navigation link. Pages show small WebP thumbnails
+    instead of the full-size PNGs.
+    """
+
+    def __init__(self, root, page_size=48, thumb_size=256, enabled=True):
+        self.root = root
+        self.page_size = page_size
+        self.thumb_size = thumb_size
+        self.enabled = enabled
+        self.thumbs_dir = os.path.join(root, "thumbs")
+        self.manifest_path = os.path.join(root, "manifest.jsonl")
+        self.state_path = os.path.join(root, "state.json")
+
+    @classmethod
+    def from_config(cls):
+        """Build the gallery from GALLERY_* settings"""
+        return cls(
+            root=config("GALLERY_PATH", default=os.path.join(os.getcwd(), "output", "gallery")),
+            page_size=config("GALLERY_PAGE_SIZE", default=48, cast=int),
+            thumb_size=config("GALLERY_THUMB_SIZE", default=256, cast=int),
+            enabled=not config("GALLERY_DISABLED", default=False, cast=bool),
+        )
+
+    def add(self, png_path, company_name="", logo_style="", timestamp="", svg_path=None, preview_path=None, entry_id=None, **metadata):
+        """Record one finished logo; returns its manifest entry, or None when the gallery is disabled"""
+        if not self.enabled:
+            return None
+        entry_id = entry_id or os.path.basename(os.path.dirname(os.path.abspath(png_path)))
+        # Thumbnail outside the lock; it is the slow part and only touches its own file
+        thumb = self.make_thumbnail(png_path, entry_id)
+        entry = {
+            "id": entry_id,
+            "company_name": company_name,
+            "logo_style": logo_style,
+            "timestamp": timestamp,
+            "added_at": datetime.now().isoformat(timespec="seconds"),
+            "png": self._relative(png_path),
+            "svg": self._relative(svg_path) if svg_path else None,
+            "preview": self._relative(preview_path) if preview_path else None,
+            "thumb": self._relative(thumb) if thumb else None,
+        }
+        entry.update({key: value for key, value in metadata.items() if value is not None})
+        with self._locked():
+            state = self._read_state()
+            with open(self.manifest_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            page = state["count"] // state["page_size"] + 1
+            entries = self._read_page(page) + [entry]
+            state["count"] += 1
+            state["pages"] = page
+            self._write_page(page, entries, state)
+            if len(entries) == 1 and page > 1:
+                # The previous page was full and now needs a link to this one
+                self._write_page(page - 1, self._read_page(page - 1), state)
+            self._write_index(page, entries, state)
+            self._atomic_write(self.state_path, json.dumps(state).encode("utf-8"))
+        return entry
+
+    def make_thumbnail(self, png_path, entry_id):
+        """A WebP thumbnail no larger than thumb_size, or None if the image cannot be read"""
+        try:
+            from PIL import Image
+            thumb_path = os.path.join(self.thumbs_dir, f"{entry_id}.webp")
+            os.makedirs(self.thumbs_dir, exist_ok=True)
+            with Image.open(png_path) as image:
+                image = image.convert("RGBA")
+                image.thumbnail((self.thumb_size, self.thumb_size))
+                fd, tmp_path = tempfile.mkstemp(dir=self.thumbs_dir, suffix=".tmp")
+                with os.fdopen(fd, "wb") as f:
+                    image.save(f, format="WEBP", quality=80, method=4)
+            os.replace(tmp_path, thumb_path)
+            return thumb_path
+        except Exception as e:
+            print(f"Gallery thumbnail failed for {png_path}: {str(e)}")
+            return None
+
+    def entry_ids(self):
+        """Ids already in the manifest"""
+        if not os.path.exists(self.manifest_path):
+            return set()
+        with open(self.manifest_path, "r", encoding="utf-8") as f:
+            return {json.loads(line)["id"] for line in f if line.strip()}
+
+    def backfill(self, output_dir):
+        """Add logo folders under output_dir that predate the gallery; a one-off, not needed after each run"""
+        known = self.entry_ids()
+        added = 0
+        for folder in sorted(glob.glob(os.path.join(output_dir, "logo_*"))):
+            entry_id = os.path.basename(folder)
+            if entry_id in known or not os.path.isdir(folder):
+                continue
+            fields = _folder_fields(folder)
+            if fields and self.add(entry_id=entry_id, **fields):
+                added += 1
+        return added
+
+    def _page_name(self, page, extension):
+        return f"page-{page:04d}.{extension}"
+
+    def _read_page(self, page):
+        path = os.path.join(self.root, self._page_name(page, "json"))
+        if not os.path.exists(path):
+            return []
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write_page(self, page, entries, state):
+        self._atomic_write(os.path.join(self.root, self._page_name(page, "json")), json.dumps(entries, ensure_ascii=False).encode("utf-8"))
+        html_content = PAGE_TEMPLATE.render({
+            "title": f"Logo gallery - page {page}",
+            "newer": self._page_name(page + 1, "html") if page < state["pages"] else None,
+            "older": self._page_name(page - 1, "html") if page > 1 else None,
+            "entries": [self._card(entry) for entry in entries],
+        })
+        self._atomic_write(os.path.join(self.root, self._page_name(page, "html")), html_content.encode("utf-8"))
+
+    def _write_index(self, page, entries, state):
+        """index.html: the newest logos first, then links to every page"""
+        latest = entries[::-1]
+        if len(latest) < state["page_size"] and page > 1:
+            latest += self._read_page(page - 1)[::-1][:state["page_size"] - len(latest)]
+        html_content = PAGE_TEMPLATE.render({
+            "title": "Logo gallery",
+            "total": state["count"],
+            "older": self._page_name(page, "html"),
+            "entries": [self._card(entry) for entry in latest],
+            "show_pages": state["pages"] > 1,
+            "pages": [{"href": self._page_name(number, "html"), "number": number} for number in range(state["pages"], 0, -1)],
+        })
+        self._atomic_write(os.path.join(self.root, "index.html"), html_content.encode("utf-8"))
+
+    @staticmethod
+    def _card(entry):
+        return dict(entry, image=entry.get("thumb") or entry["png"], link=entry.get("preview") or entry["png"])
+
+    def _read_state(self):
+        if os.path.exists(self.state_path):
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        # The page size is fixed when the gallery is created so existing pages never reshuffle
+        return {"count": 0, "pages": 0, "page_size": self.page_size}
+
+    def _relative(self, path):
+        return os.path.relpath(os.path.abspath(path), self.root).replace(os.sep, "/")
+
+    @contextmanager
+    def _locked(self):
+        os.makedirs(self.root, exist_ok=True)
+        with _lock, open(os.path.join(self.root, ".lock"), "a") as lock_file:
+            if fcntl is not None:
+                # batch.py --mode process runs jobs in several processes
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _atomic_write(self, path, data):
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+
+def _folder_fields(folder):
+    """Gallery fields for an existing logo folder, from its JSON output or failing that its PNG"""
+    for json_path in sorted(glob.glob(os.path.join(folder, "logo_*.json"))):
+        try:
+            with open(json_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            continue
+        logo = data.get("logo") or {}
+        png_path = logo.get("png_local_path")
+        if not png_path or not os.path.exists(png_path):
+            continue
+        previews = sorted(glob.glob(os.path.join(folder, "logo_preview_*.html")))
+        return {
+            "png_path": png_path,
+            "company_name": data.get("company_name", ""),
+            "logo_style": data.get("logo_style", ""),
+            "timestamp": data.get("timestamp", ""),
+            "svg_path": logo.get("svg_local_path") if logo.get("svg_local_path") and os.path.exists(logo["svg_local_path"]) else None,
+            "preview_path": previews[-1] if previews else None,
+        }
+    pngs = sorted(glob.glob(os.path.join(folder, "*.png")))
+    if not pngs:
+        return None
+    # logo_<company>_<style>_<date>_<time>
+    parts = os.path.basename(folder).split("_")
+    return {
+        "png_path": pngs[0],
+        "company_name": parts[1] if len(parts) > 4 else os.path.basename(folder),
+        "logo_style": " ".join(parts[2:-2]) if len(parts) > 4 else "",
+        "timestamp": "_".join(parts[-2:]) if len(parts) > 4 else "",
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Add existing logo folders to the gallery index")
+    parser.add_argument("--output", default=os.path.join(os.getcwd(), "output"), help="Folder holding the logo_* job folders")
+    args = parser.parse_args()
+    gallery = Gallery.from_config()
+    print(f"Added {gallery.backfill(args.output)} logos to {os.path.join(gallery.root, 'index.html')}")
@@ -0,0 +1,170 @@
+import html
+import os
+import re
+import threading
+
+_TAG = re.compile(r"\{\{(\{)?\s*([#^/!&]?)\s*(.*?)\s*(\})?\}\}", re.DOTALL)
+
+# path -> (mtime_ns, size, Template); a file is recompiled only after it changes
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+class TemplateSyntaxError(ValueError):
+    pass
+
+
+def _lookup(stack, name):
+    """Resolve a (dotted) name against the context stack, innermost first"""
+    if name == ".":
+        return stack[-1]
+    first, *rest = name.split(".")
+    for context in reversed(stack):
+        if isinstance(context, dict) and first in context:
+            value = context[first]
+            break
+    else:
+        return None
+    for part in rest:
+        value = value.get(part) if isinstance(value, dict) else None
+    return value
+
+
+def _text(value):
+    return "" if value is None else str(value)
+
+
+def _compile_var(name, escape):
+    if escape:
+        def render(stack, out):
+            out.append(html.escape(_text(_lookup(stack, name))))
+    else:
+        def render(stack, out):
+            out.append(_text(_lookup(stack, name)))
+    return render
+
+
+def _compile_section(name, children, inverted):
+    if inverted:
+        def render(stack, out):
+            value = _lookup(stack, name)
+            if not value:
+                for child in children:
+                    child(stack, out)
+        return render
+
+    def render(stack, out):
+        value = _lookup(stack, name)
+        if not value:
+            return
+        # Lists repeat the block per item; any other truthy value renders it once with the value in scope
+        for item in (value if isinstance(value, (list, tuple)) else [value]):
+            stack.append(item)
+            for child in children:
+                child(stack, out)
+            stack.pop()
+    return render
+
+
+def _standalone(text, start, end):
+    """(line start, line end) when the tag at start:end is alone on its line, else None"""
+    line_start = text.rfind("\n", 0, start) + 1
+    line_end = text.find("\n", end)
+    line_end = len(text) if line_end == -1 else line_end + 1
+    if text[line_start:start].strip(" \t") or text[end:line_end].strip(" \t\r\n"):
+        return None
+    return line_start, line_end
+
+
+def compile_template(text):
+    """Parse mustache text ({{x}}, {{{x}}}, {{& x}}, {{#x}}, {{^x}}, {{! comment}}) into a Template"""
+    root = []
+    stack = [(None, root, False)]
+    position = 0
+    for match in _TAG.finditer(text):
+        triple, sigil, name, closing = match.group(1), match.group(2), match.group(3), match.group(4)
+        if bool(triple) != bool(closing):
+            raise TemplateSyntaxError(f"Unbalanced triple mustache at offset {match.start()}")
+        start, end = match.span()
+        if sigil and sigil in "#^/!":
+            # Mustache drops a section or comment tag's line when the tag stands alone on it
+            line = _standalone(text, start, end)
+            if line:
+                start, end = max(line[0], position), line[1]
+        children = stack[-1][1]
+        if start > position:
+            children.append(_compile_literal(text[position:start]))
+        position = end
+
+        if sigil == "!":
+            continue
+        if sigil in ("#", "^"):
+            stack.append((name, [], sigil == "^"))
+        elif sigil == "/":
+            open_name, section_children, inverted = stack.pop() if len(stack) > 1 else (None, None, None)
+            if open_name != name:
+                raise TemplateSyntaxError(f"Unexpected {{{{/{name}}}}} at offset {match.start()}")
+            stack[-1][1].append(_compile_section(name, section_children, inverted))
+        else:
+            children.append(_compile_var(name, escape=not (triple or sigil == "&")))
+
+    if len(stack) > 1:
+        raise TemplateSyntaxError(f"Unclosed section {{{{#{stack[-1][0]}}}}}")
+    if position < len(text):
+        root.append(_compile_literal(text[position:]))
+    return Template(root)
+
+
+def _compile_literal(literal):
+    def render(stack, out):
+        out.append(literal)
+    return render
+
+
+class Template:
+    """A compiled render tree; render() is one pass over it"""
+
+    def __init__(self, nodes):
+        self.nodes = nodes
+
+    def render(self, context):
+        out = []
+        stack = [context]
+        for node in self.nodes:
+            node(stack, out)
+        return "".join(out)
+
+
+def load_template(path):
+    """The compiled template at path, recompiled only when its mtime or size changes"""
+    stat = os.stat(path)
+    with _cache_lock:
+        cached = _cache.get(path)
+    if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+        return cached[2]
+    with open(path, "r", encoding="utf-8") as f:
+        template = compile_template(f.read())
+    with _cache_lock:
+        _cache[path] = (stat.st_mtime_ns, stat.st_size, template)
+    return template
+
+
+def default_template_dir():
+    return os.path.join(os.getcwd(), "templates")
+
+
+def render_template(name, context, template_dir=None):
+    """Render templates/<name> (or a path) with a dict of values"""
+    path = name if os.path.isabs(name) else os.path.join(template_dir or default_template_dir(), name)
+    return load_template(path).render(context)
+
+
+def precompile(template_dir=None):
+    """Compile every .html template up front, e.g. when a server starts"""
+    template_dir = template_dir or default_template_dir()
+    if not os.path.isdir(template_dir):
+        return []
+    names = sorted(name for name in os.listdir(template_dir) if name.endswith(".html"))
+    for name in names:
+        load_template(os.path.join(template_dir, name))
+    return names
@@ -0,0 +1,93 @@
+import numpy as np
+from PIL import Image
+
+# Weights of the individual metrics in the final candidate score
+SCORE_WEIGHTS = {
+    "background_uniformity": 0.3,
+    "background_clean": 0.2,
+    "coverage": 0.2,
+    "clutter": 0.2,
+    "symmetry": 0.1,
+}
+
+
+def load_rgba(path, max_size=256):
+    """Decode an image as float32 RGBA in [0, 1], downscaled for fast scoring"""
+    with Image.open(path) as image:
+        image = image.convert("RGBA")
+        image.thumbnail((max_size, max_size), Image.LANCZOS)
+        return np.asarray(image, dtype=np.float32) / 255.0
+
+
+def border_mask(height, width, fraction=0.04):
+    """Boolean mask of the outer frame of the image"""
+    band = max(1, int(round(min(height, width) * fraction)))
+    mask = np.zeros((height, width), dtype=bool)
+    mask[:band, :] = mask[-band:, :] = True
+    mask[:, :band] = mask[:, -band:] = True
+    return mask
+
+
+def score_logo(path):
+    """
+    Score a logo candidate with vectorized image metrics, all in [0, 1] (higher is better):
+
+    - background_uniformity: how flat the colour along the border is
+    - background_clean: border is transparent or near white (not grey or textured)
+    - coverage: the foreground occupies a sensible share of the canvas
+    - clutter: low edge density, i.e. no stray text or busy detail
+    - symmetry: left/right mirror agreement of the foreground silhouette
+    """
+    rgba = load_rgba(path)
+    rgb, alpha = rgba[..., :3], rgba[..., 3]
+    height, width = alpha.shape
+    border = border_mask(height, width)
+
+    border_rgb = rgb[border]
+    background = np.median(border_rgb, axis=0)
+    distance = np.linalg.norm(rgb - background, axis=-1) / np.sqrt(3.0)
+    border_spread = float(np.std(distance[border]))
+    background_uniformity = float(np.clip(1.0 - border_spread / 0.15, 0.0, 1.0))
+
+    transparent_fraction = float(np.mean(alpha[border] < 0.1))
+    whiteness = float(np.clip(1.0 - np.mean(1.0 - border_rgb) / 0.15, 0.0, 1.0))
+    background_clean = max(transparent_fraction, whiteness)
+
+    # Foreground: opaque pixels that differ visibly from the background colour
+    foreground = (alpha > 0.5) & (distance > 0.12)
+    coverage_ratio = float(np.mean(foreground))
+    if coverage_ratio < 0.05:
+        coverage = coverage_ratio / 0.05
+    elif coverage_ratio > 0.5:
+        coverage = max(0.0, 1.0 - (coverage_ratio - 0.5) / 0.4)
+    else:
+        coverage = 1.0
+
+    luminance = rgb @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+    gradient = np.zeros_like(luminance)
+    gradient[:, :-1] += np.abs(np.diff(luminance, axis=1))
+    gradient[:-1, :] += np.abs(np.diff(luminance, axis=0))
+    edge_density = float(np.mean(gradient > 0.1))
+    clutter = float(np.clip(1.0 - (edge_density - 0.03) / 0.15, 0.0, 1.0))
+
+    mirrored = foreground[:, ::-1]
+    union = np.count_nonzero(foreground | mirrored)
+    symmetry = 1.0 - np.count_nonzero(foreground ^ mirrored) / union if union else 0.0
+
+    metrics = {
+        "background_uniformity": round(background_uniformity, 4),
+        "background_clean": round(background_clean, 4),
+        "coverage": round(coverage, 4),
+        "clutter": round(clutter, 4),
+        "symmetry": round(float(symmetry), 4),
+        "coverage_ratio": round(coverage_ratio, 4),
+        "edge_density": round(edge_density, 4),
+    }
+    metrics["score"] = round(sum(metrics[name] * weight for name, weight in SCORE_WEIGHTS.items()), 4)
+    return metrics
+
+
+def rank_candidates(paths):
+    """Score every candidate and return (path, metrics) pairs, best first"""
+    scored = [(path, score_logo(path)) for path in paths]
+    return sorted(scored, key=lambda item: item[1]["score"], reverse=True)
@@ -1,99 +1,13 @@
 from crewai import Task
 from textwrap import dedent
+from prompt_templates import PromptTemplate, default_token_budget
 
 
 class LogoDesignTasks:
-    def __tip_section(self):
-        return "If you do your BEST WORK, I'll give you a $10,000 commission!"
-
-    def brand_strategy_task(self, agent, company_name, company_description, logo_style, industry_keywords="", brand_tone="", preferred_color=""):
-        return Task(
-            description=dedent(
-                f"""
-            Analyze the company profile and develop comprehensive brand strategy insights for logo design:
-            
-            COMPANY PROFILE:
-            - Company Name: "{company_name}"
-            - Company Description: "{company_description}"
-            - Selected Logo Style: "{logo_style}"
-            - Industry Keywords: "{industry_keywords}"
-            - Brand Tone: "{brand_tone}"
-            - Preferred Color: "{preferred_color}"
-            
-            Generate 3 WORLD-CLASS strategic logo concepts using Fortune 500 brand psychology principles:
-            
-            CRITICAL: All concepts must optimize the "{logo_style}" style for maximum business impact.
-            
-            Each concept must include:
-            🎯 STRATEGIC BRAND POSITIONING:
-            - Market psychology analysis and competitive warfare strategy
-            - Target audience neuroscience triggers and emotional hijacking
-            - Cultural symbolism optimization for global market domination
-            - Brand personality alignment with customer aspirations
-            
-            🧠 PSYCHOLOGICAL ENGINEERING:
-            - Subconscious messaging through visual hierarchy and composition
-            - Color psychology with cultural sensitivity and accessibility compliance
-            - Typography psychology creating trust/innovation/luxury perceptions
-            - Subliminal brand messaging through strategic design choices
-            
-            💎 {logo_style.upper()} OPTIMIZATION MASTERY:
-            - Mathematical precision using golden ratio and fibonacci principles
-            - Scalability engineering ensuring impact from favicon to billboard
-            - Industry-specific symbolism creating instant market recognition
-            - Technical excellence meeting Fortune 500 reproduction standards
-            
-            🏆 COMPETITIVE DIFFERENTIATION:
-            - Visual supremacy analysis against top 3 industry competitors
-            - Proprietary brand language development for market ownership
-            - Trademark viability and legal uniqueness verification
-            - Long-term brand equity potential and cultural icon status
-            
-            📈 BUSINESS IMPACT METRICS:
-            - Brand recognition enhancement projections
-            - Market positioning advancement strategy
-            - Customer conversion psychology optimization
-            - Global expansion readiness assessment
-            
-            Format your response as:
-            
-            **🏆 CONCEPT 1: [Strategic Theme - e.g., "Market Dominance Through Premium Authority"]**
-            {logo_style} Optimization: [Mathematical precision and scalability engineering approach]
-            Psychological Warfare: [Target audience neuroscience triggers and emotional hijacking]
-            Color Psychology: [Pantone-level specifications with cultural sensitivity analysis]
-            Competitive Supremacy: [Visual differentiation strategy against top 3 industry competitors]
-            Business Impact: [Brand recognition enhancement and conversion optimization projections]
-            Global Readiness: [Cross-cultural appeal and international market expansion potential]
-            
-            **🚀 CONCEPT 2: [Strategic Theme - e.g., "Innovation Leadership Through Visual Breakthrough"]**
-            {logo_style} Mastery: [Golden ratio principles and technical excellence specifications]
-            Brand Psychology: [Subliminal messaging and customer aspiration alignment]
-            Cultural Symbolism: [Industry-specific iconography with universal comprehension]
-            Market Positioning: [Premium brand equity development and long-term value creation]
-            Differentiation Matrix: [Proprietary visual language and trademark viability]
-            ROI Potential: [Brand value enhancement and market share expansion projections]
-            
-            **💎 CONCEPT 3: [Strategic Theme - e.g., "Cultural Icon Status Through Timeless Excellence"]**
-            {logo_style} Excellence: [Fortune 500 reproduction standards and scalability mastery]
-            Neuroscience Triggers: [Subconscious brand messaging and emotional connection optimization]
-            Color Mastery: [Advanced color theory with accessibility compliance and global appeal]
-            Competitive Analysis: [Visual supremacy strategy and market ownership potential]
-            Legacy Building: [50-year brand longevity and cultural icon development pathway]
-            Global Domination: [International market psychology and cross-cultural effectiveness]
-            
-            {self.__tip_section()}
-            
-            Ensure each concept is strategically unique and aligned with professional brand identity principles.
+    # Compiled once at import; the compact variants are used under PROMPT_TOKEN_BUDGET
+    LOGO_DESIGN_PROMPT = PromptTemplate(
+        "logo_design_task",
         """
-            ),
-            expected_output="3 strategic logo concept directions with brand psychology insights and style recommendations",
-            agent=agent,
-        )
-
-    def logo_design_task(self, agent, selected_concept, company_name, company_description, logo_style, brand_context):
-        return Task(
-            description=dedent(
-                f"""
             Based on the selected brand concept: "{selected_concept}"
             Company Information:
             - Company Name: "{company_name}"
@@ -223,19 +137,45 @@ class LogoDesignTasks:
             - Timeless design that won't require frequent updates
             - Professional, trustworthy, and market-appropriate
             
-            {self.__tip_section()}
+            {tip_section}
             
             Generate professional logo files and return complete design specifications.
-        """
-            ),
-            expected_output="Professional logo design in both PNG and SVG formats with complete technical specifications",
-            agent=agent,
-        )
+        """,
+        compact="""
+            Based on the selected brand concept: "{selected_concept}"
+            Company Information:
+            - Company Name: "{company_name}"
+            - Company Description: "{company_description}"
+            - Selected Logo Style: "{logo_style}"
+            - Brand Context: "{brand_context}"
+            
+            Create one professional {logo_style} logo that represents the company's brand identity:
+            scalable from favicon to billboard, high contrast, brand-appropriate palette, timeless.
+            
+            Execute the generate_logo tool once with this JSON structure: {{
+              "prompt": "Professional {logo_style} logo design for {company_name} in English text only, real logo not illustration, golden ratio composition, transparent background, no grid lines, no background elements, clean standalone logo, company name in English only",
+              "logo_style": "{logo_style}",
+              "company_name": "{company_name}",
+              "industry": "{brand_context}",
+              "preferred_color": "extracted from brand context",
+              "brand_tone": "extracted from brand context"
+            }}
+            
+            CRITICAL LOGO REQUIREMENTS:
+            • ONLY the exact company name "{company_name}" in ENGLISH, spelled correctly - no other text
+            • An actual LOGO, not an illustration; no taglines or descriptions
+            • TRANSPARENT BACKGROUND - no grids, textures or decorative elements
+            
+            {tip_section}
+            
+            Return the logo tool result with its design specifications.
+        
+""",
+    )
 
-    def brand_analysis_task(self, agent, logo_data, company_info):
-        return Task(
-            description=dedent(
-                f"""
+    BRAND_ANALYSIS_PROMPT = PromptTemplate(
+        "brand_analysis_task",
+        """
             Analyze the completed logo design and provide comprehensive brand strategy insights:
             
             LOGO DESIGN DATA:
@@ -301,11 +241,148 @@ class LogoDesignTasks:
             FORMAT:
             Create a professional brand analysis report that could be presented to C-level executives, demonstrating the strategic value and market effectiveness of this logo investment.
             
-            {self.__tip_section()}
+            {tip_section}
             
             Deliver insights that prove this logo will drive business success and brand recognition.
+        """,
+        compact="""
+            Analyze the completed logo design and explain why it is strategically right for this company:
+            
+            LOGO DESIGN DATA:
+            {logo_data}
+            
+            COMPANY INFORMATION:
+            {company_info}
+            
+            Cover briefly, with specific evidence rather than generic statements:
+            1. Brand psychology and emotional impact
+            2. Competitive differentiation
+            3. Professional credibility and industry fit
+            4. Scalability across digital and print applications
+            5. Color and typography choices
+            6. Target audience appeal and long-term brand equity
+            7. Implementation recommendations
+            
+            {tip_section}
+            
+            Deliver a concise executive-level brand analysis.
+        
+""",
+    )
+
+    def __init__(self, token_budget=None):
+        self.token_budget = token_budget if token_budget is not None else default_token_budget()
+
+    def __tip_section(self):
+        return "If you do your BEST WORK, I'll give you a $10,000 commission!"
+
+    def brand_strategy_task(self, agent, company_name, company_description, logo_style, industry_keywords="", brand_tone="", preferred_color=""):
+        return Task(
+            description=dedent(
+                f"""
+            Analyze the company profile and develop comprehensive brand strategy insights for logo design:
+            
+            COMPANY PROFILE:
+            - Company Name: "{company_name}"
+            - Company Description: "{company_description}"
+            - Selected Logo Style: "{logo_style}"
+            - Industry Keywords: "{industry_keywords}"
+            - Brand Tone: "{brand_tone}"
+            - Preferred Color: "{preferred_color}"
+            
+            Generate 3 WORLD-CLASS strategic logo concepts using Fortune 500 brand psychology principles:
+            
+            CRITICAL: All concepts must optimize the "{logo_style}" style for maximum business impact.
+            
+            Each concept must include:
+            🎯 STRATEGIC BRAND POSITIONING:
+            - Market psychology analysis and competitive warfare strategy
+            - Target audience neuroscience triggers and emotional hijacking
+            - Cultural symbolism optimization for global market domination
+            - Brand personality alignment with customer aspirations
+            
+            🧠 PSYCHOLOGICAL ENGINEERING:
+            - Subconscious messaging through visual hierarchy and composition
+            - Color psychology with cultural sensitivity and accessibility compliance
+            - Typography psychology creating trust/innovation/luxury perceptions
+            - Subliminal brand messaging through strategic design choices
+            
+            💎 {logo_style.upper()} OPTIMIZATION MASTERY:
+            - Mathematical precision using golden ratio and fibonacci principles
+            - Scalability engineering ensuring impact from favicon to billboard
+            - Industry-specific symbolism creating instant market recognition
+            - Technical excellence meeting Fortune 500 reproduction standards
+            
+            🏆 COMPETITIVE DIFFERENTIATION:
+            - Visual supremacy analysis against top 3 industry competitors
+            - Proprietary brand language development for market ownership
+            - Trademark viability and legal uniqueness verification
+            - Long-term brand equity potential and cultural icon status
+            
+            📈 BUSINESS IMPACT METRICS:
+            - Brand recognition enhancement projections
+            - Market positioning advancement strategy
+            - Customer conversion psychology optimization
+            - Global expansion readiness assessment
+            
+            Format your response as:
+            
+            **🏆 CONCEPT 1: [Strategic Theme - e.g., "Market Dominance Through Premium Authority"]**
+            {logo_style} Optimization: [Mathematical precision and scalability engineering approach]
+            Psychological Warfare: [Target audience neuroscience triggers and emotional hijacking]
+            Color Psychology: [Pantone-level specifications with cultural sensitivity analysis]
+            Competitive Supremacy: [Visual differentiation strategy against top 3 industry competitors]
+            Business Impact: [Brand recognition enhancement and conversion optimization projections]
+            Global Readiness: [Cross-cultural appeal and international market expansion potential]
+            
+            **🚀 CONCEPT 2: [Strategic Theme - e.g., "Innovation Leadership Through Visual Breakthrough"]**
+            {logo_style} Mastery: [Golden ratio principles and technical excellence specifications]
+            Brand Psychology: [Subliminal messaging and customer aspiration alignment]
+            Cultural Symbolism: [Industry-specific iconography with universal comprehension]
+            Market Positioning: [Premium brand equity development and long-term value creation]
+            Differentiation Matrix: [Proprietary visual language and trademark viability]
+            ROI Potential: [Brand value enhancement and market share expansion projections]
+            
+            **💎 CONCEPT 3: [Strategic Theme - e.g., "Cultural Icon Status Through Timeless Excellence"]**
+            {logo_style} Excellence: [Fortune 500 reproduction standards and scalability mastery]
+            Neuroscience Triggers: [Subconscious brand messaging and emotional connection optimization]
+            Color Mastery: [Advanced color theory with accessibility compliance and global appeal]
+            Competitive Analysis: [Visual supremacy strategy and market ownership potential]
+            Legacy Building: [50-year brand longevity and cultural icon development pathway]
+            Global Domination: [International market psychology and cross-cultural effectiveness]
+            
+            {self.__tip_section()}
+            
+            Ensure each concept is strategically unique and aligned with professional brand identity principles.
         """
             ),
+            expected_output="3 strategic logo concept directions with brand psychology insights and style recommendations",
+            agent=agent,
+        )
+
+    def logo_design_task(self, agent, selected_concept, company_name, company_description, logo_style, brand_context):
+        return Task(
+            description=self.LOGO_DESIGN_PROMPT.render(
+                self.token_budget,
+                selected_concept=selected_concept,
+                company_name=company_name,
+                company_description=company_description,
+                logo_style=logo_style,
+                brand_context=brand_context,
+                tip_section=self.__tip_section(),
+            ),
+            expected_output="Professional logo design in both PNG and SVG formats with complete technical specifications",
+            agent=agent,
+        )
+
+    def brand_analysis_task(self, agent, logo_data, company_info):
+        return Task(
+            description=self.BRAND_ANALYSIS_PROMPT.render(
+                self.token_budget,
+                logo_data=logo_data,
+                company_info=company_info,
+                tip_section=self.__tip_section(),
+            ),
             expected_output="Comprehensive brand analysis explaining why this logo design is strategically perfect for the company",
             agent=agent,
         )
@@ -1,15 +1,16 @@
 import os
 import json
 import re
-from crewai import Agent, Task, Crew, Process
-from langchain_openai import ChatOpenAI
+import uuid
 from decouple import config
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from html_templates import render_template
+from tracing import bind_context, span, start_trace
 
-from textwrap import dedent
-from agents import LogoDesignAgents
-from logo_tasks import LogoDesignTasks
-import json
+# crewai, langchain and the agent/task modules (which pull in the API clients) are
+# imported inside the methods that use them, so the CLI prompt, batch.py and
+# server.py start without paying for them; see benchmarks/startup.py
 
 os.environ["OPENAI_API_KEY"] = config("OPENAI_API_KEY")
 if config("OPENAI_ORGANIZATION_ID", default=""):
@@ -17,7 +18,7 @@ if config("OPENAI_ORGANIZATION_ID", default=""):
 
 
 class LogoGenerator:
-    def __init__(self, company_name, company_description, logo_style, preferred_color="", brand_tone="", industry_keywords="", show_grid_lines=False):
+    def __init__(self, company_name, company_description, logo_style, preferred_color="", brand_tone="", industry_keywords="", show_grid_lines=False, speculative=False, num_candidates=None, use_design_crew=None, on_logo_ready=None, save_outputs=None, fresh=None):
         self.company_name = company_name
         self.company_description = company_description
         self.logo_style = logo_style
@@ -25,6 +26,17 @@ class LogoGenerator:
         self.brand_tone = brand_tone
         self.industry_keywords = industry_keywords
         self.show_grid_lines = show_grid_lines
+        self.speculative = speculative
+        self.num_candidates = num_candidates
+        # The designer crew only decides to call generate_logo with a brief run() already
+        # has; by default the tool is called directly and the GPT-4 round trips are skipped
+        self.use_design_crew = config("LOGO_USE_DESIGN_CREW", default=False, cast=bool) if use_design_crew is None else use_design_crew
+        # Called with the partial result as soon as the PNG exists, before the brand analysis
+        self.on_logo_ready = on_logo_ready
+        # Write JSON, Markdown and HTML preview files while the brand analysis runs
+        self.save_outputs = config("LOGO_SAVE_OUTPUTS", default=True, cast=bool) if save_outputs is None else save_outputs
+        # Skip the deterministic seed (and so the asset store) to get a new variation of the same brief
+        self.fresh = fresh
     
     def create_unique_output_folder(self):
         """Create a unique folder for this logo's outputs"""
@@ -177,9 +189,6 @@ class LogoGenerator:
                 with open(template_path, 'w', encoding='utf-8') as f:
                     f.write(basic_template)
             
-            with open(template_path, 'r', encoding='utf-8') as f:
-                template = f.read()
-            
             # Prepare template variables
             template_vars = {
                 "timestamp": data.get("timestamp", ""),
@@ -194,23 +203,8 @@ class LogoGenerator:
                 if data["logo"].get("png_filename"):
                     template_vars["logo_image"] = data["logo"]["png_filename"]
             
-            # Simple template replacement
-            html_content = template
-            for key, value in template_vars.items():
-                # Handle conditional sections
-                if value:
-                    html_content = re.sub(rf'{{\#{key}}}.*?{{\/{key}}}', 
-                                        lambda m: m.group(0).replace(f'{{{{{key}}}}}', str(value)), 
-                                        html_content, flags=re.DOTALL)
-                    html_content = re.sub(rf'{{\^{key}}}.*?{{\/{key}}}', '', html_content, flags=re.DOTALL)
-                else:
-                    html_content = re.sub(rf'{{\#{key}}}.*?{{\/{key}}}', '', html_content, flags=re.DOTALL)
-                    html_content = re.sub(rf'{{\^{key}}}(.*?){{\/{key}}}', r'\1', html_content, flags=re.DOTALL)
-                
-                html_content = html_content.replace(f'{{{{{key}}}}}', str(value))
-            
-            # Clean up any remaining template syntax
-            html_content = re.sub(r'\{\{[^}]+\}\}', '', html_content)
+            # Compiled once per template file and reused until the file changes
+            html_content = render_template(template_path, template_vars)
             
             # Save HTML file
             html_filename = f"logo_preview_{timestamp}.html"
@@ -225,20 +219,21 @@ class LogoGenerator:
             print(f"Error generating HTML preview: {str(e)}")
             return None
 
-    def run(self):
-        # Initialize agents and tasks
-        agents = LogoDesignAgents()
-        tasks = LogoDesignTasks()
+    def logo_prompt(self):
+        """The generate_logo prompt the design task asks the designer agent to send"""
+        return (
+            f"Professional {self.logo_style} logo design for {self.company_name} in English text only, "
+            f"{self.company_description}, real logo not illustration, mathematical precision, golden ratio composition, "
+            "Fortune 500 quality standards, trademark-ready uniqueness, scalability engineering, competitive differentiation, "
+            "transparent background, no grid lines, no background elements, clean standalone logo, company name in English only"
+        )
 
-        # Create unique output folder for this logo
-        logo_folder, timestamp = self.create_unique_output_folder()
-        
-        # Initialize logo design agents
-        logo_designer = agents.logo_designer_agent(logo_folder, self.show_grid_lines)
-        brand_analyst = agents.brand_analyst_agent()
+    def run_design_crew(self, agents, tasks, logo_folder, result_sink=None, on_saved=None):
+        """Let the GPT-4 logo designer agent drive generate_logo (the original crew path)"""
+        from crewai import Crew
+        logo_designer = agents.logo_designer_agent(logo_folder, self.show_grid_lines, self.speculative, self.num_candidates, result_sink, self.fresh, on_saved)
         
         # Create structured brand context for logo generation with all parameters
-        import json
         brand_context = json.dumps({
             "company_name": self.company_name,
             "industry": self.industry_keywords,
@@ -265,46 +260,81 @@ class LogoGenerator:
             verbose=False,
         )
         
-        logo_result = design_crew.kickoff()
+        return design_crew.kickoff()
+
+    def run(self):
+        # Standalone runs get their own trace; under batch.py or server.py this joins the job's trace
+        with start_trace(uuid.uuid4().hex[:12]):
+            return self._generate()
+
+    def _generate(self):
+        from agents import LogoDesignAgents, LogoGeneratorTool, postprocess_report
+        from logo_tasks import LogoDesignTasks
+        
+        # Initialize agents and tasks
+        agents = LogoDesignAgents()
+        tasks = LogoDesignTasks()
+
+        # Create unique output folder for this logo
+        logo_folder, timestamp = self.create_unique_output_folder()
+        
+        # Initialize logo design agents
+        brand_analyst = agents.brand_analyst_agent()
+        
+        # The brand analysis starts as soon as the PNG is saved and overlaps the
+        # tool's matte, SVG and export work
+        analysis_executor = ThreadPoolExecutor(max_workers=1)
+        early = {}
+        
+        def on_saved(record):
+            if early.get("analysis") is not None:
+                # A retried generation supersedes the earlier logo
+                early["analysis"].cancel()
+            early["record"] = record
+            early["analysis"] = analysis_executor.submit(bind_context(self.brand_analysis), brand_analyst, tasks, json.dumps(record))
+            if self.on_logo_ready:
+                self.on_logo_ready(self.build_result(record.get("image_url"), None, None, record, pending=True))
+        
+        # The logo tool records its structured results here
+        logo_results = []
+        if self.use_design_crew:
+            logo_result = self.run_design_crew(agents, tasks, logo_folder, logo_results, on_saved)
+        else:
+            # Direct mode: call the logo tool with the structured brief
+            logo_tool = LogoGeneratorTool(logo_folder, self.show_grid_lines, speculative=self.speculative, num_candidates=self.num_candidates, result_sink=logo_results, fresh=self.fresh, on_saved=on_saved)
+            logo_result = logo_tool.generate(
+                self.logo_prompt(),
+                self.logo_style,
+                self.company_name,
+                industry=self.industry_keywords,
+                preferred_color=self.preferred_color,
+                brand_tone=self.brand_tone
+            )
         
         # Parse dual AI logo results and extract both PNG and SVG URLs with transparent background
         image_url = None
         svg_url = None
+        svg_local_path = None
         reason = None
+        logo_data = {}
+        persist_executor = ThreadPoolExecutor(max_workers=1)
+        persisting = []
         
         try:
             # Extract logo data from the dual AI result
             logo_result_str = str(logo_result)
             
-            # Try to parse both PNG and SVG URLs from both AI models
-            import re
-            import json
-            
-            # Extract JSON data from the logo result
-            json_matches = re.findall(r'\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}', logo_result_str)
-            
-            # Parse the JSON responses to get both PNG and SVG info
-            for json_match in json_matches:
-                try:
-                    data = json.loads(json_match)
-                    if 'image_url' in data and data['image_url'].endswith('.png'):
-                        image_url = data['image_url']
-                    if 'svg_local_path' in data and not svg_url:
-                        # For SVG, we'll use the local path converted to URL format
-                        # This will need to be served by a web server in production
-                        svg_local_path = data['svg_local_path']
-                        # Extract just the filename for URL construction
-                        svg_filename = os.path.basename(svg_local_path)
-                        # Convert to relative URL (assuming the output folder is web-accessible)
-                        svg_url = f"./output/{os.path.basename(os.path.dirname(svg_local_path))}/{svg_filename}"
-                except (json.JSONDecodeError, KeyError):
-                    continue
-            
-            # Fallback: try to parse PNG URLs directly from text
-            if not image_url:
-                url_matches = re.findall(r'https://[^\s\)\"]+\.png', logo_result_str)
-                if url_matches:
-                    image_url = url_matches[0]
+            # Prefer the results the tool recorded; scrape the agent text only if there are none
+            records = [record for record in logo_results if not record.get("error")]
+            if records:
+                logo_data = records[-1]
+                image_url = logo_data.get("image_url")
+                # The SVG must come from the same record as the PNG, not from an earlier attempt
+                svg_local_path = logo_data.get("svg_local_path")
+                if svg_local_path:
+                    svg_url = self.svg_url_for(svg_local_path)
+            elif not logo_results:
+                image_url, svg_url = self.parse_logo_text(logo_result_str)
             
             # Log both generated logos for reference
             if image_url:
@@ -312,36 +342,176 @@ class LogoGenerator:
                 if svg_url:
                     print(f"SVG URL: {svg_url}")
                 print("Selected primary model result for optimal quality and transparent background")
-            
-            # Generate brand analysis for the reason
-            if image_url:
-                brand_task = tasks.brand_analysis_task(
-                    brand_analyst,
-                    logo_result_str,
-                    f"Company: {self.company_name}, Description: {self.company_description}, Style: {self.logo_style}, Features: transparent background, clean standalone design, dual AI enhanced"
-                )
-                
-                analysis_crew = Crew(
-                    agents=[brand_analyst],
-                    tasks=[brand_task],
-                    verbose=False,
-                )
+                analysed = early.get("record") is not None and early["record"].get("local_path") == logo_data.get("local_path")
+                if self.on_logo_ready and not analysed:
+                    # Scraped agent text: the tool callback never saw this logo
+                    self.on_logo_ready(self.build_result(image_url, svg_url, None, logo_data, pending=True))
+                # Files and the gallery entry do not depend on the analysis text, so they are written while it finishes
+                if self.save_outputs:
+                    persisting.append(persist_executor.submit(
+                        bind_context(self.write_outputs), logo_data, image_url, svg_local_path, "", "analyzing", logo_folder, timestamp
+                    ))
+                persisting.append(persist_executor.submit(bind_context(self.add_to_gallery), logo_data, svg_local_path, logo_folder, timestamp))
                 
-                analysis_result = analysis_crew.kickoff()
-                reason = str(analysis_result)[:500]  # Keep it concise
+                # Generate brand analysis for the reason
+                if analysed:
+                    reason = early["analysis"].result()
+                else:
+                    reason = self.brand_analysis(brand_analyst, tasks, logo_result_str)
                 
         except Exception as e:
             reason = f"Error generating dual AI logo analysis: {str(e)}"
         
         # Return pure JSON response with both PNG and SVG URLs (transparent background)
+        result = self.build_result(image_url, svg_url, reason, logo_data)
+        
+        for future in persisting:
+            future.result()
+        if image_url and self.save_outputs:
+            # The analysis text and the background PNG pass (optimization, derivatives) are new since the first write
+            if logo_data.get("local_path"):
+                logo_data.update(postprocess_report(logo_data["local_path"]))
+            self.write_outputs(logo_data, image_url, svg_local_path, result["reason"], "completed", logo_folder, timestamp)
+        persist_executor.shutdown()
+        analysis_executor.shutdown(wait=False, cancel_futures=True)
+        
+        return result
+
+    def brand_analysis(self, brand_analyst, tasks, logo_summary):
+        """Brand analysis of the generated logo, used as the result's reason"""
+        from crewai import Crew
+        brand_task = tasks.brand_analysis_task(
+            brand_analyst,
+            logo_summary,
+            f"Company: {self.company_name}, Description: {self.company_description}, Style: {self.logo_style}, Features: transparent background, clean standalone design, dual AI enhanced"
+        )
+        
+        analysis_crew = Crew(
+            agents=[brand_analyst],
+            tasks=[brand_task],
+            verbose=False,
+        )
+        
+        analysis_result = analysis_crew.kickoff()
+        return str(analysis_result)[:500]  # Keep it concise
+
+    def build_result(self, image_url, svg_url, reason, logo_data, pending=False):
+        """The API result; a pending result has no reason yet because the brand analysis is still running"""
         result = {
             "image_url": image_url or "Error generating dual AI logo",
             "svg_url": svg_url or None,
             "reason": reason or "Professional logo design created with transparent background using dual AI models (Flux Pro + Qwen) for optimal brand recognition, clean standalone presentation, and market positioning excellence"
         }
-        
+        if pending:
+            result["reason"] = None
+            result["analysis_pending"] = True
+        for key in ("local_path", "seed", "refined_prompt", "transparency_flagged"):
+            if logo_data.get(key) is not None:
+                result[key] = logo_data[key]
         return result
 
+    def write_outputs(self, logo_data, image_url, svg_local_path, brand_analysis, status, logo_folder, timestamp):
+        """Save the JSON, Markdown and HTML preview files for this logo"""
+        logo = {
+            "image_url": image_url,
+            "resolution": logo_data.get("resolution", "1024x1024"),
+            "original_prompt": logo_data.get("original_prompt"),
+            "refined_prompt": logo_data.get("refined_prompt"),
+            "seed": logo_data.get("seed"),
+        }
+        if logo_data.get("local_path"):
+            logo["png_filename"] = logo_data.get("filename") or os.path.basename(logo_data["local_path"])
+            logo["png_local_path"] = logo_data["local_path"]
+        if svg_local_path:
+            logo["svg_filename"] = os.path.basename(svg_local_path)
+            logo["svg_local_path"] = svg_local_path
+        if logo_data.get("optimization"):
+            logo["optimization"] = logo_data["optimization"]
+        if logo_data.get("derivatives"):
+            logo["derivatives"] = logo_data["derivatives"]
+        if logo_data.get("brand_kit"):
+            logo["brand_kit"] = logo_data["brand_kit"]
+        if logo_data.get("transparency"):
+            logo["transparency"] = logo_data["transparency"]
+            logo["transparency_flagged"] = logo_data.get("transparency_flagged", False)
+        data = {
+            "company_name": self.company_name,
+            "company_description": self.company_description,
+            "industry_keywords": self.industry_keywords,
+            "brand_tone": self.brand_tone,
+            "preferred_color": self.preferred_color,
+            "logo_style": self.logo_style,
+            "selected_concept": "Direct Professional Logo Design",
+            "logo": logo,
+            "brand_analysis": brand_analysis,
+            "timestamp": timestamp,
+            "status": status,
+        }
+        try:
+            for kind, save in (("json", self.save_json_output), ("markdown", self.save_markdown_output), ("html", self.generate_html_preview)):
+                with span("file.write", kind=kind, status=status) as call:
+                    path = save(data, logo_folder, timestamp)
+                    call.set(path=path, bytes=os.path.getsize(path) if path else None)
+        except OSError as e:
+            print(f"Error saving logo outputs: {str(e)}")
+
+    def add_to_gallery(self, logo_data, svg_local_path, logo_folder, timestamp):
+        """Append the finished logo to the output/gallery index"""
+        local_path = logo_data.get("local_path")
+        if not local_path or not os.path.exists(local_path):
+            return
+        try:
+            from gallery import Gallery
+            preview_path = os.path.join(logo_folder, f"logo_preview_{timestamp}.html")
+            # With save_outputs the preview is written alongside the gallery entry, so it may not exist yet
+            preview_path_exists = self.save_outputs or os.path.exists(preview_path)
+            with span("gallery.add"):
+                Gallery.from_config().add(
+                    local_path,
+                    company_name=self.company_name,
+                    logo_style=self.logo_style,
+                    timestamp=timestamp,
+                    svg_path=svg_local_path,
+                    preview_path=preview_path if preview_path_exists else None,
+                    score=logo_data.get("score"),
+                )
+        except Exception as e:
+            print(f"Error updating gallery: {str(e)}")
+
+    def svg_url_for(self, svg_local_path):
+        # For SVG, we'll use the local path converted to URL format
+        # This will need to be served by a web server in production
+        svg_filename = os.path.basename(svg_local_path)
+        # Convert to relative URL (assuming the output folder is web-accessible)
+        return f"./output/{os.path.basename(os.path.dirname(svg_local_path))}/{svg_filename}"
+
+    def parse_logo_text(self, logo_result_str):
+        """Last resort: scrape PNG and SVG references out of free agent text"""
+        image_url = None
+        svg_url = None
+        
+        # Extract JSON data from the logo result
+        json_matches = re.findall(r'\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}', logo_result_str)
+        
+        # Parse the JSON responses to get both PNG and SVG info
+        for json_match in json_matches:
+            try:
+                data = json.loads(json_match)
+                if 'image_url' in data and data['image_url'].endswith('.png'):
+                    image_url = data['image_url']
+                if 'svg_local_path' in data and not svg_url:
+                    svg_url = self.svg_url_for(data['svg_local_path'])
+            except (json.JSONDecodeError, KeyError):
+                continue
+        
+        # Fallback: try to parse PNG URLs directly from text
+        if not image_url:
+            url_matches = re.findall(r'https://[^\s\)\"]+\.png', logo_result_str)
+            if url_matches:
+                image_url = url_matches[0]
+        
+        return image_url, svg_url
+
 
 class ContentCalendarPlanner:
     def __init__(self, user_prompt, platforms=None, duration_weeks=4):
@@ -482,8 +652,12 @@ class ContentCalendarPlanner:
         print(f"📆 Duration: {self.duration_weeks} weeks")
         print("=" * 50)
 
+        from crewai import Crew
+        from agents import LogoDesignAgents
+        from tasks import SocialMediaTasks
+
         # Initialize agents and tasks
-        agents = SocialMediaAgents()
+        agents = LogoDesignAgents()
         tasks = SocialMediaTasks()
 
         # Create calendar planning workflow
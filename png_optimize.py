@@ -0,0 +1,314 @@
+import argparse
+import io
+import os
+import struct
+import tempfile
+import time
+import zlib
+
+import numpy as np
+from decouple import config
+
+SIGNATURE = b"\x89PNG\r\n\x1a\n"
+FILTERS = {"none": 0, "sub": 1, "up": 2, "average": 3, "paeth": 4}
+# (filter, zlib strategy) pairs tried on a sample of rows; Z_RLE suits noisy renders, the default strategy flat artwork
+TRIALS = [
+    ("adaptive", zlib.Z_RLE),
+    ("average", zlib.Z_RLE),
+    ("adaptive", zlib.Z_FILTERED),
+    ("none", zlib.Z_DEFAULT_STRATEGY),
+    ("paeth", zlib.Z_DEFAULT_STRATEGY),
+]
+STRATEGIES = {zlib.Z_DEFAULT_STRATEGY: "default", zlib.Z_FILTERED: "filtered", zlib.Z_RLE: "rle"}
+COLOR_TYPES = {0: "L", 2: "RGB", 3: "P", 4: "LA", 6: "RGBA"}
+
+
+def optimize_settings():
+    """PNG_* settings for recompression, optional palette quantisation and web derivatives"""
+    return {
+        "enabled": config("PNG_OPTIMIZE", default=True, cast=bool),
+        "slides": config("PNG_OPTIMIZE_SLIDES", default=False, cast=bool),
+        # zlib level 9 is several times slower than 6 on rendered images for a few percent
+        "compress_level": config("PNG_COMPRESS_LEVEL", default=6, cast=int),
+        "clean_alpha": config("PNG_CLEAN_ALPHA", default=True, cast=bool),
+        "quantize": config("PNG_QUANTIZE", default=False, cast=bool),
+        "quantize_colors": config("PNG_QUANTIZE_COLORS", default=64, cast=int),
+        "quantize_max_error": config("PNG_QUANTIZE_MAX_ERROR", default=3.0, cast=float),
+        "webp": config("PNG_WEBP", default=True, cast=bool),
+        "webp_quality": config("PNG_WEBP_QUALITY", default=85, cast=int),
+        "avif": config("PNG_AVIF", default=False, cast=bool),
+        "avif_quality": config("PNG_AVIF_QUALITY", default=60, cast=int),
+    }
+
+
+def avif_supported():
+    """Whether this Pillow build can encode AVIF"""
+    try:
+        from PIL import features
+        return bool(features.check("avif"))
+    except Exception:
+        return False
+
+
+def reduce_pixels(rgba, clean_alpha=True):
+    """
+    Smallest lossless PNG layout for a uint8 HxWx4 image: opaque images drop alpha,
+    grey ones drop colour and images with at most 256 colours become a palette.
+    Returns (pixels HxWxC, colour type, palette Nx4 or None).
+    """
+    alpha = rgba[..., 3]
+    opaque = bool(alpha.min() == 255)
+    if clean_alpha and not opaque:
+        # Colour under fully transparent pixels is invisible, so zero it for the compressor
+        rgba = rgba.copy()
+        rgba[alpha == 0, :3] = 0
+    rgb = rgba[..., :3]
+    grey = bool(np.array_equal(rgb[..., 0], rgb[..., 1]) and np.array_equal(rgb[..., 1], rgb[..., 2]))
+    if opaque and grey:
+        return rgba[..., :1], 0, None
+
+    packed = np.ascontiguousarray(rgba).view(np.uint32)[..., 0]
+    # A strided sample rejects photographic images before the full sort
+    if len(np.unique(packed[::4, ::4])) <= 256:
+        colours, inverse = np.unique(packed, return_inverse=True)
+        if len(colours) <= 256:
+            palette = colours.view(np.uint8).reshape(-1, 4)
+            # Translucent entries first keeps the tRNS chunk short
+            order = np.argsort(palette[:, 3] == 255, kind="stable")
+            rank = np.empty_like(order)
+            rank[order] = np.arange(len(order))
+            indices = rank[inverse.reshape(packed.shape)].astype(np.uint8)
+            return indices[..., None], 3, palette[order]
+    if grey:
+        return rgba[..., [0, 3]], 4, None
+    if opaque:
+        return rgb, 2, None
+    return rgba, 6, None
+
+
+def filter_rows(pixels):
+    """The five PNG filters applied to every row: {name: uint8 H x (W*C)}"""
+    height, width, channels = pixels.shape
+    x = pixels.astype(np.int16)
+    left = np.zeros_like(x)
+    left[:, 1:] = x[:, :-1]
+    up = np.zeros_like(x)
+    up[1:] = x[:-1]
+    upper_left = np.zeros_like(x)
+    upper_left[1:, 1:] = x[:-1, :-1]
+    estimate = left + up - upper_left
+    pa, pb, pc = np.abs(estimate - left), np.abs(estimate - up), np.abs(estimate - upper_left)
+    paeth = np.where((pa <= pb) & (pa <= pc), left, np.where(pb <= pc, up, upper_left))
+    filtered = {
+        "none": x,
+        "sub": x - left,
+        "up": x - up,
+        "average": x - ((left + up) >> 1),
+        "paeth": x - paeth,
+    }
+    return {name: (rows & 0xFF).astype(np.uint8).reshape(height, width * channels) for name, rows in filtered.items()}
+
+
+def _scanlines(filtered, name, rows=slice(None)):
+    """Filter-type byte plus filtered row, for the selected rows"""
+    if name == "adaptive":
+        # libpng's heuristic: per row, the filter with the smallest sum of absolute signed bytes
+        stack = np.stack([filtered[f][rows] for f in FILTERS])
+        kinds = np.abs(stack.view(np.int8).astype(np.int16)).sum(axis=2).argmin(axis=0)
+        data = stack[kinds, np.arange(stack.shape[1])]
+    else:
+        data = filtered[name][rows]
+        kinds = np.full(len(data), FILTERS[name])
+    return np.concatenate([kinds.astype(np.uint8)[:, None], data], axis=1).tobytes()
+
+
+def _deflate(data, strategy, level):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 15, 9, strategy)
+    return compressor.compress(data) + compressor.flush()
+
+
+def _chunk(kind, data):
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+
+def encode_png(rgba, clean_alpha=True, icc_profile=None, level=6, max_bytes=None):
+    """
+    Losslessly encode a uint8 HxWx4 image as small as this module can: reduced
+    colour type, then the filter/strategy pair that compresses a sample of rows
+    best. Returns (png bytes, info). The bytes are None, and the full encode is
+    skipped, when the sample projects a file of at least max_bytes.
+    """
+    pixels, color_type, palette = reduce_pixels(rgba, clean_alpha)
+    height, width = pixels.shape[:2]
+    filtered = filter_rows(pixels)
+
+    trials = TRIALS
+    if len(trials) > 1 and height >= 128:
+        # Bands of 16 rows from every eighth block stand in for the whole image
+        sample = (np.arange(height) // 16) % 8 == 0
+        sizes = [len(_deflate(_scanlines(filtered, name, sample), strategy, level)) for name, strategy in trials]
+        trials = [trials[int(np.argmin(sizes))]]
+        estimated_bytes = int(min(sizes) * height / np.count_nonzero(sample))
+        if max_bytes is not None and estimated_bytes >= max_bytes:
+            name, strategy = trials[0]
+            return None, {"mode": COLOR_TYPES[color_type], "filter": name, "strategy": STRATEGIES[strategy], "estimated_bytes": estimated_bytes}
+    best = None
+    for name, strategy in trials:
+        data = _deflate(_scanlines(filtered, name), strategy, level)
+        if best is None or len(data) < len(best[0]):
+            best = (data, name, strategy)
+    idat, filter_name, strategy = best
+
+    chunks = [SIGNATURE, _chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, color_type, 0, 0, 0))]
+    if icc_profile:
+        chunks.append(_chunk(b"iCCP", b"icc\x00\x00" + zlib.compress(icc_profile, 9)))
+    if palette is not None:
+        chunks.append(_chunk(b"PLTE", palette[:, :3].tobytes()))
+        translucent = np.nonzero(palette[:, 3] < 255)[0]
+        if len(translucent):
+            chunks.append(_chunk(b"tRNS", palette[:translucent[-1] + 1, 3].tobytes()))
+    chunks += [_chunk(b"IDAT", idat), _chunk(b"IEND", b"")]
+    info = {
+        "mode": COLOR_TYPES[color_type],
+        "colors": len(palette) if palette is not None else None,
+        "filter": filter_name,
+        "strategy": STRATEGIES[strategy],
+    }
+    return b"".join(chunks), info
+
+
+def quantize(rgba, colors=64, max_error=3.0):
+    """
+    Palette version of a flat-colour image and its RMS error per channel (0-255).
+    The image is None when the error exceeds max_error, i.e. the palette would show.
+    """
+    from PIL import Image
+    image = Image.fromarray(rgba, "RGBA")
+    if rgba[..., 3].min() == 255:
+        reduced = image.convert("RGB").quantize(colors, method=Image.Quantize.MEDIANCUT, dither=Image.Dither.NONE)
+    else:
+        reduced = image.quantize(colors, method=Image.Quantize.FASTOCTREE, dither=Image.Dither.NONE)
+    result = np.asarray(reduced.convert("RGBA"))
+    error = float(np.sqrt(np.mean((result.astype(np.float32) - rgba) ** 2)))
+    return (result, error) if error <= max_error else (None, error)
+
+
+def optimize_png(png_path, quantize_colors=None, **overrides):
+    """
+    Recompress png_path in place when that makes it smaller. Lossless unless
+    quantisation is on (PNG_QUANTIZE or quantize_colors) and the image is flat enough
+    for a palette. The encoded file is decoded and compared before it replaces the
+    original via os.replace, so a hard-linked asset-store blob is never modified.
+    Returns a report with original_bytes, bytes, saved_bytes and saved_ratio.
+    """
+    from PIL import Image
+    settings = optimize_settings()
+    settings.update({key: value for key, value in overrides.items() if value is not None})
+    if quantize_colors:
+        settings.update(quantize=True, quantize_colors=quantize_colors)
+    started = time.monotonic()
+    original_bytes = os.path.getsize(png_path)
+
+    with Image.open(png_path) as image:
+        icc_profile = image.info.get("icc_profile")
+        rgba = np.asarray(image.convert("RGBA"))
+    report = {"original_bytes": original_bytes, "quantized": False}
+    if settings["quantize"]:
+        quantized, error = quantize(rgba, settings["quantize_colors"], settings["quantize_max_error"])
+        report["quantize_error"] = round(error, 2)
+        if quantized is not None:
+            rgba = quantized
+            report["quantized"] = True
+    data, info = encode_png(rgba, settings["clean_alpha"], icc_profile, settings["compress_level"], max_bytes=original_bytes)
+    report.update(info)
+    if data is None:
+        # The sampled rows already show no saving, so the original stays
+        report.update(replaced=False, bytes=original_bytes, saved_bytes=0, saved_ratio=0.0, seconds=round(time.monotonic() - started, 3))
+        return report
+
+    with Image.open(io.BytesIO(data)) as check:
+        decoded = np.asarray(check.convert("RGBA"))
+    expected = rgba
+    if settings["clean_alpha"]:
+        expected = rgba.copy()
+        expected[rgba[..., 3] == 0, :3] = 0
+        decoded = decoded.copy()
+        decoded[decoded[..., 3] == 0, :3] = 0
+    if not np.array_equal(decoded, expected):
+        raise ValueError(f"Re-encoded PNG does not match {png_path}")
+
+    report["replaced"] = len(data) < original_bytes
+    if report["replaced"]:
+        _atomic_write(png_path, data)
+    report["bytes"] = os.path.getsize(png_path)
+    report["saved_bytes"] = original_bytes - report["bytes"]
+    report["saved_ratio"] = round(report["saved_bytes"] / original_bytes, 4) if original_bytes else 0.0
+    report["seconds"] = round(time.monotonic() - started, 3)
+    return report
+
+
+def write_derivatives(png_path, webp=None, avif=None, **overrides):
+    """
+    WebP (and, where Pillow supports it, AVIF) copies beside png_path for web
+    previews, skipping any that would not be smaller. Returns {format: {path, bytes,
+    saved_ratio}} with savings against the PNG.
+    """
+    from PIL import Image
+    settings = optimize_settings()
+    settings.update({key: value for key, value in overrides.items() if value is not None})
+    webp = settings["webp"] if webp is None else webp
+    avif = (settings["avif"] if avif is None else avif) and avif_supported()
+    formats = []
+    if webp:
+        formats.append(("webp", "WEBP", {"quality": settings["webp_quality"], "method": 4}))
+    if avif:
+        formats.append(("avif", "AVIF", {"quality": settings["avif_quality"], "speed": 8}))
+    if not formats:
+        return {}
+
+    png_bytes = os.path.getsize(png_path)
+    base = os.path.splitext(png_path)[0]
+    derivatives = {}
+    with Image.open(png_path) as image:
+        image = image.convert("RGBA")
+        for extension, format_name, options in formats:
+            buffer = io.BytesIO()
+            image.save(buffer, format=format_name, **options)
+            if len(buffer.getvalue()) >= png_bytes:
+                # Small palette PNGs can beat lossy formats; no point serving a bigger copy
+                continue
+            path = f"{base}.{extension}"
+            _atomic_write(path, buffer.getvalue())
+            derivatives[extension] = {
+                "path": path,
+                "bytes": len(buffer.getvalue()),
+                "saved_ratio": round(1 - len(buffer.getvalue()) / png_bytes, 4) if png_bytes else 0.0,
+            }
+    return derivatives
+
+
+def _atomic_write(path, data):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Losslessly recompress PNGs and write WebP/AVIF copies for the web")
+    parser.add_argument("pngs", nargs="+")
+    parser.add_argument("--quantize", type=int, default=None, metavar="COLORS", help="Allow a palette of at most COLORS for flat images (lossy)")
+    parser.add_argument("--no-derivatives", action="store_true", help="Only recompress the PNGs")
+    args = parser.parse_args()
+    for path in args.pngs:
+        report = optimize_png(path, quantize_colors=args.quantize)
+        print(f"{path}: {report['original_bytes']} -> {report['bytes']} bytes ({report['saved_ratio']:.1%} saved, {report['mode']}, {report['filter']}/{report['strategy']}, {report['seconds']}s)")
+        if not args.no_derivatives:
+            for extension, entry in write_derivatives(path).items():
+                print(f"  {extension}: {entry['bytes']} bytes ({entry['saved_ratio']:.1%} smaller)")
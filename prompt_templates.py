@@ -0,0 +1,157 @@
+import ast
+import os
+import string
+import sys
+from functools import cached_property
+from textwrap import dedent
+from decouple import config
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# Every PromptTemplate registers itself here for token_report()
+TEMPLATES = {}
+
+_encoding = None
+
+
+def count_tokens(text):
+    """GPT-4 token count with tiktoken, or a ~4 characters per token estimate without it"""
+    global _encoding
+    if tiktoken is None:
+        return (len(text) + 3) // 4
+    if _encoding is None:
+        _encoding = tiktoken.get_encoding("cl100k_base")
+    return len(_encoding.encode(text))
+
+
+def default_token_budget():
+    """PROMPT_TOKEN_BUDGET; 0 (the default) always renders the full prompts"""
+    return config("PROMPT_TOKEN_BUDGET", default=0, cast=int) or None
+
+
+class _Compiled:
+    """A str.format-style template split once into literal chunks and field names"""
+
+    def __init__(self, text):
+        self.raw = text
+        self.raw_parts = self._parse(text)
+        # dedent() of the whole template, valid whenever substitution cannot change its margin
+        self.dedented_parts = self._parse(dedent(text))
+        self.fields = {field for _, field in self.raw_parts if field is not None}
+
+    @cached_property
+    def static_tokens(self):
+        # Counted on first use: loading the tiktoken encoding can mean a download, so not at import
+        return count_tokens("".join(literal for literal, _ in self.dedented_parts))
+
+    @staticmethod
+    def _parse(text):
+        parts = []
+        for literal, field, format_spec, conversion in string.Formatter().parse(text):
+            if format_spec or conversion:
+                raise ValueError(f"Unsupported placeholder {{{field}!{conversion}:{format_spec}}}")
+            parts.append((literal, field))
+        return parts
+
+    def render(self, values):
+        values = {field: str(values[field]) for field in self.fields}
+        if all(value and "\n" not in value and not value[0].isspace() for value in values.values()):
+            # Single-line values keep every line's indentation, so dedenting the template
+            # once at compile time gives exactly dedent() of the substituted text
+            return "".join(literal + (values[field] if field is not None else "") for literal, field in self.dedented_parts)
+        return dedent("".join(literal + (values[field] if field is not None else "") for literal, field in self.raw_parts))
+
+
+class PromptTemplate:
+    """
+    A task description written like the original dedent(f\"\"\"...\"\"\") block, with
+    {name} placeholders (and {{ }} for literal braces). It is parsed and dedented
+    once at import; render() only fills in the values. An optional compact variant
+    is used instead when the full prompt would go over the token budget.
+    """
+
+    def __init__(self, name, text, compact=None):
+        self.name = name
+        self.full = _Compiled(text)
+        self.compact = _Compiled(compact) if compact is not None else None
+        TEMPLATES[name] = self
+
+    def render(self, budget=None, **values):
+        text = self.full.render(values)
+        if budget is None or self.compact is None:
+            return text
+        tokens = count_tokens(text)
+        if tokens <= budget:
+            return text
+        compact_text = self.compact.render(values)
+        compact_tokens = count_tokens(compact_text)
+        if compact_tokens > budget:
+            print(f"Prompt {self.name}: compact variant is {compact_tokens} tokens, still over the {budget} token budget")
+        return compact_text
+
+    def token_counts(self):
+        """Tokens in the fixed text of the full and compact variants, placeholders excluded"""
+        return {
+            "full": self.full.static_tokens,
+            "compact": self.compact.static_tokens if self.compact else None,
+        }
+
+
+AGENT_TEXT_FIELDS = ("role", "goal", "backstory")
+
+
+def agent_token_counts(source_path=None):
+    """
+    Tokens in role + goal + backstory of every LogoDesignAgents factory, read from
+    the source of agents.py so no agent, tool or API client is built
+    """
+    source_path = source_path or os.path.join(os.path.dirname(os.path.abspath(__file__)), "agents.py")
+    with open(source_path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    counts = {}
+    for node in ast.walk(tree):
+        if not (isinstance(node, ast.ClassDef) and node.name == "LogoDesignAgents"):
+            continue
+        for method in node.body:
+            if not (isinstance(method, ast.FunctionDef) and method.name.endswith("_agent")):
+                continue
+            for call in ast.walk(method):
+                if isinstance(call, ast.Call) and getattr(call.func, "id", None) == "Agent":
+                    texts = [_literal_text(keyword.value) for keyword in call.keywords if keyword.arg in AGENT_TEXT_FIELDS]
+                    counts[method.name] = sum(count_tokens(text) for text in texts if text)
+                    break
+    return counts
+
+
+def _literal_text(node):
+    """The value of a string literal or dedent(<string literal>) argument, or None for anything computed"""
+    if isinstance(node, ast.Call) and getattr(node.func, "id", None) == "dedent" and len(node.args) == 1:
+        text = _literal_text(node.args[0])
+        return dedent(text) if text is not None else None
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return node.value
+    return None
+
+
+def token_report():
+    """Print token counts for the registered task templates and the agent definitions"""
+    import logo_tasks  # noqa: F401  (registers the templates)
+    import tasks  # noqa: F401
+    method = "tiktoken cl100k_base" if tiktoken else "estimate, 4 chars/token"
+    print(f"Task prompts (fixed text, {method}):")
+    for name, template in sorted(TEMPLATES.items()):
+        counts = template.token_counts()
+        compact = f", compact {counts['compact']}" if counts["compact"] is not None else ""
+        print(f"  {name}: {counts['full']}{compact}")
+    print("Agents (role + goal + backstory, sent on every LLM turn):")
+    for name, tokens in sorted(agent_token_counts().items()):
+        print(f"  {name}: {tokens}")
+
+
+if __name__ == "__main__":
+    # Import by name so the report sees the registry the task modules fill in
+    import prompt_templates
+    sys.exit(prompt_templates.token_report())
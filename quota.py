@@ -0,0 +1,176 @@
+import json
+import os
+import sqlite3
+import time
+import uuid
+from decouple import config
+
+# Per-provider defaults; "provider:model" entries add a tighter limit for one model.
+# Override with QUOTA_LIMITS, a JSON object in the same shape.
+DEFAULT_LIMITS = {
+    "anthropic": {"requests_per_minute": 50, "tokens_per_minute": 40000, "concurrent": 8},
+    "openai": {"requests_per_minute": 500, "tokens_per_minute": 300000, "concurrent": 16},
+    "openai:gpt-4": {"requests_per_minute": 200, "tokens_per_minute": 40000},
+    "fal": {"requests_per_minute": 120, "concurrent": 10},
+}
+
+
+class QuotaTimeoutError(Exception):
+    """Raised when a quota could not be acquired within the timeout"""
+
+
+class QuotaLease:
+    """Permission for one provider call; release it (or use it as a context manager) when done"""
+
+    def __init__(self, manager, scopes, lease_id, tokens):
+        self.manager = manager
+        self.scopes = scopes
+        self.lease_id = lease_id
+        self.tokens = tokens
+        self.waited = 0.0
+
+    def settle(self, actual_tokens):
+        """Correct the up-front token reservation to what the call actually used"""
+        if self.scopes and actual_tokens is not None and actual_tokens != self.tokens:
+            self.manager._refund(self.scopes, self.tokens - actual_tokens)
+            self.tokens = actual_tokens
+
+    def release(self):
+        if self.lease_id is not None:
+            self.manager._release(self.lease_id)
+            self.lease_id = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+
+class QuotaManager:
+    """
+    Token-bucket quotas shared by every process that points at the same SQLite file.
+
+    Each scope ("anthropic", "openai:gpt-4", ...) can limit requests per minute,
+    tokens per minute and concurrent calls. acquire() blocks until every matching
+    bucket has capacity, so a fleet of workers stays just under provider limits
+    instead of hitting 429s together.
+    """
+
+    def __init__(self, path, limits=None, enabled=True, lease_ttl=600.0):
+        self.path = path
+        self.limits = limits if limits is not None else DEFAULT_LIMITS
+        self.enabled = enabled
+        self.lease_ttl = lease_ttl
+        if self.enabled:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            conn = self._connect()
+            try:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("CREATE TABLE IF NOT EXISTS buckets (name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)")
+                conn.execute("CREATE TABLE IF NOT EXISTS leases (id TEXT PRIMARY KEY, scope TEXT NOT NULL, pid INTEGER, expires REAL NOT NULL)")
+                conn.commit()
+            finally:
+                conn.close()
+
+    @classmethod
+    def from_config(cls):
+        """Build the manager from QUOTA_* settings"""
+        limits = dict(DEFAULT_LIMITS)
+        overrides = config("QUOTA_LIMITS", default="")
+        if overrides:
+            limits.update(json.loads(overrides))
+        return cls(
+            path=config("QUOTA_DB_PATH", default=os.path.join(os.getcwd(), ".cache", "quota.sqlite3")),
+            limits=limits,
+            enabled=not config("QUOTA_DISABLED", default=False, cast=bool),
+        )
+
+    def acquire(self, provider, model=None, tokens=0, timeout=None):
+        """Block until a call to provider/model fits every configured limit"""
+        scopes = [scope for scope in (provider, f"{provider}:{model}" if model else None) if scope in self.limits]
+        if not self.enabled or not scopes:
+            return QuotaLease(self, [], None, tokens)
+
+        started = time.monotonic()
+        lease_id = uuid.uuid4().hex
+        while True:
+            wait = self._try_acquire(scopes, lease_id, tokens)
+            if wait <= 0:
+                lease = QuotaLease(self, scopes, lease_id, tokens)
+                lease.waited = time.monotonic() - started
+                return lease
+            if timeout is not None and time.monotonic() - started + wait > timeout:
+                raise QuotaTimeoutError(f"Quota for {'/'.join(scopes)} not available within {timeout}s")
+            time.sleep(min(wait, 1.0))
+
+    def _try_acquire(self, scopes, lease_id, tokens):
+        """Take capacity from every bucket atomically; return 0 or the seconds to wait"""
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM leases WHERE expires < ?", (now,))
+            wait = 0.0
+            updates = []
+            for scope in scopes:
+                limit = self.limits[scope]
+                concurrent = limit.get("concurrent")
+                if concurrent:
+                    active = conn.execute("SELECT COUNT(*) FROM leases WHERE scope = ?", (scope,)).fetchone()[0]
+                    if active >= concurrent:
+                        wait = max(wait, 0.25)
+                for kind, amount in (("requests_per_minute", 1), ("tokens_per_minute", tokens)):
+                    capacity = limit.get(kind)
+                    if not capacity or not amount:
+                        continue
+                    name = f"{scope}|{kind}"
+                    amount = min(amount, capacity)
+                    rate = capacity / 60.0
+                    row = conn.execute("SELECT tokens, updated FROM buckets WHERE name = ?", (name,)).fetchone()
+                    available = capacity if row is None else min(capacity, row[0] + (now - row[1]) * rate)
+                    if available < amount:
+                        wait = max(wait, (amount - available) / rate)
+                    updates.append((name, available - amount, now))
+            if wait > 0:
+                conn.rollback()
+                return wait
+            conn.executemany("INSERT OR REPLACE INTO buckets (name, tokens, updated) VALUES (?, ?, ?)", updates)
+            for scope in scopes:
+                if self.limits[scope].get("concurrent"):
+                    conn.execute(
+                        "INSERT INTO leases (id, scope, pid, expires) VALUES (?, ?, ?, ?)",
+                        (f"{lease_id}|{scope}", scope, os.getpid(), now + self.lease_ttl),
+                    )
+            conn.commit()
+            return 0.0
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def _refund(self, scopes, tokens):
+        conn = self._connect()
+        try:
+            for scope in scopes:
+                capacity = self.limits[scope].get("tokens_per_minute")
+                if capacity:
+                    conn.execute(
+                        "UPDATE buckets SET tokens = MIN(?, tokens + ?) WHERE name = ?",
+                        (capacity, tokens, f"{scope}|tokens_per_minute"),
+                    )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _release(self, lease_id):
+        conn = self._connect()
+        try:
+            conn.execute("DELETE FROM leases WHERE id LIKE ?", (f"{lease_id}|%",))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30, isolation_level=None)
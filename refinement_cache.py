@@ -0,0 +1,133 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from decouple import config
+
+
+class RefinementCache:
+    """
+    Disk-backed LRU cache for Claude refinement responses.
+
+    Entries are keyed by everything that influences the completion (method, model,
+    temperature, max_tokens and the fully rendered prompts), expire after a TTL and
+    are evicted least-recently-used once the cache grows past max_entries.
+    """
+
+    def __init__(self, path, max_entries=5000, ttl_seconds=7 * 24 * 3600, enabled=True):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if self.enabled:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            with self._connect() as conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    """CREATE TABLE IF NOT EXISTS entries (
+                        key TEXT PRIMARY KEY,
+                        method TEXT,
+                        value TEXT NOT NULL,
+                        created_at REAL NOT NULL,
+                        last_access REAL NOT NULL,
+                        hits INTEGER NOT NULL DEFAULT 0
+                    )"""
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_last_access ON entries(last_access)")
+
+    @classmethod
+    def from_config(cls):
+        """Build the cache from CLAUDE_CACHE_* settings"""
+        return cls(
+            path=config("CLAUDE_CACHE_PATH", default=os.path.join(os.getcwd(), ".cache", "claude_refinement.sqlite3")),
+            max_entries=config("CLAUDE_CACHE_MAX_ENTRIES", default=5000, cast=int),
+            ttl_seconds=config("CLAUDE_CACHE_TTL", default=7 * 24 * 3600, cast=float),
+            enabled=not config("CLAUDE_CACHE_DISABLED", default=False, cast=bool),
+        )
+
+    @staticmethod
+    def make_key(method, model, temperature, max_tokens, system, user_prompt):
+        payload = json.dumps([method, model, temperature, max_tokens, system, user_prompt], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """Return the cached text for key, or None on a miss or expired entry"""
+        if not self.enabled:
+            return None
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            row = conn.execute("SELECT value, created_at FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None or (self.ttl_seconds and now - row[1] > self.ttl_seconds):
+                if row is not None:
+                    conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self.misses += 1
+                return None
+            conn.execute("UPDATE entries SET last_access = ?, hits = hits + 1 WHERE key = ?", (now, key))
+            self.hits += 1
+            return row[0]
+
+    def set(self, key, value, method=None):
+        if not self.enabled:
+            return
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, method, value, created_at, last_access, hits) VALUES (?, ?, ?, ?, ?, 0)",
+                (key, method, value, now, now),
+            )
+            if self.ttl_seconds:
+                conn.execute("DELETE FROM entries WHERE created_at < ?", (now - self.ttl_seconds,))
+            # Keep only the most recently used max_entries rows
+            conn.execute(
+                "DELETE FROM entries WHERE key IN (SELECT key FROM entries ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def clear(self):
+        if not self.enabled:
+            return
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM entries")
+
+    def stats(self):
+        entries = 0
+        if self.enabled:
+            with self._lock, self._connect() as conn:
+                entries = conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+        }
+
+    def _connect(self):
+        return _closing_connection(sqlite3.connect(self.path, timeout=30))
+
+
+class _closing_connection:
+    """sqlite3 connections commit on exit but do not close, so wrap them"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                self.conn.commit()
+            else:
+                self.conn.rollback()
+        finally:
+            self.conn.close()
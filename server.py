@@ -0,0 +1,183 @@
+import argparse
+import json
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from decouple import config
+
+from batch import run_job
+from tracing import start_trace
+
+
+def run_calendar_job(job_id, spec):
+    """Run one ContentCalendarPlanner job; mirrors batch.run_job for calendars"""
+    started = time.monotonic()
+    try:
+        from main import ContentCalendarPlanner
+        if not spec.get("user_prompt"):
+            raise ValueError("Missing ContentCalendarPlanner argument: user_prompt")
+        planner = ContentCalendarPlanner(
+            spec["user_prompt"],
+            platforms=spec.get("platforms"),
+            duration_weeks=int(spec.get("duration_weeks", 4)),
+        )
+        with start_trace(job_id):
+            calendar = planner.run()
+        result = {
+            "user_prompt": planner.user_prompt,
+            "platforms": planner.platforms,
+            "duration_weeks": planner.duration_weeks,
+            "calendar_content": str(calendar),
+        }
+        return {"job_id": job_id, "status": "completed", "result": result, "seconds": round(time.monotonic() - started, 2)}
+    except Exception as e:
+        return {"job_id": job_id, "status": "failed", "error": str(e), "seconds": round(time.monotonic() - started, 2)}
+
+
+JOB_RUNNERS = {
+    "logo": run_job,
+    "calendar": run_calendar_job,
+}
+
+
+class JobManager:
+    """Runs submitted jobs on a warm worker pool and keeps their results for polling"""
+
+    def __init__(self, workers=4, max_finished=1000):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+        self.max_finished = max_finished
+        self.jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, job_type, spec):
+        job_id = uuid.uuid4().hex[:12]
+        job = {
+            "job_id": job_id,
+            "type": job_type,
+            "status": "queued",
+            "input": spec,
+            "created_at": datetime.now().isoformat(),
+        }
+        with self._lock:
+            self.jobs[job_id] = job
+            self._trim()
+            snapshot = dict(job)
+        self.executor.submit(self._execute, job_id, job_type, spec)
+        return snapshot
+
+    def get(self, job_id):
+        with self._lock:
+            job = self.jobs.get(job_id)
+            return dict(job) if job else None
+
+    def list(self):
+        with self._lock:
+            return [{key: job.get(key) for key in ("job_id", "type", "status", "created_at", "finished_at")} for job in self.jobs.values()]
+
+    def _execute(self, job_id, job_type, spec):
+        self._update(job_id, status="running", started_at=datetime.now().isoformat())
+        if job_type == "logo":
+            # Expose the PNG to pollers while the brand analysis is still running
+            record = run_job(job_id, spec, on_logo_ready=lambda logo: self._update(job_id, logo=logo))
+        else:
+            record = JOB_RUNNERS[job_type](job_id, spec)
+        record.pop("job_id", None)
+        self._update(job_id, finished_at=datetime.now().isoformat(), **record)
+
+    def _update(self, job_id, **fields):
+        with self._lock:
+            if job_id in self.jobs:
+                self.jobs[job_id].update(fields)
+
+    def _trim(self):
+        # Forget the oldest finished jobs once too many have accumulated
+        finished = [job_id for job_id, job in self.jobs.items() if job["status"] in ("completed", "failed")]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self.jobs[job_id]
+
+
+def warm_up():
+    """Pay import and client construction costs once at startup instead of per request"""
+    # main.py defers these imports, so load them here before the first job
+    import crewai  # noqa: F401
+    import agents  # noqa: F401
+    import logo_tasks  # noqa: F401
+    import tasks  # noqa: F401
+    from clients import get_fal_runner, get_http_session, get_refinement_service
+    from html_templates import precompile
+    precompile()
+    get_refinement_service()
+    get_fal_runner()
+    get_http_session()
+
+
+def make_handler(manager):
+    class JobRequestHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == "/health":
+                return self._send(200, {"status": "ok"})
+            if self.path == "/jobs":
+                return self._send(200, {"jobs": manager.list()})
+            match = re.fullmatch(r"/jobs/([0-9a-f]+)", self.path)
+            if match:
+                job = manager.get(match.group(1))
+                if job is None:
+                    return self._send(404, {"error": "Unknown job"})
+                return self._send(200, job)
+            return self._send(404, {"error": "Not found"})
+
+        def do_POST(self):
+            match = re.fullmatch(r"/jobs/(\w+)", self.path)
+            if not match or match.group(1) not in JOB_RUNNERS:
+                return self._send(404, {"error": f"Unknown job type, use one of: {', '.join(JOB_RUNNERS)}"})
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                spec = json.loads(self.rfile.read(length) or b"{}")
+            except (ValueError, json.JSONDecodeError):
+                return self._send(400, {"error": "Request body must be a JSON object"})
+            if not isinstance(spec, dict):
+                return self._send(400, {"error": "Request body must be a JSON object"})
+            job = manager.submit(match.group(1), spec)
+            return self._send(202, {"job_id": job["job_id"], "status": job["status"], "status_url": f"/jobs/{job['job_id']}"})
+
+        def log_message(self, format, *args):
+            print(f"[server] {self.address_string()} {format % args}")
+
+        def _send(self, status, payload):
+            body = json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    return JobRequestHandler
+
+
+def serve(host="127.0.0.1", port=8000, workers=4, warm=True):
+    if warm:
+        warm_up()
+    manager = JobManager(workers=workers)
+    httpd = ThreadingHTTPServer((host, port), make_handler(manager))
+    print(f"Logo job API listening on http://{host}:{port} with {workers} workers")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        print("\nShutting down...")
+    finally:
+        httpd.server_close()
+        manager.executor.shutdown(wait=False, cancel_futures=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Long-running HTTP API for logo and content calendar jobs")
+    parser.add_argument("--host", default=config("SERVER_HOST", default="127.0.0.1"))
+    parser.add_argument("--port", type=int, default=config("SERVER_PORT", default=8000, cast=int))
+    parser.add_argument("--workers", type=int, default=config("SERVER_WORKERS", default=4, cast=int))
+    args = parser.parse_args()
+    serve(args.host, args.port, args.workers)
@@ -0,0 +1,170 @@
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from decouple import config
+
+# The active trace and span follow the call stack; use bind_context() for pool workers
+_current_trace = contextvars.ContextVar("current_trace", default=None)
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+class Trace:
+    """One job's spans, appended to a JSONL file as each span finishes"""
+
+    def __init__(self, job_id, path, format="jsonl"):
+        self.job_id = str(job_id)
+        self.trace_id = uuid.uuid4().hex
+        self.path = path
+        self.format = format
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+
+    def export(self, span):
+        record = span.to_otel(self) if self.format == "otel" else span.to_dict(self)
+        line = json.dumps(record, ensure_ascii=False, default=str) + "\n"
+        with self._lock:
+            if not self._file.closed:
+                self._file.write(line)
+                self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class Span:
+    """Timing and attributes of one traced operation"""
+
+    def __init__(self, trace, name, parent_id=None, attributes=None):
+        self.trace = trace
+        self.name = name
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.attributes = dict(attributes or {})
+        self.start_time = time.time()
+        self._started = time.monotonic()
+        self.duration = None
+        self.status = "ok"
+        self.error = None
+
+    def set(self, **attributes):
+        self.attributes.update({key: value for key, value in attributes.items() if value is not None})
+
+    def finish(self, error=None):
+        if self.duration is not None:
+            return
+        self.duration = time.monotonic() - self._started
+        if error is not None:
+            self.status = "error"
+            self.error = f"{type(error).__name__}: {error}"
+        if self.trace is not None:
+            self.trace.export(self)
+
+    def to_dict(self, trace):
+        return {
+            "job_id": trace.job_id,
+            "trace_id": trace.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.start_time,
+            "duration_ms": round(self.duration * 1000, 2),
+            "status": self.status,
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+    def to_otel(self, trace):
+        """The span in OpenTelemetry's OTLP/JSON span shape"""
+        start_ns = int(self.start_time * 1e9)
+        attributes = [{"key": "job.id", "value": {"stringValue": trace.job_id}}]
+        attributes += [{"key": key, "value": _otel_value(value)} for key, value in self.attributes.items()]
+        status = {"code": 2, "message": self.error} if self.status == "error" else {"code": 1}
+        return {
+            "traceId": trace.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id or "",
+            "name": self.name,
+            "kind": 3 if self.name.split(".")[0] in ("anthropic", "openai", "fal", "download") else 1,
+            "startTimeUnixNano": str(start_ns),
+            "endTimeUnixNano": str(start_ns + int(self.duration * 1e9)),
+            "attributes": attributes,
+            "status": status,
+        }
+
+
+def _otel_value(value):
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def tracing_enabled():
+    return config("TRACE_ENABLED", default=False, cast=bool)
+
+
+@contextmanager
+def start_trace(job_id, path=None):
+    """
+    Trace everything under this block into TRACE_DIR/<job_id>.jsonl (TRACE_FORMAT
+    jsonl or otel). Yields the Trace, or None when tracing is off or a trace is
+    already active, in which case spans go to the enclosing trace.
+    """
+    if _current_trace.get() is not None or not tracing_enabled():
+        yield None
+        return
+    if path is None:
+        trace_dir = config("TRACE_DIR", default=os.path.join(os.getcwd(), "output", ".traces"))
+        path = os.path.join(trace_dir, f"{job_id}.jsonl")
+    trace = Trace(job_id, path, format=config("TRACE_FORMAT", default="jsonl"))
+    trace_token = _current_trace.set(trace)
+    try:
+        with span("job", job_id=str(job_id)):
+            yield trace
+    finally:
+        _current_trace.reset(trace_token)
+        trace.close()
+
+
+def start_span(name, **attributes):
+    """Open a span that is finished explicitly, for work that begins and ends in callbacks"""
+    trace = _current_trace.get()
+    parent = _current_span.get()
+    return Span(trace, name, parent.span_id if parent else None, attributes)
+
+
+@contextmanager
+def span(name, **attributes):
+    """Time the enclosed block; failures are recorded with status "error" and re-raised"""
+    current = start_span(name, **attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.finish(error=e)
+        raise
+    else:
+        current.finish()
+    finally:
+        _current_span.reset(token)
+
+
+def bind_context(fn):
+    """Wrap fn so calls on pool threads land in the caller's trace and span"""
+    context = contextvars.copy_context()
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        # A Context can only be entered by one thread at a time, so run each call in a copy
+        return context.copy().run(fn, *args, **kwargs)
+    return wrapper
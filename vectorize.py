@@ -0,0 +1,293 @@
+import argparse
+import os
+import time
+from html import escape
+
+import numpy as np
+from decouple import config
+
+from logo_scoring import border_mask, load_rgba
+
+# Turns sharper than this stay corners; gentler ones are fitted with smooth curves
+CORNER_ANGLE = 50.0
+# Loops smaller than this many working pixels are specks and are dropped
+MIN_AREA = 6.0
+
+
+def vector_settings():
+    """VECTOR_* settings: palette size, simplification tolerance (px) and working resolution"""
+    return {
+        "colors": config("VECTOR_COLORS", default=8, cast=int),
+        "tolerance": config("VECTOR_TOLERANCE", default=1.0, cast=float),
+        "max_size": config("VECTOR_MAX_SIZE", default=512, cast=int),
+    }
+
+
+def _nearest(pixels, centers):
+    # |p - c|^2 = |p|^2 - 2 p.c + |c|^2, and |p|^2 does not change the argmin
+    return ((centers ** 2).sum(1) - 2.0 * pixels @ centers.T).argmin(1)
+
+
+def quantize(rgb, opaque, colors, iterations=12, seed=0):
+    """k-means palette of the opaque pixels; returns (labels with -1 for transparent, palette)"""
+    pixels = rgb[opaque]
+    if len(pixels) == 0:
+        return np.full(opaque.shape, -1), np.zeros((0, 3), dtype=np.float32)
+    rng = np.random.default_rng(seed)
+    sample = pixels[rng.choice(len(pixels), min(len(pixels), 20000), replace=False)]
+
+    # k-means++ initialisation
+    centers = sample[rng.integers(len(sample))][None]
+    for _ in range(1, colors):
+        distance = ((sample[:, None, :] - centers[None]) ** 2).sum(-1).min(1)
+        if distance.sum() <= 1e-9:
+            break
+        centers = np.vstack([centers, sample[rng.choice(len(sample), p=distance / distance.sum())]])
+
+    for _ in range(iterations):
+        assign = _nearest(sample, centers)
+        counts = np.bincount(assign, minlength=len(centers))
+        sums = np.stack([np.bincount(assign, weights=sample[:, c], minlength=len(centers)) for c in range(3)], axis=1)
+        updated = np.where(counts[:, None] > 0, sums / np.maximum(counts, 1)[:, None], centers)
+        if np.abs(updated - centers).max() < 1e-4:
+            centers = updated
+            break
+        centers = updated
+
+    labels = np.full(opaque.shape, -1)
+    labels[opaque] = _nearest(pixels, centers.astype(np.float32))
+    return labels, centers.astype(np.float32)
+
+
+def mode_filter(labels, count):
+    """3x3 majority vote over the label map, which absorbs anti-aliasing fringes"""
+    onehot = (labels[..., None] == np.arange(-1, count)).astype(np.uint8)
+    padded = np.pad(onehot, ((1, 1), (1, 1), (0, 0)), mode="edge")
+    height, width = labels.shape
+    votes = sum(padded[dy:dy + height, dx:dx + width] for dy in range(3) for dx in range(3))
+    return votes.argmax(-1) - 1
+
+
+def trace_loops(mask):
+    """
+    Closed boundary loops of a binary mask as arrays of edge midpoints. Boundary
+    edges are extracted with array ops and linked through a successor table.
+    Using edge midpoints instead of pixel corners removes the staircase.
+    """
+    height, width = mask.shape
+    m = np.pad(mask, 1)
+    inner = m[1:-1, 1:-1]
+    # Each boundary edge is directed with the shape on its right: (x0, y0, dx, dy)
+    edges = []
+    for neighbour, start, direction in (
+        (m[:-2, 1:-1], (0, 0), (1, 0)),   # top: left to right
+        (m[1:-1, 2:], (1, 0), (0, 1)),    # right: downwards
+        (m[2:, 1:-1], (1, 1), (-1, 0)),   # bottom: right to left
+        (m[1:-1, :-2], (0, 1), (0, -1)),  # left: upwards
+    ):
+        ys, xs = np.nonzero(inner & ~neighbour)
+        edges.append(np.stack([xs + start[0], ys + start[1], np.full_like(xs, direction[0]), np.full_like(xs, direction[1])], axis=1))
+    edges = np.concatenate(edges)
+    if len(edges) == 0:
+        return []
+
+    stride = width + 2
+    start_ids = edges[:, 1] * stride + edges[:, 0]
+    end_ids = (edges[:, 1] + edges[:, 3]) * stride + edges[:, 0] + edges[:, 2]
+    order = np.argsort(start_ids, kind="stable")
+    sorted_starts = start_ids[order]
+    first = np.searchsorted(sorted_starts, end_ids, "left")
+    outgoing = np.searchsorted(sorted_starts, end_ids, "right") - first
+    successor = order[first]
+    # Where two pixels touch only diagonally a vertex has two exits; always take the right turn
+    second = order[np.minimum(first + 1, len(order) - 1)]
+    right_turn = np.stack([-edges[:, 3], edges[:, 2]], axis=1)
+    takes_second = (outgoing == 2) & (edges[second, 2:] == right_turn).all(1)
+    successor = np.where(takes_second, second, successor).tolist()
+
+    midpoints = edges[:, :2] + edges[:, 2:] * 0.5
+    visited = np.zeros(len(edges), dtype=bool)
+    loops = []
+    for begin in range(len(edges)):
+        if visited[begin]:
+            continue
+        cycle = []
+        edge = begin
+        while not visited[edge]:
+            visited[edge] = True
+            cycle.append(edge)
+            edge = successor[edge]
+        loops.append(midpoints[cycle])
+    return loops
+
+
+def polygon_area(points):
+    x, y = points[:, 0], points[:, 1]
+    return 0.5 * float(np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1)))
+
+
+def _rdp(points, tolerance):
+    keep = np.zeros(len(points), dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        i, j = stack.pop()
+        if j <= i + 1:
+            continue
+        a, b = points[i], points[j]
+        segment = points[i + 1:j] - a
+        chord = b - a
+        length = np.hypot(*chord)
+        if length > 0:
+            distance = np.abs(segment[:, 0] * chord[1] - segment[:, 1] * chord[0]) / length
+        else:
+            distance = np.hypot(segment[:, 0], segment[:, 1])
+        k = int(distance.argmax())
+        if distance[k] > tolerance:
+            keep[i + 1 + k] = True
+            stack.extend([(i, i + 1 + k), (i + 1 + k, j)])
+    return points[keep]
+
+
+def simplify(loop, tolerance):
+    """Ramer-Douglas-Peucker on a closed loop, split at its two most distant points"""
+    if len(loop) < 4:
+        return loop
+    far = int(np.hypot(*(loop - loop[0]).T).argmax())
+    head = _rdp(loop[:far + 1], tolerance)
+    tail = _rdp(np.vstack([loop[far:], loop[:1]]), tolerance)
+    return np.vstack([head[:-1], tail[:-1]])
+
+
+def fit_curves(points, corner_angle=CORNER_ANGLE):
+    """
+    Cubic Bezier control points through a closed polygon: Catmull-Rom tangents at
+    smooth vertices and zero tangents at corners. Returns (c1, c2, corner flags).
+    """
+    previous, following = np.roll(points, 1, axis=0), np.roll(points, -1, axis=0)
+    incoming, outgoing = points - previous, following - points
+    norms = np.hypot(*incoming.T) * np.hypot(*outgoing.T)
+    cosine = np.where(norms > 0, (incoming * outgoing).sum(1) / np.maximum(norms, 1e-9), 1.0)
+    corners = cosine < np.cos(np.radians(corner_angle))
+    tangents = np.where(corners[:, None], 0.0, (following - previous) / 2.0)
+    c1 = points + tangents / 3.0
+    c2 = following - np.roll(tangents, -1, axis=0) / 3.0
+    return c1, c2, corners
+
+
+def _number(value):
+    text = f"{value:.1f}"
+    if text.endswith(".0"):
+        text = text[:-2]
+    if text == "-0":
+        return "0"
+    return text.replace("0.", ".", 1) if text.startswith(("0.", "-0.")) else text
+
+
+def _pair(point):
+    x, y = _number(point[0]), _number(point[1])
+    # A minus sign or a second leading "." already separates the numbers
+    return f"{x}{y}" if y.startswith("-") or (y.startswith(".") and "." in x) else f"{x} {y}"
+
+
+def _join(pairs):
+    text = pairs[0]
+    for pair in pairs[1:]:
+        text += pair if pair.startswith("-") else " " + pair
+    return text
+
+
+def path_data(loops, scale, tolerance, corner_angle=CORNER_ANGLE):
+    """SVG path data with relative commands for a set of loops in working pixels"""
+    commands = []
+    for loop in loops:
+        # Round first so relative offsets add up exactly and the path cannot drift
+        points = np.round(simplify(loop, tolerance) * scale, 1)
+        points = points[(points != np.roll(points, 1, axis=0)).any(1)]
+        if len(points) < 3:
+            continue
+        c1, c2, corners = fit_curves(points, corner_angle)
+        following = np.roll(points, -1, axis=0)
+        straight = corners & np.roll(corners, -1)
+        parts = [f"M{_pair(points[0])}"]
+        for i in range(len(points)):
+            origin = points[i]
+            if straight[i]:
+                parts.append(f"l{_pair(following[i] - origin)}")
+            else:
+                parts.append("c" + _join([_pair(c1[i] - origin), _pair(c2[i] - origin), _pair(following[i] - origin)]))
+        commands.append("".join(parts) + "z")
+    return "".join(commands)
+
+
+def trace_svg(rgba, width, height, colors=8, tolerance=1.0, transparent_background=True, title=None):
+    """Vectorize an RGBA array (float, [0, 1]) into SVG markup sized width x height"""
+    alpha = rgba[..., 3]
+    rgb = rgba[..., :3] * alpha[..., None] + (1.0 - alpha[..., None])
+    opaque = alpha >= 0.5
+    labels, palette = quantize(rgb, opaque, colors)
+    labels = mode_filter(labels, len(palette))
+
+    if transparent_background and len(palette):
+        # A colour that covers most of the border is the background, not part of the logo
+        border = labels[border_mask(*labels.shape)]
+        border = border[border >= 0]
+        if len(border):
+            background = np.bincount(border, minlength=len(palette)).argmax()
+            if np.mean(border == background) >= 0.8:
+                labels[labels == background] = -1
+
+    areas = np.bincount(labels[labels >= 0], minlength=len(palette))
+    # Largest colour first; each layer also covers the colours drawn on top of it, so no seams show
+    order = [label for label in np.argsort(-areas) if areas[label] > 0]
+    scale = width / labels.shape[1]
+    paths = []
+    for index, label in enumerate(order):
+        mask = np.isin(labels, order[index:])
+        loops = [loop for loop in trace_loops(mask) if abs(polygon_area(loop)) >= MIN_AREA]
+        d = path_data(loops, scale, tolerance)
+        if d:
+            r, g, b = (np.clip(palette[label], 0, 1) * 255).round().astype(int)
+            paths.append(f'<path fill="#{r:02x}{g:02x}{b:02x}" fill-rule="evenodd" d="{d}"/>')
+
+    title_tag = f"<title>{escape(title)}</title>" if title else ""
+    return (f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" viewBox="0 0 {width} {height}">'
+            f'{title_tag}\n' + "\n".join(paths) + "\n</svg>\n")
+
+
+def vectorize(png_path, svg_path=None, colors=None, tolerance=None, max_size=None, title=None):
+    """
+    Trace png_path into a path-based SVG (default: same name, .svg). Larger
+    tolerance (working pixels) gives fewer points and a smaller file.
+    """
+    settings = vector_settings()
+    colors = colors or settings["colors"]
+    tolerance = settings["tolerance"] if tolerance is None else tolerance
+    max_size = max_size or settings["max_size"]
+    svg_path = svg_path or os.path.splitext(png_path)[0] + ".svg"
+
+    started = time.monotonic()
+    from PIL import Image
+    with Image.open(png_path) as image:
+        width, height = image.size
+    rgba = load_rgba(png_path, max_size=max_size)
+    svg = trace_svg(rgba, width, height, colors=colors, tolerance=tolerance, title=title)
+    with open(svg_path, "w", encoding="utf-8") as f:
+        f.write(svg)
+    return {
+        "svg_local_path": svg_path,
+        "bytes": len(svg.encode("utf-8")),
+        "paths": svg.count("<path"),
+        "seconds": round(time.monotonic() - started, 3),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Trace a logo PNG into a compact path-based SVG")
+    parser.add_argument("png")
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--colors", type=int, default=None)
+    parser.add_argument("--tolerance", type=float, default=None, help="Simplification tolerance in working pixels")
+    parser.add_argument("--max-size", type=int, default=None, help="Working resolution")
+    args = parser.parse_args()
+    print(vectorize(args.png, args.output, args.colors, args.tolerance, args.max_size))